@@ -0,0 +1 @@
+"""Shared RAG building blocks used alongside the course modules."""
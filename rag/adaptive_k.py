@@ -0,0 +1,104 @@
+"""Adaptive-k retrieval: let the score curve decide how many chunks to keep.
+
+``vectorstore.as_retriever(search_kwargs={"k": 2})`` in module 11 and
+``BM25Retriever.from_texts(..., k=3)`` in module 14 return a fixed number of
+chunks.  A question answered by one chunk gets padding; a question that
+needs five gets starved.  ``AdaptiveKRetriever`` over-fetches once from the
+first stage and cuts the ranked list where its scores say the relevant part
+ends:
+
+- at the largest drop between neighbouring scores, measured relative to the
+  spread of the fetched scores, provided it is at least ``min_gap`` of that
+  spread and ``cliff_ratio`` times the median of the other drops (a clear
+  "cliff" after the relevant chunks, not one step of a steady decline);
+- otherwise, once the kept chunks hold ``saturation`` of the cumulative
+  relevance above the weakest fetched score (no cliff, so stop when further
+  chunks add little);
+
+always keeping between ``min_k`` and ``max_k`` chunks.  Both rules depend
+only on score *ratios*, so they work for cosine similarities and unbounded
+BM25 scores alike.  Scores come from the same place as in
+``rag.hybrid``: ``rag.vectorstore.scored_search`` for vector-store retrievers
+and ``get_documents_with_scores`` where a retriever provides it.
+"""
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from rag.hybrid import awith_scores, with_scores
+
+
+def adaptive_cutoff(scores, min_k=1, max_k=None, min_gap=0.2, saturation=0.8, cliff_ratio=3.0):
+    """Number of leading entries of ``scores`` (sorted best first) to keep."""
+    scores = np.asarray(scores, dtype=np.float64)
+    count = len(scores)
+    max_k = count if max_k is None else min(max_k, count)
+    min_k = max(1, min(min_k, max_k))
+    if count <= min_k:
+        return count
+    spread = scores[0] - scores[-1]
+    if spread <= 0:
+        # Flat scores carry no signal about where relevance ends.
+        return max_k
+
+    # Drop after position i (0-based) is scores[i] - scores[i + 1]; cutting
+    # there keeps i + 1 entries.  A cliff before min_k still ends the list at
+    # min_k rather than falling through to the saturation rule.
+    all_gaps = (scores[:-1] - scores[1:]) / spread
+    gaps = all_gaps[:max_k]
+    if len(gaps) and gaps.max() >= min_gap:
+        best = int(np.argmax(gaps))
+        # With few scores any drop is a large share of the spread; a cliff must also
+        # stand out from the typical drop (a linear decline has none).
+        others = np.delete(all_gaps, best)
+        if not len(others) or gaps[best] >= cliff_ratio * np.median(others):
+            return max(min_k, best + 1)
+
+    relevance = scores - scores[-1]
+    cumulative = np.cumsum(relevance) / relevance.sum()
+    k = int(np.searchsorted(cumulative, saturation)) + 1
+    return max(min_k, min(k, max_k))
+
+
+class AdaptiveKRetriever(BaseRetriever):
+    """Over-fetch from ``retriever`` and cut the results at a score gap.
+
+    Configure the first stage to over-fetch, e.g.
+    ``store.as_retriever(search_kwargs={"k": 20})`` or
+    ``PersistentBM25Retriever.from_texts(chunks, k=20)``.  Returned documents
+    carry the first-stage score in ``metadata["relevance_score"]``.
+    Retrievers that expose no scores fall back to their first ``max_k``
+    results.
+    """
+
+    retriever: BaseRetriever
+    """First-stage retriever, configured to over-fetch."""
+    min_k: int = 1
+    """Always return at least this many documents (if available)."""
+    max_k: int = 8
+    """Never return more than this many documents."""
+    min_gap: float = 0.2
+    """Smallest drop, as a fraction of the fetched score spread, that counts as a cliff."""
+    saturation: float = 0.8
+    """Share of cumulative relevance to keep when there is no cliff."""
+    cliff_ratio: float = 3.0
+    """How many times the median drop a cliff must be."""
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        ranked = with_scores(self.retriever, query, {"callbacks": run_manager.get_child()})
+        return self._cut(ranked)
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        ranked = await awith_scores(self.retriever, query, {"callbacks": run_manager.get_child()})
+        return self._cut(ranked)
+
+    def _cut(self, ranked):
+        if any(score is None for _, score in ranked):
+            return [doc for doc, _ in ranked[:self.max_k]]
+        k = adaptive_cutoff([score for _, score in ranked], self.min_k, self.max_k, self.min_gap, self.saturation,
+                            self.cliff_ratio)
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "relevance_score": score}, id=doc.id)
+            for doc, score in ranked[:k]
+        ]
@@ -0,0 +1,320 @@
+"""Approximate nearest-neighbour search: an IVF index with optional product quantisation.
+
+Exact search (``rag.vectorstore``) scores every row, which stops scaling
+once a corpus reaches millions of chunks.  ``IVFIndex`` clusters the vectors
+with spherical k-means and only scores the ``nprobe`` clusters whose
+centroids are closest to the query:
+
+- ``IVFIndex(nlist)`` ("IVF-Flat") keeps the vectors, reordered so each
+  cluster is one contiguous block;
+- ``IVFIndex(nlist, pq_subvectors=m)`` ("IVF-PQ") keeps one byte per
+  sub-vector of the residual from the cluster centroid instead, scores with per-query lookup tables, and re-scores a
+  shortlist against the full-precision vectors when they are available.
+
+Indexes are saved as plain ``.npy`` files and loaded memory-mapped.  Attach
+one to a ``NumpyVectorStore`` with ``store.build_index(IVFIndex(...))``;
+``nprobe`` and ``rerank`` can then be tuned per query through
+``as_retriever(search_kwargs={"k": 5, "nprobe": 16})``.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+from rag.quantization import QuantizedIndex
+from rag.vectorstore import top_k_indices
+
+_META_FILE = "meta.json"
+_ASSIGN_BLOCK_ROWS = 8192
+
+
+def _assign(data, centroids, metric):
+    """Nearest centroid for each row of ``data`` (by inner product or L2)."""
+    labels = np.empty(len(data), dtype=np.int64)
+    centroid_norms = (centroids * centroids).sum(axis=1) if metric == "l2" else None
+    for start in range(0, len(data), _ASSIGN_BLOCK_ROWS):
+        block = np.asarray(data[start:start + _ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        products = block @ centroids.T
+        if metric == "l2":
+            # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2; ||x||^2 is constant per row.
+            labels[start:start + len(block)] = np.argmin(centroid_norms - 2 * products, axis=1)
+        else:
+            labels[start:start + len(block)] = np.argmax(products, axis=1)
+    return labels
+
+
+def kmeans(data, k, iterations=20, metric="ip", seed=0):
+    """Lloyd's k-means returning a ``(k, dim)`` float32 centroid matrix.
+
+    ``metric="ip"`` is spherical k-means (centroids re-normalised each step),
+    which matches cosine search over normalised vectors; ``"l2"`` is the
+    ordinary Euclidean variant used for PQ codebooks.
+    """
+    data = np.asarray(data, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(data, centroids, metric)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        present = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        sums[present] = np.add.reduceat(data[order], starts, axis=0)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters from random points so k stays fixed.
+            sums[empty] = data[rng.choice(len(data), size=int(empty.sum()), replace=False)]
+            counts[empty] = 1
+        new = sums / counts[:, None]
+        if metric == "ip":
+            norms = np.linalg.norm(new, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            new /= norms
+        if np.allclose(new, centroids, atol=1e-6):
+            centroids = new
+            break
+        centroids = new
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file index over inner-product (cosine) similarity.
+
+    Args:
+        nlist: Number of k-means clusters.  ``None`` picks ``4 * sqrt(n)`` at
+            fit time.
+        nprobe: Default number of clusters scored per query.  Higher is more
+            accurate and slower.
+        pq_subvectors: Split vectors into this many sub-vectors and store one
+            byte code per sub-vector (IVF-PQ).  ``None`` stores the vectors.
+        rerank: For IVF-PQ, re-score ``k * rerank`` candidates with the full
+            vectors passed to ``search``.
+        train_size: Maximum number of rows sampled to train k-means.
+        train_iterations: k-means iterations for centroids and codebooks.
+        seed: Seed for sampling and k-means initialisation.
+    """
+
+    def __init__(self, nlist=None, nprobe=8, pq_subvectors=None, rerank=4, train_size=50000, train_iterations=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_subvectors = pq_subvectors
+        self.rerank = rerank
+        self.train_size = train_size
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self.dim = None
+        self.centroids = None
+        self.codebooks = None
+        self.list_offsets = None
+        self.row_ids = None
+        self.payload = None
+
+    def __len__(self):
+        return 0 if self.row_ids is None else len(self.row_ids)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def fit(self, vectors):
+        """Train centroids (and PQ codebooks) on ``vectors`` and index them as rows ``0..n-1``."""
+        vectors = np.asarray(vectors)
+        if len(vectors) == 0:
+            raise ValueError("Cannot fit an index on zero vectors")
+        self.dim = vectors.shape[1]
+        if self.pq_subvectors and self.dim % self.pq_subvectors:
+            raise ValueError(f"dim {self.dim} is not divisible by pq_subvectors={self.pq_subvectors}")
+        if self.nlist is None:
+            self.nlist = max(1, int(4 * math.sqrt(len(vectors))))
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), self.train_size)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), size=sample_size, replace=False))], dtype=np.float32)
+        self.centroids = kmeans(sample, self.nlist, self.train_iterations, metric="ip", seed=self.seed)
+        self.nlist = len(self.centroids)
+        if self.pq_subvectors:
+            # Codebooks quantise the residual from the cluster centroid
+            # (IVFADC), which is far more precise than quantising raw vectors.
+            residuals = sample - self.centroids[_assign(sample, self.centroids, "ip")]
+            self.codebooks = np.stack([
+                kmeans(part, 256, self.train_iterations, metric="l2", seed=self.seed)
+                for part in np.split(residuals, self.pq_subvectors, axis=1)
+            ])
+
+        self.list_offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        self.row_ids = np.zeros(0, dtype=np.int64)
+        self.payload = None
+        self.add(vectors, start_row=0)
+        return self
+
+    def add(self, vectors, start_row=None):
+        """Assign new ``vectors`` (rows ``start_row...``) to their clusters."""
+        if not self.is_trained:
+            raise ValueError("Index is not trained; call fit() first")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if start_row is None:
+            start_row = len(self)
+        labels = _assign(vectors, self.centroids, "ip")
+        new_rows = np.arange(start_row, start_row + len(vectors), dtype=np.int64)
+        new_payload = self._encode(vectors, labels)
+
+        # Rebuild the cluster-contiguous layout: existing entries keep their
+        # order, new ones are appended to the end of their cluster.
+        old_labels = np.repeat(np.arange(self.nlist), np.diff(self.list_offsets))
+        all_labels = np.concatenate([old_labels, labels])
+        order = np.argsort(all_labels, kind="stable")
+        self.row_ids = np.concatenate([np.asarray(self.row_ids), new_rows])[order]
+        if self.payload is None or len(self.payload) == 0:
+            self.payload = new_payload[order]
+        else:
+            self.payload = np.concatenate([np.asarray(self.payload), new_payload])[order]
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(all_labels, minlength=self.nlist))])
+
+    def _encode(self, vectors, labels):
+        if not self.pq_subvectors:
+            return vectors
+        parts = np.split(vectors - self.centroids[labels], self.pq_subvectors, axis=1)
+        return np.stack(
+            [_assign(part, codebook, "l2") for part, codebook in zip(parts, self.codebooks)], axis=1
+        ).astype(np.uint8)
+
+    # ------------------------------------------------------------------
+    # Searching
+    # ------------------------------------------------------------------
+
+    def search(self, query, k, mask=None, vectors=None, nprobe=None, rerank=None):
+        """Approximate top-``k``: returns ``(rows, scores)``, best first.
+
+        Args:
+            query: Query vector (normalised for cosine search).
+            k: Number of results.
+            mask: Optional boolean array over rows; ``False`` rows are skipped.
+                Probing then continues past ``nprobe`` clusters, nearest
+                first, until ``k`` unmasked rows have been scored, so a
+                selective filter still returns ``k`` results.
+            vectors: Full-precision row matrix, used to re-score IVF-PQ
+                candidates.
+            nprobe: Clusters to score (defaults to ``self.nprobe``).
+            rerank: Shortlist multiplier for IVF-PQ re-scoring.
+        """
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if len(self) == 0:
+            return empty
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        if mask is None:
+            probes = top_k_indices(centroid_scores, nprobe)
+        else:
+            probes = np.argsort(-centroid_scores, kind="stable")
+
+        if self.pq_subvectors:
+            table = np.einsum("mcd,md->mc", self.codebooks, query.reshape(self.pq_subvectors, -1))
+        row_parts, score_parts = [], []
+        live = 0
+        for probed, cluster in enumerate(probes):
+            if probed >= nprobe and live >= k:
+                break
+            start, end = self.list_offsets[cluster], self.list_offsets[cluster + 1]
+            if start == end:
+                continue
+            block, ids = self.payload[start:end], self.row_ids[start:end]
+            if mask is not None:
+                keep = mask[ids]
+                if not keep.any():
+                    continue
+                block, ids = block[keep], ids[keep]
+            live += len(ids)
+            if self.pq_subvectors:
+                scores = table[0, block[:, 0]] + centroid_scores[cluster]
+                for m in range(1, self.pq_subvectors):
+                    scores += table[m, block[:, m]]
+            else:
+                scores = np.asarray(block, dtype=np.float32) @ query
+            row_parts.append(ids)
+            score_parts.append(scores)
+        if not row_parts:
+            return empty
+
+        rows = np.concatenate(row_parts)
+        scores = np.concatenate(score_parts)
+
+        rerank = self.rerank if rerank is None else rerank
+        if self.pq_subvectors and vectors is not None and rerank:
+            # Sorted rows keep reads from a memory-mapped matrix sequential.
+            rows = np.sort(rows[top_k_indices(scores, k * rerank)])
+            scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+        best = top_k_indices(scores, k)
+        return rows[best], scores[best]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write the index to directory ``path`` as ``.npy`` files."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "row_ids": self.row_ids,
+            "payload": self.payload,
+        }
+        if self.pq_subvectors:
+            arrays["codebooks"] = self.codebooks
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + ".npy"), np.asarray(array))
+        meta = {
+            "kind": "ivf",
+            "dim": self.dim,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "pq_subvectors": self.pq_subvectors,
+            "rerank": self.rerank,
+        }
+        with open(os.path.join(path, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open an index saved with ``save``; large arrays are memory-mapped."""
+        with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(
+            nlist=meta["nlist"],
+            nprobe=meta["nprobe"],
+            pq_subvectors=meta["pq_subvectors"],
+            rerank=meta["rerank"],
+        )
+        index.dim = meta["dim"]
+        mode = "r" if mmap else None
+        index.centroids = np.load(os.path.join(path, "centroids.npy"))
+        index.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        index.row_ids = np.load(os.path.join(path, "row_ids.npy"), mmap_mode=mode)
+        index.payload = np.load(os.path.join(path, "payload.npy"), mmap_mode=mode)
+        if index.pq_subvectors:
+            index.codebooks = np.load(os.path.join(path, "codebooks.npy"))
+        return index
+
+    @property
+    def nbytes(self):
+        """Approximate in-memory size of the index arrays."""
+        arrays = [self.centroids, self.list_offsets, self.row_ids, self.payload, self.codebooks]
+        return sum(np.asarray(a).nbytes for a in arrays if a is not None)
+
+
+def load_index(path, mmap=True):
+    """Open an index saved by ``IVFIndex.save`` or ``QuantizedIndex.save``."""
+    with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+        kind = json.load(f)["kind"]
+    if kind == "ivf":
+        return IVFIndex.load(path, mmap=mmap)
+    return QuantizedIndex.load(path, mmap=mmap)
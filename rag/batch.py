@@ -0,0 +1,161 @@
+"""Async batch runner for LCEL retrieval chains.
+
+``retrieval_chain_example.py`` (module 11) and the module 14 BM25 chain call
+``.invoke`` on one question at a time, so a nightly job over tens of
+thousands of questions pays embedding, search and LLM latency back to back
+for every one.  ``BatchRunner`` takes the same chain,
+
+    {"context": retriever, "question": RunnablePassthrough()} | prompt | llm
+
+splits it into its retrieval step and the rest, and pipelines the work:
+
+- questions are embedded ``embed_batch_size`` at a time with one
+  ``embed_documents`` call (vector-store retrievers); other retrievers, such
+  as BM25, are called per question;
+- searches run concurrently in worker threads, at most ``max_retrievals``
+  at once;
+- at most ``max_concurrency`` LLM requests are in flight;
+- at most ``max_pending`` questions are admitted at a time, so memory stays
+  flat however long the input is;
+- results stream back from ``astream`` as they complete (each carries its
+  input index), and a failing question is reported instead of aborting the
+  run.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableSequence
+from langchain_core.vectorstores import VectorStoreRetriever
+
+
+@dataclass
+class BatchResult:
+    """One answered (or failed) question from ``BatchRunner``."""
+
+    index: int
+    question: str
+    output: object = None
+    error: BaseException = None
+    seconds: float = 0.0
+
+
+def split_retrieval_chain(chain):
+    """Split ``{"context": retriever[ | fmt], "question": passthrough} | rest``.
+
+    Returns ``(retriever, post_retrieval, context_key, question_key, rest)``:
+    ``post_retrieval`` is the runnable applied to the documents (e.g.
+    ``format_docs``) or ``None``.
+    """
+    if not isinstance(chain, RunnableSequence) or not isinstance(chain.first, RunnableParallel):
+        raise ValueError("expected a chain of the form {'context': retriever, 'question': RunnablePassthrough()} | ...")
+    context_key = question_key = retriever = post_retrieval = None
+    for key, step in chain.first.steps__.items():
+        if isinstance(step, RunnablePassthrough):
+            question_key = key
+        elif isinstance(step, BaseRetriever):
+            context_key, retriever = key, step
+        elif isinstance(step, RunnableSequence) and isinstance(step.first, BaseRetriever):
+            context_key, retriever = key, step.first
+            post_retrieval = RunnableSequence(*step.steps[1:]) if len(step.steps) > 2 else step.steps[1]
+    if retriever is None or question_key is None:
+        raise ValueError("the first step must map one key to a retriever and one to RunnablePassthrough()")
+    rest = chain.steps[1:]
+    return retriever, post_retrieval, context_key, question_key, RunnableSequence(*rest) if len(rest) > 1 else rest[0]
+
+
+class BatchRunner:
+    """Answer many questions through an LCEL retrieval chain concurrently.
+
+    Args:
+        chain: ``{"context": retriever, "question": RunnablePassthrough()} | ...``.
+        max_concurrency: LLM requests in flight at once.
+        max_retrievals: Searches running at once.
+        embed_batch_size: Questions per ``embed_documents`` call (capped at
+            ``max_pending``, since a whole batch is admitted before it is
+            embedded).
+        max_pending: Questions admitted at once (defaults to
+            ``4 * max_concurrency``, at least one embedding batch).
+    """
+
+    def __init__(self, chain, max_concurrency=16, max_retrievals=8, embed_batch_size=64, max_pending=None):
+        (self.retriever, self.post_retrieval, self.context_key,
+         self.question_key, self.answer_chain) = split_retrieval_chain(chain)
+        self.max_concurrency = max_concurrency
+        self.max_retrievals = max_retrievals
+        self.max_pending = max_pending or max(4 * max_concurrency, embed_batch_size)
+        self.embed_batch_size = min(embed_batch_size, self.max_pending)
+
+    def run(self, questions):
+        """Answer ``questions``; returns ``BatchResult`` objects in input order."""
+        return asyncio.run(self.arun(questions))
+
+    async def arun(self, questions):
+        results = [None] * len(questions)
+        async for result in self.astream(questions):
+            results[result.index] = result
+        return results
+
+    async def astream(self, questions):
+        """Yield a ``BatchResult`` per question as soon as it completes."""
+        questions = list(questions)
+        llm_slots = asyncio.Semaphore(self.max_concurrency)
+        search_slots = asyncio.Semaphore(self.max_retrievals)
+        admission = asyncio.Semaphore(self.max_pending)
+        done = asyncio.Queue()
+
+        async def answer(index, question, started, documents):
+            try:
+                context = await documents
+                if self.post_retrieval is not None:
+                    context = await self.post_retrieval.ainvoke(context)
+                async with llm_slots:
+                    output = await self.answer_chain.ainvoke({self.context_key: context, self.question_key: question})
+                result = BatchResult(index, question, output=output)
+            except Exception as exc:  # noqa: BLE001 - reported per question
+                result = BatchResult(index, question, error=exc)
+            result.seconds = time.perf_counter() - started
+            admission.release()
+            await done.put(result)
+
+        async def produce():
+            tasks = []
+            for start in range(0, len(questions), self.embed_batch_size):
+                batch = questions[start:start + self.embed_batch_size]
+                for _ in batch:
+                    await admission.acquire()
+                started = time.perf_counter()
+                for offset, documents in enumerate(self._retrieve_batch(batch, search_slots)):
+                    tasks.append(asyncio.create_task(answer(start + offset, batch[offset], started, documents)))
+            await asyncio.gather(*tasks)
+
+        producer = asyncio.create_task(produce())
+        try:
+            for _ in range(len(questions)):
+                yield await done.get()
+            await producer
+        finally:
+            producer.cancel()
+
+    def _retrieve_batch(self, batch, search_slots):
+        """One awaitable list of documents per question in ``batch``."""
+        retriever = self.retriever
+        if isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity":
+            vectors = asyncio.ensure_future(retriever.vectorstore.embeddings.aembed_documents(batch))
+
+            async def search(offset):
+                embedded = await vectors
+                async with search_slots:
+                    return await asyncio.to_thread(
+                        retriever.vectorstore.similarity_search_by_vector, embedded[offset], **retriever.search_kwargs
+                    )
+
+            return [search(offset) for offset in range(len(batch))]
+
+        async def invoke(question):
+            async with search_slots:
+                return await retriever.ainvoke(question)
+
+        return [invoke(question) for question in batch]
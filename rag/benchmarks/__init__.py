@@ -0,0 +1 @@
+"""Benchmarks for the RAG toolkit - run with: python -m rag.benchmarks.<name>"""
@@ -0,0 +1,249 @@
+"""Offline fixtures shared by the benchmarks (no API keys or downloads needed)."""
+
+import asyncio
+import os
+import random
+import re
+import time
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "utils", "docs")
+
+_WORD = re.compile(r"\w+")
+
+TOPICS = {
+    "retrieval": "vector embeddings similarity search index retriever query nearest neighbours chunk store recall",
+    "agents": "agent tool planner reasoning action observation loop memory graph node state",
+    "training": "model weights gradient loss dataset epoch optimiser batch learning rate overfitting",
+    "evaluation": "faithfulness precision judge metric reference answer grading score dataset benchmark",
+    "graphs": "entity relationship neo4j cypher node edge knowledge triple schema traversal",
+    "prompts": "prompt template instruction few-shot example variable message system human format",
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings built by hashing tokens into buckets.
+
+    Texts that share words get similar vectors, which is enough to exercise
+    retrieval code paths offline.  ``latency`` adds a fixed sleep per call to
+    mimic a remote embedding API.
+    """
+
+    def __init__(self, dim=256, latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _WORD.findall(text.lower()):
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """Local stand-in for a chat LLM with a fixed per-call latency.
+
+    ``respond`` maps the prompt text to the reply (defaults to a short
+    acknowledgement).  The async path sleeps with ``asyncio.sleep``, so many
+    calls can be in flight at once, as with a real API.
+    """
+
+    latency: float = 0.05
+    respond: object = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-model"
+
+    def _reply(self, messages):
+        self.calls += 1
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = self.respond(prompt) if self.respond else f"Answer based on {len(prompt)} characters of context."
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def synthetic_sentences(count, seed=0, topic_run=(4, 12)):
+    """Generate ``count`` sentences that stay on one topic for a few sentences at a time."""
+    rng = random.Random(seed)
+    names = list(TOPICS)
+    sentences = []
+    while len(sentences) < count:
+        words = TOPICS[rng.choice(names)].split()
+        for _ in range(rng.randint(*topic_run)):
+            picked = rng.sample(words, rng.randint(5, 9))
+            sentences.append(" ".join(picked).capitalize() + ".")
+    return sentences[:count]
+
+
+def synthetic_document(sentence_count, seed=0):
+    """A long document made of topic-coherent runs of synthetic sentences."""
+    return " ".join(synthetic_sentences(sentence_count, seed=seed))
+
+
+def random_unit_vectors(count, dim, seed=0, dtype=np.float32):
+    """``count`` random L2-normalised vectors (a stand-in for a large embedding corpus)."""
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((count, dim)).astype(dtype)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def clustered_unit_vectors(count, dim, clusters=512, spread=0.6, seed=0, centers_seed=0):
+    """Normalised vectors scattered around ``clusters`` topic centres.
+
+    Real embedding corpora are clustered by topic, which is what IVF-style
+    indexes exploit; uniformly random vectors would understate their recall.
+    Vectors drawn with the same ``centers_seed`` share the same centres, so
+    queries can be generated separately from the corpus.
+    """
+    centers = random_unit_vectors(clusters, dim, seed=centers_seed)
+    rng = np.random.default_rng(seed + 1)
+    labels = rng.integers(0, clusters, size=count)
+    noise = rng.standard_normal((count, dim)).astype(np.float32) * np.float32(spread / np.sqrt(dim))
+    matrix = centers[labels] + noise
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+class ApproximateEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per word or symbol.
+
+    Used only when tiktoken cannot download its encoding files; counts run
+    somewhat below ``cl100k_base`` on English text.
+    """
+
+    name = "approximate"
+    _TOKEN = re.compile(r"\w+|[^\w\s]")
+
+    def encode(self, text, **kwargs):
+        return self._TOKEN.findall(text)
+
+
+def load_encoding(name="cl100k_base"):
+    """``(encoding, is_tiktoken)``: the tiktoken encoding, or ``ApproximateEncoding`` offline."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name), True
+    except Exception:  # noqa: BLE001 - no network for the encoding download
+        return ApproximateEncoding(), False
+
+
+def load_sample_texts():
+    """Return ``{filename: text}`` for the plain-text samples in ``utils/docs``."""
+    texts = {}
+    for name in ("sample_text.txt", "sample_documentation.md", "sample_code.py"):
+        path = os.path.join(DOCS_DIR, name)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                texts[name] = f.read()
+    return texts
+
+
+# The two samples from module 15 (rag_evaluation_example.py), verbatim.
+MODULE_15_SAMPLES = [
+    {
+        "question": "How do information systems combine document search with text generation?",
+        "reference": "Information systems combine document search with text generation by first finding relevant "
+                     "documents from a knowledge base, then using those documents to generate accurate, "
+                     "context-aware responses.",
+        "contexts": [
+            "Information systems integrate document search with text generation by first retrieving relevant "
+            "passages from a knowledge base, then using those passages to inform the text generation process.",
+            "By incorporating search mechanisms, information systems leverage external knowledge sources, allowing "
+            "the system to access current information beyond its initial training data.",
+        ],
+    },
+    {
+        "question": "How do information systems combine document search with text generation?",
+        "reference": "Information systems combine document search with text generation by retrieving relevant "
+                     "documents and using them to generate accurate responses.",
+        "contexts": [
+            "Information systems integrate document search with text generation by first retrieving relevant "
+            "passages from a knowledge base.",
+            "By incorporating search mechanisms, information systems leverage external knowledge sources, allowing "
+            "access to current information.",
+            "Database systems store and organize information for efficient retrieval.",
+        ],
+    },
+]
+
+# Questions over utils/docs with reference answers taken from the documents.
+DOCS_QA = [
+    ("What is LangChain?", "LangChain is a framework for developing applications powered by language models."),
+    ("What do chains let you do?",
+     "Chains allow you to combine multiple components together to create an application."),
+    ("How do agents decide what to do?", "Agents use an LLM to determine which actions to take and in what order."),
+    ("What does memory give chains and agents?",
+     "Memory gives chains and agents the ability to remember information from previous interactions."),
+    ("What are the steps to get started with LangChain?",
+     "Install the LangChain package, set up your API keys and create your first chain."),
+    ("Which document loader is simplest for plain text?",
+     "The TextLoader is one of the simplest document loaders in LangChain."),
+    ("What are use cases for loading plain text files?",
+     "Configuration files, documentation, notes and memos, code comments and any plain text content."),
+    ("What should you use for reusable prompts?", "Always use prompt templates for reusable prompts."),
+    ("What does it mean for an application to be context-aware?",
+     "Context-aware applications connect a language model to sources of context."),
+    ("When should you consider using agents?", "Consider using agents for complex workflows."),
+]
+
+
+def evaluation_set(k=3, chunk_size=400):
+    """Module 15's samples plus ``DOCS_QA`` with top-``k`` BM25 contexts from ``utils/docs``.
+
+    Each item is ``{"question", "reference", "contexts"}``.
+    """
+    from rag.bm25 import PersistentBM25Retriever
+    from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter
+    from rag.tokenizer import Tokenizer
+
+    splitter = OffsetRecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0)
+    texts = load_sample_texts()
+    chunks = [chunk for name in ("sample_documentation.md", "sample_text.txt") for chunk in splitter.split_text(texts[name])]
+    retriever = PersistentBM25Retriever.from_texts(chunks, k=k, preprocess_func=Tokenizer())
+    items = [dict(sample) for sample in MODULE_15_SAMPLES]
+    for question, reference in DOCS_QA:
+        contexts = [doc.page_content for doc in retriever.invoke(question)]
+        items.append({"question": question, "reference": reference, "contexts": contexts})
+    return items
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    """Run ``fn`` ``repeat`` times and return ``(last_result, best_seconds)``."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
@@ -0,0 +1,99 @@
+"""Benchmark: fixed-k retrieval vs adaptive-k cut at score gaps.
+
+Each synthetic question is answered by a group of 1-6 "fact" chunks (sharing
+a rare product name) hidden in a corpus of topic sentences, so the ideal k
+varies per question.  Reports chunks and words sent to the LLM per question
+and the recall/precision of the relevant chunks.
+
+Run with: python -m rag.benchmarks.adaptive_k
+"""
+
+import random
+import statistics
+
+from rag.adaptive_k import AdaptiveKRetriever
+from rag.benchmarks._fixtures import TOPICS, HashingEmbeddings, synthetic_sentences, timed
+from rag.bm25 import PersistentBM25Retriever
+from rag.tokenizer import Tokenizer
+from rag.vectorstore import NumpyVectorStore
+
+BACKGROUND = 20000
+QUESTIONS = 300
+FETCH_K = 20
+FIXED_K = [2, 4, 8]
+_SYLLABLES = ["ka", "lo", "mi", "zu", "re", "tan", "vo", "xi", "pe", "dro", "qua", "sen"]
+
+
+def fact_groups(count, seed=0):
+    """``[(question, [fact chunk, ...])]`` with 1-6 facts per question."""
+    rng = random.Random(seed)
+    names, groups = set(), []
+    while len(groups) < count:
+        name = "".join(rng.sample(_SYLLABLES, 3))
+        if name in names:
+            continue
+        names.add(name)
+        topic = TOPICS[rng.choice(list(TOPICS))].split()
+        facts = [
+            f"The {name} release changes {' '.join(rng.sample(topic, 4))} in {name} deployments."
+            for _ in range(rng.choice([1, 1, 2, 3, 4, 6]))
+        ]
+        groups.append((f"What changed in the {name} release for {' '.join(rng.sample(topic, 2))}?", facts))
+    return groups
+
+
+def _evaluate(retriever, groups, relevant_of):
+    chunks, words, recall, precision = [], [], [], []
+    for question, facts in groups:
+        docs = retriever.invoke(question)
+        hits = sum(relevant_of(doc) == question for doc in docs)
+        chunks.append(len(docs))
+        words.append(sum(len(doc.page_content.split()) for doc in docs))
+        recall.append(hits / len(facts))
+        precision.append(hits / len(docs) if docs else 0.0)
+    return [statistics.mean(values) for values in (chunks, words, recall, precision)]
+
+
+def main():
+    """Compare context size and recall of fixed and adaptive k."""
+    print("\n" + "=" * 70)
+    print(f"✂️  Adaptive-k Retrieval Benchmark ({QUESTIONS} questions, {BACKGROUND} background chunks)")
+    print("=" * 70)
+
+    groups = fact_groups(QUESTIONS)
+    texts = synthetic_sentences(BACKGROUND, seed=5)
+    metadatas = [{"question": None}] * len(texts)
+    for question, facts in groups:
+        texts.extend(facts)
+        metadatas.extend({"question": question} for _ in facts)
+    sizes = [len(facts) for _, facts in groups]
+    print(f"  relevant chunks per question: mean {statistics.mean(sizes):.1f}, min {min(sizes)}, max {max(sizes)}")
+
+    def relevant_of(doc):
+        return doc.metadata["question"]
+
+    store = NumpyVectorStore.from_texts(texts, HashingEmbeddings(), metadatas=metadatas)
+    first_stages = {
+        "dense (NumpyVectorStore)": lambda k: store.as_retriever(search_kwargs={"k": k}),
+        "BM25 (PersistentBM25Retriever)": lambda k, tokenizer=Tokenizer(): PersistentBM25Retriever.from_texts(
+            texts, metadatas=metadatas, k=k, preprocess_func=tokenizer
+        ),
+    }
+
+    for label, make in first_stages.items():
+        print(f"\n  {label}:")
+        print(f"    {'retriever':<30} {'chunks/q':>8} {'words/q':>8} {'recall':>7} {'precision':>9} {'ms/q':>6}")
+        over_fetch = make(FETCH_K)
+        rows = [(f"fixed k={k}", make(k) if label.startswith("dense") else over_fetch.model_copy(update={"k": k}))
+                for k in FIXED_K]
+        rows.append(("adaptive (defaults)", AdaptiveKRetriever(retriever=over_fetch)))
+        rows.append(("adaptive (min_k=2)", AdaptiveKRetriever(retriever=over_fetch, min_k=2)))
+        for name, retriever in rows:
+            (chunks, words, recall, precision), seconds = timed(_evaluate, retriever, groups, relevant_of)
+            print(f"    {name:<30} {chunks:>8.1f} {words:>8.0f} {recall:>7.3f} {precision:>9.3f}"
+                  f" {seconds / QUESTIONS * 1000:>6.2f}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
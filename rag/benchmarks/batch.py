@@ -0,0 +1,98 @@
+"""Benchmark: answering many questions through an LCEL retrieval chain.
+
+Sequential ``.invoke`` vs LangChain's thread-pool ``.batch`` vs ``BatchRunner``,
+against a local fake LLM and an embedding model with simulated API latency.
+
+Run with: python -m rag.benchmarks.batch
+"""
+
+import asyncio
+import random
+import time
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnablePassthrough
+
+from rag.batch import BatchRunner
+from rag.benchmarks._fixtures import TOPICS, FakeChatModel, HashingEmbeddings, synthetic_sentences
+from rag.bm25 import PersistentBM25Retriever
+from rag.tokenizer import Tokenizer
+from rag.vectorstore import NumpyVectorStore
+
+DOCUMENTS = 20000
+QUESTIONS = 1000
+SEQUENTIAL_SAMPLE = 30
+EMBED_LATENCY = 0.03
+LLM_LATENCY = 0.1
+CONCURRENCY = [16, 64]
+
+
+def questions(count, seed=0):
+    rng = random.Random(seed)
+    words = [word for topic in TOPICS.values() for word in topic.split()]
+    return [f"What about {' '.join(rng.sample(words, 3))}?" for _ in range(count)]
+
+
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def build_chain(retriever):
+    prompt = ChatPromptTemplate.from_template("Answer using the context:\n{context}\n\nQuestion: {question}")
+    llm = FakeChatModel(latency=LLM_LATENCY)
+    return {"context": retriever | format_docs, "question": RunnablePassthrough()} | prompt | llm | StrOutputParser()
+
+
+async def _first_and_total(runner, items):
+    start, first = time.perf_counter(), None
+    failures = 0
+    async for result in runner.astream(items):
+        first = first or time.perf_counter() - start
+        failures += result.error is not None
+    return first, time.perf_counter() - start, failures
+
+
+def main():
+    """Compare questions/second for each approach."""
+    print("\n" + "=" * 70)
+    print(f"🚚 Batch Retrieval Chain Benchmark ({QUESTIONS} questions)")
+    print("=" * 70)
+    print(f"  embeddings {EMBED_LATENCY * 1000:.0f}ms per call, fake LLM {LLM_LATENCY * 1000:.0f}ms per call")
+
+    texts = synthetic_sentences(DOCUMENTS, seed=11)
+    embeddings = HashingEmbeddings()
+    store = NumpyVectorStore.from_texts(texts, embeddings)
+    embeddings.latency = EMBED_LATENCY
+    bm25 = PersistentBM25Retriever.from_texts(texts, k=4, preprocess_func=Tokenizer())
+    items = questions(QUESTIONS)
+
+    for label, retriever in (("dense (NumpyVectorStore)", store.as_retriever(search_kwargs={"k": 4})),
+                             ("BM25 (PersistentBM25Retriever)", bm25)):
+        chain = build_chain(retriever)
+        print(f"\n  {label}:")
+
+        start = time.perf_counter()
+        for question in items[:SEQUENTIAL_SAMPLE]:
+            chain.invoke(question)
+        per_question = (time.perf_counter() - start) / SEQUENTIAL_SAMPLE
+        print(f"    sequential .invoke          {1 / per_question:>7.1f} q/s"
+              f"  (~{per_question * QUESTIONS:.0f}s for all, from {SEQUENTIAL_SAMPLE})")
+
+        start = time.perf_counter()
+        chain.batch(items, config={"max_concurrency": CONCURRENCY[0]})
+        seconds = time.perf_counter() - start
+        print(f"    .batch(max_concurrency={CONCURRENCY[0]})  {QUESTIONS / seconds:>7.1f} q/s  {seconds:>6.1f}s")
+
+        for concurrency in CONCURRENCY:
+            runner = BatchRunner(chain, max_concurrency=concurrency)
+            calls = embeddings.calls
+            first, seconds, failures = asyncio.run(_first_and_total(runner, items))
+            print(f"    BatchRunner(max_concurrency={concurrency:<2}) {QUESTIONS / seconds:>5.1f} q/s  {seconds:>6.1f}s"
+                  f"  first after {first * 1000:.0f}ms, {embeddings.calls - calls} embed calls, {failures} failed")
+
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
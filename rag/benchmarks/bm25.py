@@ -0,0 +1,121 @@
+"""Benchmark: rank_bm25 (BM25Retriever) vs the persistent inverted-index BM25.
+
+Run with: python -m rag.benchmarks.bm25
+"""
+
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import warnings
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+import numpy as np  # noqa: E402
+from langchain_community.retrievers import BM25Retriever  # noqa: E402
+from rank_bm25 import BM25Okapi  # noqa: E402
+
+from rag.benchmarks._fixtures import timed  # noqa: E402
+from rag.bm25 import BM25Index, PersistentBM25Retriever  # noqa: E402
+
+SIZES = [10000, 50000]
+VOCAB_SIZE = 50000
+QUERIES = 30
+K = 3
+
+
+def zipf_corpus(count, seed=0):
+    """Documents whose word frequencies follow Zipf's law, like real text."""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(VOCAB_SIZE)]
+    cumulative = np.cumsum(1.0 / np.arange(1, VOCAB_SIZE + 1))
+    cumulative /= cumulative[-1]
+    np_rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        picks = np.searchsorted(cumulative, np_rng.random(rng.randint(40, 120)))
+        texts.append(" ".join(vocab[i] for i in picks))
+    queries = [
+        " ".join(vocab[i] for i in np.searchsorted(cumulative, np_rng.random(rng.randint(2, 5))))
+        for _ in range(QUERIES)
+    ]
+    return texts, queries
+
+
+def _latencies(retriever, queries):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(retriever.invoke(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, statistics.median(latencies)
+
+
+def _negative_idf_check():
+    """Parity on small skewed corpora, where common terms get a negative IDF.
+
+    Returns the number of queries checked.  ``rank_bm25`` also ranks documents
+    matching no query term (score 0), so only matching documents are compared.
+    """
+    cases = [([["w2", "w1", "w2"], ["w0", "w2"]], ["w2", "w1"], 1)]
+    rng = random.Random(0)
+    for _ in range(300):
+        vocab = [f"w{i}" for i in range(rng.randint(2, 8))]
+        weights = 1.0 / np.arange(1, len(vocab) + 1) ** 1.5
+        docs = [rng.choices(vocab, weights, k=rng.randint(1, 12)) for _ in range(rng.choice([5, 40, 280]))]
+        cases.append((docs, rng.choices(vocab, k=rng.randint(1, 4)), rng.choice([1, 3, 8])))
+    negative = 0
+    for docs, query, k in cases:
+        model = BM25Okapi(docs)
+        reference = model.get_scores(query)
+        matching = [row for row, doc in enumerate(docs) if set(query) & set(doc)]
+        expected = np.sort(reference[matching])[::-1][:k]
+        got = BM25Index.build(docs, [None] * len(docs)).search(query, k)[1]
+        assert len(got) == len(expected) and np.allclose(got, expected, rtol=1e-9, atol=1e-9), (query, k, got, expected)
+        negative += any(model.idf.get(term, 0.0) < 0 for term in query)
+    return len(cases), negative
+
+
+def main():
+    """Compare build, open and query costs on Zipfian corpora."""
+    print("\n" + "=" * 70)
+    print(f"🔎 BM25 Benchmark (top-{K}, {QUERIES} queries)")
+    print("=" * 70)
+
+    for size in SIZES:
+        texts, queries = zipf_corpus(size, seed=size)
+        print(f"\n  {size} documents:")
+
+        baseline, build_seconds = timed(BM25Retriever.from_texts, texts, k=K)
+        _, base_p50 = _latencies(baseline, queries)
+        print(f"    rank_bm25      build {build_seconds:>6.2f}s (every run)      query p50 {base_p50:>8.2f}ms")
+
+        directory = tempfile.mkdtemp()
+        try:
+            _, build_seconds = timed(PersistentBM25Retriever.from_texts, texts, k=K, persist_directory=directory)
+            retriever, open_seconds = timed(PersistentBM25Retriever.load, directory, k=K)
+            _, p50 = _latencies(retriever, queries)
+            index = retriever.index
+            print(f"    inverted index build {build_seconds:>6.2f}s, open {open_seconds * 1000:>6.1f}ms  query p50 {p50:>8.2f}ms")
+            print(f"    speedup {base_p50 / p50:.0f}x; decoded {index.postings_decoded / len(queries):.0f} postings/query"
+                  f" of {index.total_postings} ({index.total_postings / (index.postings_decoded / len(queries)):.0f}x fewer)")
+            # Parity with rank_bm25, including repeated query terms (weighted bounds) and k=1.
+            checks = queries + [f"{q} {q.split()[0]}" for q in queries]
+            for q in checks:
+                for k in (1, K):
+                    expected = np.sort(baseline.vectorizer.get_scores(q.split()))[::-1][:k]
+                    got = index.search(q.split(), k)[1]
+                    assert np.allclose(got, expected, rtol=1e-9, atol=1e-9), (q, k, got, expected)
+            print(f"    same top-1/top-{K} scores as rank_bm25 on {len(checks)} queries: ✓")
+        finally:
+            shutil.rmtree(directory)
+
+    checked, negative = _negative_idf_check()
+    print(f"\n  small skewed corpora: same scores as rank_bm25 on {checked} queries"
+          f" ({negative} with a negative-IDF term): ✓")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: symbol questions answered by a ``SymbolIndex`` vs embedding search.
+
+Indexes every Python file in this repository (courses, ``rag/``, ``utils/``),
+then asks "what does ``Class.method`` do?" for sampled symbols.  The
+embedding baseline searches ``PythonCodeSplitter`` chunks (module 12's
+replacement splitter); a hit is a result whose span contains the symbol.
+The baseline uses the offline hashing embeddings, so its hit rate is a
+floor, not what a trained code embedding model would reach; the latency
+gap (no embedding call at all) holds either way.
+
+Run with: python -m rag.benchmarks.code_index
+"""
+
+import os
+import random
+import statistics
+import time
+
+from rag.benchmarks._fixtures import HashingEmbeddings, timed
+from rag.code_index import SymbolIndex, SymbolRetriever
+from rag.code_splitter import PythonCodeSplitter
+from rag.vectorstore import NumpyVectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+QUESTIONS = 200
+
+
+def _contains(doc, symbol):
+    return (doc.metadata.get("source") == symbol.path
+            and doc.metadata["start_line"] <= symbol.start_line <= doc.metadata["end_line"])
+
+
+def main():
+    """Compare lookup latency and hit rate."""
+    print("\n" + "=" * 70)
+    print("🔎 Code Symbol Index Benchmark")
+    print("=" * 70)
+
+    index = SymbolIndex()
+    _, seconds = timed(index.add_directory, ROOT)
+    print(f"  indexed {len(index.files)} files, {len(index)} symbols in {seconds * 1000:.0f}ms")
+    count = len(index)
+    _, seconds = timed(index.add_directory, ROOT)
+    assert len(index) == count and all(index.source(symbol) for symbol in index.symbols)
+    print(f"  re-indexed in {seconds * 1000:.0f}ms, each file's symbols replaced ({len(index)} symbols) ✓")
+
+    sample = index.lookup("RAGApplication._setup_chain")[0]
+    print(f"\n  {sample.qualified_name}")
+    print(f"    {sample.signature}  (lines {sample.start_line}-{sample.end_line})")
+    print(f"    calls: {', '.join(sample.calls)}")
+    print(f"    called by: {', '.join(s.name for s in index.callers(sample))}")
+
+    splitter = PythonCodeSplitter(chunk_size=1000)
+    documents = []
+    for path, source in index.files.items():
+        documents.extend(splitter.create_documents([source], [{"source": path}]))
+    embeddings = HashingEmbeddings(dim=1024)
+    store = NumpyVectorStore.from_documents(documents, embeddings)
+    print(f"  fallback store: {len(store)} PythonCodeSplitter chunks")
+
+    rng = random.Random(0)
+    unique = [s for s in index.symbols if s.kind == "method" and len(index.lookup(s.name)) == 1]
+    targets = rng.sample(unique, min(QUESTIONS, len(unique)))
+    questions = [f"What does `{symbol.name}` do?" for symbol in targets]
+
+    retriever = SymbolRetriever(index=index, vectorstore=store, k=4)
+    print(f"\n  {len(questions)} questions naming a method (e.g. {questions[0]!r}), k=4:")
+    print(f"    {'retriever':<36} {'top-1 hit':>9} {'top-4 hit':>9} {'µs/query':>9}")
+    for label, search in (("embeddings over code chunks", lambda q: store.similarity_search(q, k=4)),
+                          ("SymbolRetriever", retriever.invoke)):
+        start = time.perf_counter()
+        results = [search(question) for question in questions]
+        micros = (time.perf_counter() - start) / len(questions) * 1e6
+        top1 = statistics.mean(bool(docs) and _contains(docs[0], s) for docs, s in zip(results, targets))
+        top4 = statistics.mean(any(_contains(doc, s) for doc in docs) for docs, s in zip(results, targets))
+        print(f"    {label:<36} {top1:>9.1%} {top4:>9.1%} {micros:>9.1f}")
+
+    names = [symbol.name for symbol in targets]
+    _, seconds = timed(lambda: [index.lookup(name) for name in names], repeat=5)
+    print(f"\n    SymbolIndex.lookup   {seconds / len(names) * 1e6:>6.2f}µs")
+    prefixes = [name[:max(3, len(name) // 2)] for name in names]
+    _, seconds = timed(lambda: [index.prefix(prefix, limit=10) for prefix in prefixes], repeat=5)
+    print(f"    SymbolIndex.prefix   {seconds / len(prefixes) * 1e6:>6.2f}µs (limit 10)")
+    _, seconds = timed(lambda: [embeddings.embed_query(q) for q in questions], repeat=3)
+    print(f"    embed_query alone    {seconds / len(questions) * 1e6:>6.2f}µs (local hashing model; an API call is ~100ms)")
+
+    semantic = "How are documents split into overlapping chunks?"
+    docs = retriever.invoke(semantic)
+    print(f"\n  semantic question {semantic!r} falls back to embeddings:")
+    for doc in docs[:2]:
+        print(f"    {os.path.relpath(doc.metadata['source'], ROOT)}:{doc.metadata['start_line']}  {doc.metadata['symbols'][:50]}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
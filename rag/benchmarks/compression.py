@@ -0,0 +1,111 @@
+"""Benchmark: extractive prompt compression, token reduction vs answer quality.
+
+Uses the module 15 samples plus questions over ``utils/docs`` (see
+``evaluation_set``).  Quality is measured offline:
+
+- reference recall: share of the reference answer's terms still present in
+  the (compressed) context, i.e. whether the answer remains derivable;
+- reader F1: token F1 against the reference of the context sentence an
+  extractive reader would answer with (best question overlap).
+
+Run with: python -m rag.benchmarks.compression
+"""
+
+import statistics
+from collections import Counter
+
+from rag.benchmarks._fixtures import HashingEmbeddings, evaluation_set, load_encoding, timed
+from rag.compression import ExtractiveCompressor, split_sentences
+from rag.embedding_cache import CachedEmbeddings
+from rag.tokenizer import Tokenizer
+
+TOKENIZER = Tokenizer()
+
+
+def reference_recall(context, reference):
+    terms = set(TOKENIZER(reference))
+    return len(terms & set(TOKENIZER(context))) / len(terms) if terms else 1.0
+
+
+def reader_f1(question, context, reference):
+    """F1 of the best-overlap sentence, a cheap stand-in for an LLM reader."""
+    sentences = split_sentences(context)
+    if not sentences:
+        return 0.0
+    question_terms = set(TOKENIZER(question))
+    answer = max(sentences, key=lambda s: len(question_terms & set(TOKENIZER(s))))
+    predicted, expected = Counter(TOKENIZER(answer)), Counter(TOKENIZER(reference))
+    overlap = sum((predicted & expected).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(predicted.values()), overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def lead(ratio, encoding):
+    """Baseline: keep the first ``ratio`` of each context's tokens."""
+
+    def compress(question, contexts):
+        kept = []
+        for context in contexts:
+            words = context.split()
+            target = ratio * len(encoding.encode(context))
+            while words and len(encoding.encode(" ".join(words))) > target:
+                words = words[:-1]
+            kept.append(" ".join(words))
+        return kept
+
+    return compress
+
+
+def _evaluate(items, compress, encoding):
+    tokens, original, recall, f1 = 0, 0, [], []
+    for item in items:
+        contexts = compress(item["question"], item["contexts"])
+        joined = "\n\n".join(contexts)
+        tokens += len(encoding.encode(joined))
+        original += len(encoding.encode("\n\n".join(item["contexts"])))
+        recall.append(reference_recall(joined, item["reference"]))
+        f1.append(reader_f1(item["question"], joined, item["reference"]))
+    return tokens / original, statistics.mean(recall), statistics.mean(f1), original / len(items)
+
+
+def main():
+    """Compare ratios and scorers on the evaluation set."""
+    print("\n" + "=" * 70)
+    print("🗜️  Extractive Compression Benchmark (module 15 samples + utils/docs Q&A)")
+    print("=" * 70)
+
+    encoding, exact = load_encoding()
+    items = evaluation_set()
+    print(f"  {len(items)} questions; token counts: {'tiktoken' if exact else 'approximate (offline)'}")
+    embeddings = CachedEmbeddings(HashingEmbeddings())
+
+    configs = [("no compression", lambda q, contexts: list(contexts))]
+    for ratio in (0.5, 0.3):
+        configs.append((f"keep first {ratio:.0%} (lead)", lead(ratio, encoding)))
+    for ratio in (0.7, 0.5, 0.3):
+        compressor = ExtractiveCompressor(ratio=ratio, encoding=encoding)
+        configs.append((f"lexical BM25, ratio {ratio}", lambda q, c, x=compressor: [r.text for r in x.compress_texts(q, c)]))
+    for weight, label in ((0.0, "embeddings"), (0.3, "embeddings + BM25")):
+        compressor = ExtractiveCompressor(ratio=0.5, embeddings=embeddings, lexical_weight=weight, encoding=encoding)
+        configs.append((f"{label}, ratio 0.5", lambda q, c, x=compressor: [r.text for r in x.compress_texts(q, c)]))
+
+    print(f"\n  {'method':<30} {'tokens kept':>11} {'ref. recall':>11} {'reader F1':>9} {'ms/query':>8}")
+    for label, compress in configs:
+        (kept, recall, f1, original), seconds = timed(_evaluate, items, compress, encoding)
+        print(f"  {label:<30} {kept:>11.0%} {recall:>11.3f} {f1:>9.3f} {seconds / len(items) * 1000:>8.2f}")
+    print(f"\n  (average context before compression: {original:.0f} tokens)")
+
+    print("\n  example (lexical BM25, ratio 0.3):")
+    item = items[2]
+    compressed = ExtractiveCompressor(ratio=0.3, encoding=encoding).compress_texts(item["question"], item["contexts"])
+    print(f"    Q: {item['question']}")
+    for result in compressed:
+        if result.text:
+            print(f"    kept {result.kept}/{result.total} sentences: {result.text.replace(chr(10), ' / ')[:80]}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: stuffing retrieved documents vs token-budgeted MMR packing.
+
+Run with: python -m rag.benchmarks.context_packing
+"""
+
+import statistics
+import time
+
+import numpy as np
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from rag.benchmarks._fixtures import HashingEmbeddings, load_encoding, load_sample_texts, timed
+from rag.context_packing import ContextBuilder
+from rag.embedding_cache import CachedEmbeddings
+from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter
+from rag.vectorstore import NumpyVectorStore, mmr_indices
+
+QUESTIONS = [
+    "How do I install the package?",
+    "What document loaders are available?",
+    "How does the retriever find relevant chunks?",
+    "How are agents configured with tools?",
+    "What does the sample code do?",
+    "How is text split into chunks?",
+]
+FETCH_K = 10
+BUDGETS = [250, 500]
+
+
+def _redundancy(embeddings, docs):
+    """Mean pairwise cosine similarity of the chosen chunks (lower = less repetition)."""
+    if len(docs) < 2:
+        return 0.0
+    vectors = embeddings.embed_documents_array([doc.page_content for doc in docs])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = vectors @ vectors.T
+    return float(similarity[np.triu_indices(len(docs), 1)].mean())
+
+
+def main():
+    """Compare prompt tokens, redundancy and packing cost."""
+    print("\n" + "=" * 70)
+    print("📦 Context Packing Benchmark")
+    print("=" * 70)
+
+    encoding, exact = load_encoding()
+    print(f"  token counts: {'tiktoken cl100k_base' if exact else 'approximate (tiktoken encoding not downloadable)'}")
+
+    splitter = OffsetRecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=150)
+    texts, metadatas = [], []
+    for name, text in load_sample_texts().items():
+        for chunk in splitter.split_text(text):
+            texts.append(chunk)
+            metadatas.append({"source": f"utils/docs/{name}"})
+    embeddings = CachedEmbeddings(HashingEmbeddings())
+    store = NumpyVectorStore.from_texts(texts, embeddings, metadatas=metadatas)
+    print(f"  {len(texts)} chunks (400 chars, 150 overlap), {len(QUESTIONS)} questions, candidates k={FETCH_K}")
+
+    def count(text):
+        return len(encoding.encode(text, disallowed_special=()))
+
+    print(f"\n  {'context':<34} {'tokens/query':>12} {'chunks':>7} {'redundancy':>10}")
+    for k in (4, FETCH_K):
+        results = [store.similarity_search(q, k=k) for q in QUESTIONS]
+        tokens = statistics.mean(count(str(docs)) for docs in results)
+        redundancy = statistics.mean(_redundancy(embeddings, docs) for docs in results)
+        print(f"  {f'str(docs), k={k} (module 11/14)':<34} {tokens:>12.0f} {k:>7} {redundancy:>10.2f}")
+
+    for budget in BUDGETS:
+        builder = ContextBuilder(embeddings, token_budget=budget, encoding=encoding)
+        packed, seconds = timed(
+            lambda: [builder.pack(q, store.similarity_search(q, k=FETCH_K)) for q in QUESTIONS], repeat=3
+        )
+        chunks = statistics.mean(len(p.documents) for p in packed)
+        redundancy = statistics.mean(_redundancy(embeddings, p.documents) for p in packed)
+        print(f"  {f'ContextBuilder, budget {budget}':<34} {statistics.mean(p.tokens for p in packed):>12.0f}"
+              f" {chunks:>7.1f} {redundancy:>10.2f}   saves {statistics.mean(p.tokens_saved for p in packed):.0f}"
+              f" tokens/query, {seconds / len(QUESTIONS) * 1000:.2f}ms/query")
+
+    print("\n  sample packed context:")
+    sample = ContextBuilder(embeddings, token_budget=BUDGETS[0], encoding=encoding)
+    text = sample.pack(QUESTIONS[1], store.similarity_search(QUESTIONS[1], k=FETCH_K)).text
+    for line in text.splitlines()[:8]:
+        print(f"    {line[:66]}")
+
+    print("\n" + "-" * 70)
+    print("⚡ MMR selection: LangChain maximal_marginal_relevance vs mmr_indices")
+    print("-" * 70)
+    rng = np.random.default_rng(0)
+    for n, k in ((50, 10), (200, 20), (1000, 50)):
+        candidates = rng.normal(size=(n, 384)).astype(np.float32)
+        query = rng.normal(size=384).astype(np.float32)
+        start = time.perf_counter()
+        reference = maximal_marginal_relevance(query, candidates, k=k)
+        baseline = time.perf_counter() - start
+        picked, seconds = timed(mmr_indices, query, candidates, k=k, repeat=5)
+        print(f"  {n:>5} candidates, k={k:<3} {baseline * 1000:>8.2f}ms -> {seconds * 1000:>6.2f}ms"
+              f"  ({baseline / seconds:.0f}x, same picks: {'✓' if picked == reference else '✗'})")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: MinHash/LSH near-duplicate filtering at ingest.
+
+Run with: python -m rag.benchmarks.dedup
+"""
+
+import random
+import time
+
+from langchain_core.documents import Document
+
+from rag.benchmarks._fixtures import synthetic_sentences
+from rag.dedup import MinHasher, NearDuplicateFilter
+
+BOILERPLATE = [
+    "Copyright 2024 Example Corp. All rights reserved. Internal use only.",
+    "For questions about this document contact the platform team on the usual channel.",
+    "This page was generated automatically from the source repository. Do not edit.",
+]
+
+
+def build_corpus(unique_chunks, duplicate_rate=0.3, seed=0):
+    """Unique chunks plus boilerplate copies and lightly edited near-duplicates."""
+    rng = random.Random(seed)
+    sentences = synthetic_sentences(unique_chunks * 4, seed=seed)
+    chunks = [" ".join(sentences[i * 4:(i + 1) * 4]) for i in range(unique_chunks)]
+    corpus = [Document(page_content=c, metadata={"source": f"doc-{i}"}) for i, c in enumerate(chunks)]
+    for i in range(int(unique_chunks * duplicate_rate)):
+        if i % 3 == 0:
+            text = rng.choice(BOILERPLATE)
+        else:
+            words = rng.choice(chunks).split()
+            words[rng.randrange(len(words))] = "edited"
+            text = " ".join(words)
+        corpus.append(Document(page_content=text, metadata={"source": f"copy-{i}"}))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def exact_duplicates(texts, threshold, hasher):
+    """Brute-force Jaccard over shingle sets (the quadratic baseline)."""
+    sets = [set(hasher.shingles(t).tolist()) for t in texts]
+    keep = []
+    for i, s in enumerate(sets):
+        if not any(len(s & sets[j]) / len(s | sets[j]) >= threshold for j in keep):
+            keep.append(i)
+    return keep
+
+
+def main():
+    """Compare LSH filtering with brute force, then scale up."""
+    print("\n" + "=" * 70)
+    print("🧹 Near-Duplicate Filtering Benchmark (MinHash + banded LSH)")
+    print("=" * 70)
+
+    threshold = 0.8
+    dedup = NearDuplicateFilter(threshold=threshold)
+    print(f"\n  threshold={threshold}  bands={dedup.bands}  rows={dedup.rows}")
+
+    corpus = build_corpus(600)
+    texts = [doc.page_content for doc in corpus]
+    start = time.perf_counter()
+    exact = exact_duplicates(texts, threshold, MinHasher())
+    exact_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    kept = dedup.transform_documents(corpus)
+    lsh_seconds = time.perf_counter() - start
+    print(f"\n  {len(corpus)} chunks:")
+    print(f"    brute force : kept {len(exact):>5} in {exact_seconds:.2f}s")
+    print(f"    MinHash LSH : kept {len(kept):>5} in {lsh_seconds:.2f}s")
+    print(f"    {dedup.last_report.summary()}")
+
+    print("\n" + "-" * 70)
+    print("📈 Scaling (LSH only):")
+    print("-" * 70)
+    for size in (5000, 20000):
+        corpus = build_corpus(size, seed=size)
+        start = time.perf_counter()
+        dedup.transform_documents(corpus)
+        seconds = time.perf_counter() - start
+        report = dedup.last_report
+        print(f"\n  {report.total} chunks in {seconds:.2f}s")
+        print(f"    {report.summary()}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
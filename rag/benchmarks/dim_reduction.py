@@ -0,0 +1,83 @@
+"""Benchmark: recall@10 versus embedding width for truncation and PCA.
+
+Run with: python -m rag.benchmarks.dim_reduction
+
+Two synthetic corpora share the same decaying variance spectrum.  In the
+"matryoshka-like" one the informative directions are the leading axes (as
+in ``text-embedding-3-*``); in the "rotated" one they are spread over a
+random basis (as in most local models), which is where PCA is needed.
+"""
+
+import statistics
+import time
+
+import numpy as np
+
+from rag.benchmarks._fixtures import clustered_unit_vectors
+from rag.dim_reduction import PCAProjection, TruncatedEmbeddings
+from rag.vectorstore import normalize_rows, top_k_indices
+
+SIZE = 100000
+DIM = 384
+QUERIES = 200
+K = 10
+WIDTHS = [384, 256, 128, 64, 32]
+
+
+def _spectrum(vectors, rotation=None):
+    """Scale axis ``i`` by ``(i + 1) ** -0.7`` and optionally rotate."""
+    scaled = vectors * (np.arange(1, vectors.shape[1] + 1, dtype=np.float32) ** -0.7)
+    if rotation is not None:
+        scaled = scaled @ rotation
+    return normalize_rows(scaled)
+
+
+def _search(corpus, queries):
+    """Exact top-``K`` for every query, plus the median latency in ms."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(top_k_indices(corpus @ query, K))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, statistics.median(latencies)
+
+
+def _recall(results, truth):
+    return sum(len(set(r.tolist()) & set(t.tolist())) for r, t in zip(results, truth)) / (len(truth) * K)
+
+
+def main():
+    """Sweep the reduced width for both corpora and both reducers."""
+    print("\n" + "=" * 70)
+    print(f"📉 Dimensionality Reduction Benchmark ({SIZE} vectors, recall@{K})")
+    print("=" * 70)
+
+    base = clustered_unit_vectors(SIZE, DIM, seed=1)
+    base_queries = clustered_unit_vectors(QUERIES, DIM, seed=2)
+    rotation, _ = np.linalg.qr(np.random.default_rng(0).standard_normal((DIM, DIM)))
+    rotation = rotation.astype(np.float32)
+
+    for name, rot in (("matryoshka-like", None), ("rotated", rotation)):
+        corpus = _spectrum(base, rot)
+        queries = _spectrum(base_queries, rot)
+        truth, _ = _search(corpus, queries)
+        print(f"\n  {name} corpus:")
+        print(f"    {'width':>5} {'MiB':>7} {'p50':>8}   {'truncate':>8} {'PCA':>6}")
+        for width in WIDTHS:
+            truncate = TruncatedEmbeddings(None, width)
+            truncated, p50 = _search(truncate.reduce(corpus), truncate.reduce(queries))
+            projection = PCAProjection().fit(corpus, width)
+            projected, _ = _search(
+                normalize_rows(projection.transform(corpus)), normalize_rows(projection.transform(queries))
+            )
+            mib = SIZE * width * 4 / 2**20
+            print(f"    {width:>5} {mib:>7.1f} {p50:>6.2f}ms   {_recall(truncated, truth):>8.3f}"
+                  f" {_recall(projected, truth):>6.3f}")
+
+    print("\n  Truncation only works for Matryoshka-trained models; PCA recovers")
+    print("  the same trade-off for the rest, at the cost of fitting on the corpus.")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
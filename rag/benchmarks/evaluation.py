@@ -0,0 +1,146 @@
+"""Benchmark: module 15 style one-at-a-time grading vs ``RAGEvaluator``.
+
+Builds a few hundred evaluation rows from ``evaluation_set``: every question
+with BM25 contexts from several retrieval configurations (k, chunk size)
+and several answers (the reference, a truncated one, one padded with an
+unsupported claim, and another question's reference).  A deterministic fake
+judge with API-like latency grades them by term overlap and, like a real
+model now and then, ignores the output format (those replies fail to parse
+and are not cached).
+
+Run with: python -m rag.benchmarks.evaluation
+"""
+
+import os
+import statistics
+import tempfile
+import time
+import zlib
+
+from rag.benchmarks._fixtures import FakeChatModel, HashingEmbeddings, evaluation_set
+from rag.evaluation import RAGEvaluator
+from rag.tokenizer import Tokenizer
+
+JUDGE_LATENCY = 0.1
+EMBED_LATENCY = 0.03
+CONFIGS = [(2, 300), (3, 300), (4, 300), (2, 400), (3, 400), (4, 400)]
+SEQUENTIAL_SAMPLE = 10
+CONCURRENCY = [16, 64]
+TOKENIZER = Tokenizer()
+
+
+def _section(prompt, header, next_header):
+    return prompt.split(header, 1)[1].split(next_header, 1)[0].strip()
+
+
+def _coverage(text, source):
+    terms = set(TOKENIZER(text))
+    return len(terms & set(TOKENIZER(source))) / len(terms) if terms else 1.0
+
+
+def fake_judge(prompt):
+    """Grade by term overlap; one prompt in 40 gets a chatty, unparseable reply."""
+    if zlib.crc32(prompt.encode("utf-8")) % 40 == 0:
+        return "Let me think about this carefully before deciding."
+    if prompt.endswith("Grade:"):
+        reference = _section(prompt, "Expected correct answer:", "Answer to evaluate:")
+        answer = _section(prompt, "Answer to evaluate:", "Compare the answers")
+        return "CORRECT" if _coverage(reference, answer) >= 0.6 else "INCORRECT"
+    if prompt.endswith("Claims:"):
+        context = _section(prompt, "Context:", "Question:")
+        answer = _section(prompt, "Answer:", "Split the answer")
+        claims = [claim.strip() for claim in answer.split(".") if claim.strip()]
+        return "\n".join(
+            f"{claim} | {'SUPPORTED' if _coverage(claim, context) >= 0.5 else 'UNSUPPORTED'}" for claim in claims
+        )
+    reference = _section(prompt, "Reference answer:", "Passage:")
+    passage = _section(prompt, "Passage:", "Was the passage useful")
+    return "YES" if _coverage(reference, passage) >= 0.3 else "NO"
+
+
+def evaluation_rows():
+    """``[(config, answer_kind, row)]`` for every configuration, question and answer variant."""
+    rows = []
+    for k, chunk_size in CONFIGS:
+        items = evaluation_set(k=k, chunk_size=chunk_size)
+        for i, item in enumerate(items):
+            reference = item["reference"]
+            words = reference.split()
+            answers = {
+                "reference": reference,
+                "truncated": " ".join(words[:len(words) // 3]) + ".",
+                "padded": reference + " It was first released by a hardware vendor in 1987.",
+                "wrong": items[(i + 5) % len(items)]["reference"],
+            }
+            for kind, answer in answers.items():
+                rows.append(((k, chunk_size), kind, {**item, "answer": answer}))
+    return rows
+
+
+def main():
+    """Compare samples/second and judge calls for each approach."""
+    print("\n" + "=" * 70)
+    print("📊 Batch RAG Evaluation Benchmark")
+    print("=" * 70)
+    labelled = evaluation_rows()
+    rows = [row for _, _, row in labelled]
+    print(f"  {len(rows)} rows ({len(CONFIGS)} retrieval configs x {len(rows) // len(CONFIGS) // 4} questions"
+          f" x 4 answers), judge {JUDGE_LATENCY * 1000:.0f}ms, embeddings {EMBED_LATENCY * 1000:.0f}ms per call")
+
+    judge = FakeChatModel(latency=JUDGE_LATENCY, respond=fake_judge)
+    embeddings = HashingEmbeddings(latency=EMBED_LATENCY)
+
+    # Module 15: one sample at a time, one judge call at a time, nothing reused between samples.
+    start = time.perf_counter()
+    for row in rows[:SEQUENTIAL_SAMPLE]:
+        RAGEvaluator(judge, embeddings, max_concurrency=1, max_pending=1).evaluate([row])
+    per_sample = (time.perf_counter() - start) / SEQUENTIAL_SAMPLE
+    calls = judge.calls
+    print(f"\n    {'runner':<38} {'samples/s':>9} {'seconds':>8} {'judge calls':>11} {'cache hits':>10}")
+    print(f"    {'one at a time (module 15)':<38} {1 / per_sample:>9.1f} {per_sample * len(rows):>7.0f}s"
+          f" {calls / SEQUENTIAL_SAMPLE * len(rows):>11.0f} {'-':>10}  (extrapolated from {SEQUENTIAL_SAMPLE})")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for concurrency in CONCURRENCY:
+            cache_dir = os.path.join(directory, f"cache{concurrency}")
+            evaluator = RAGEvaluator(judge, embeddings, max_concurrency=concurrency, cache_dir=cache_dir)
+            report = evaluator.evaluate(rows, os.path.join(directory, f"run{concurrency}"))
+            print(f"    {f'RAGEvaluator(max_concurrency={concurrency}) cold':<38} {len(rows) / report.seconds:>9.1f}"
+                  f" {report.seconds:>7.1f}s {report.judge_calls:>11,} {report.judge_cache_hits:>10,}")
+
+        warm = RAGEvaluator(judge, embeddings, max_concurrency=CONCURRENCY[0],
+                            cache_dir=os.path.join(directory, f"cache{CONCURRENCY[0]}"))
+        output_dir = os.path.join(directory, "warm")
+        report = warm.evaluate(rows, output_dir)
+        print(f"    {'re-run on the saved cache':<38} {len(rows) / report.seconds:>9.1f} {report.seconds:>7.1f}s"
+              f" {report.judge_calls:>11,} {report.judge_cache_hits:>10,}")
+        print("    (re-run judge calls are the replies that failed to parse and were not cached)")
+
+        summary = report.summary()
+        print(f"\n  summary.json: {summary['samples']} samples, p50 {summary['sample_seconds_p50'] * 1000:.1f}ms,"
+              f" embeddings {summary['embedding_hits']} hits / {summary['embedding_misses']} misses")
+        for name, score in summary["scores"].items():
+            print(f"    {name:<20} {score:.3f}  ({summary['scored'][name]} scored, {summary['failed'][name]} failed)")
+        with open(os.path.join(output_dir, "results.jsonl"), encoding="utf-8") as f:
+            lines = sum(1 for _ in f)
+        print(f"  results.jsonl: {lines} lines")
+
+    results = report.results
+    print("\n  answer_correctness / faithfulness by answer variant:")
+    for kind in ("reference", "truncated", "padded", "wrong"):
+        picked = [r for (_, k, _), r in zip(labelled, results) if k == kind]
+        means = [statistics.fmean(v) for v in (
+            [r.scores["answer_correctness"] for r in picked if r.scores["answer_correctness"] is not None],
+            [r.scores["faithfulness"] for r in picked if r.scores["faithfulness"] is not None],
+        )]
+        print(f"    {kind:<10} {means[0]:.2f} / {means[1]:.2f}")
+    print("  context_precision by retrieval config:")
+    for config in CONFIGS:
+        values = [r.scores["context_precision"] for (c, _, _), r in zip(labelled, results)
+                  if c == config and r.scores["context_precision"] is not None]
+        print(f"    k={config[0]} chunk_size={config[1]}  {statistics.fmean(values):.2f}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: sequential dense + BM25 lookups vs the concurrent HybridRetriever.
+
+Run with: python -m rag.benchmarks.hybrid
+"""
+
+import asyncio
+import statistics
+import time
+import warnings
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from langchain_community.retrievers import BM25Retriever  # noqa: E402
+from langchain_core.runnables import RunnableParallel, RunnablePassthrough  # noqa: E402
+
+from rag.benchmarks._fixtures import HashingEmbeddings, synthetic_sentences  # noqa: E402
+from rag.bm25 import PersistentBM25Retriever  # noqa: E402
+from rag.hybrid import HybridRetriever  # noqa: E402
+from rag.tokenizer import Tokenizer  # noqa: E402
+from rag.vectorstore import NumpyVectorStore  # noqa: E402
+
+DOCUMENTS = 100000
+EMBED_LATENCY = 0.08
+QUERIES = ["vector similarity search index", "agent tool memory loop", "judge metric faithfulness score"]
+K = 4
+
+
+def _p50(fn, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    """Compare hybrid lookup latency and show the fused results."""
+    print("\n" + "=" * 70)
+    print(f"🔀 Hybrid Retrieval Benchmark ({DOCUMENTS} chunks, embed latency {EMBED_LATENCY * 1000:.0f}ms)")
+    print("=" * 70)
+
+    texts = synthetic_sentences(DOCUMENTS, seed=7)
+    ids = [f"chunk-{i}" for i in range(len(texts))]
+    store = NumpyVectorStore.from_texts(texts, HashingEmbeddings(), ids=ids)
+    store.embeddings.latency = EMBED_LATENCY
+    dense = store.as_retriever(search_kwargs={"k": K})
+    sparse_retrievers = {
+        "rank_bm25": BM25Retriever.from_texts(texts, ids=ids, k=K, preprocess_func=Tokenizer()),
+        "persistent BM25": PersistentBM25Retriever.from_texts(texts, ids=ids, k=K, preprocess_func=Tokenizer()),
+    }
+    queries = QUERIES * 3
+    print(f"\n  dense alone                    p50 {_p50(dense.invoke, queries):>8.1f}ms")
+
+    for label, sparse in sparse_retrievers.items():
+        sparse_p50 = _p50(sparse.invoke, queries)
+        sequential_p50 = _p50(lambda q: (dense.invoke(q), sparse.invoke(q)), queries)
+        print(f"\n  {label}:")
+        print(f"    sparse alone                 p50 {sparse_p50:>8.1f}ms")
+        print(f"    dense then sparse            p50 {sequential_p50:>8.1f}ms")
+        for fusion in ("rrf", "weighted"):
+            hybrid = HybridRetriever(retrievers=[dense, sparse], fusion=fusion, k=K)
+            p50 = _p50(hybrid.invoke, queries)
+            async_p50 = _p50(lambda q: asyncio.run(hybrid.ainvoke(q)), queries)
+            print(f"    HybridRetriever {fusion:<9}    p50 {p50:>8.1f}ms  (ainvoke {async_p50:.1f}ms)")
+
+    print("\n" + "-" * 70)
+    print("🧩 Fused results (dedup by chunk ID):")
+    print("-" * 70)
+    sparse = sparse_retrievers["persistent BM25"]
+    chain = RunnableParallel(context=HybridRetriever(retrievers=[dense, sparse], k=K), question=RunnablePassthrough())
+    for query in QUERIES:
+        fused = chain.invoke(query)["context"]
+        both = {d.id for d in dense.invoke(query)} & {d.id for d in sparse.invoke(query)}
+        unique = len({d.id for d in fused}) == len(fused)
+        print(f"  {query!r}: {len(both)} chunk(s) found by both, duplicates removed {'✓' if unique else '✗'}")
+        for doc in fused:
+            marker = "*" if doc.id in both else " "
+            print(f"    {marker} {doc.id:<12} {doc.page_content[:48]}")
+    print("\n  * = returned by both retrievers")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: flat chunk search vs heading-first section-tree retrieval.
+
+Builds a long synthetic manual (``#`` title, ``##`` chapters, ``###``
+sections, each section body on one topic and naming its component) and asks
+one question per section.  Reports whether the right section comes back,
+how many chunks each query scores and the query latency.
+
+Run with: python -m rag.benchmarks.markdown_tree
+"""
+
+import random
+import statistics
+import time
+
+from langchain_core.documents import Document
+
+from rag.benchmarks._fixtures import TOPICS, HashingEmbeddings, load_sample_texts, synthetic_sentences
+from rag.markdown_tree import MarkdownSectionSplitter, SectionTreeRetriever, parse_sections, subtree_filter
+from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter
+from rag.vectorstore import NumpyVectorStore
+
+CHAPTERS = 40
+SECTIONS_PER_CHAPTER = 25
+SENTENCES_PER_SECTION = 40
+QUESTIONS = 300
+_SYLLABLES = ["ka", "lo", "mi", "zu", "re", "tan", "vo", "xi", "pe", "dro", "qua", "sen"]
+
+
+def synthetic_manual(seed=0):
+    """``(markdown, [(question, section_path)])`` for a manual with one component per section."""
+    rng = random.Random(seed)
+    lines, questions, used = ["# Platform Manual", ""], [], set()
+    for chapter in range(CHAPTERS):
+        topic = rng.choice(list(TOPICS))
+        lines += [f"## {topic.capitalize()} chapter {chapter + 1}", ""]
+        for section in range(SECTIONS_PER_CHAPTER):
+            name = "".join(rng.sample(_SYLLABLES, 3))
+            while name in used:
+                name = "".join(rng.sample(_SYLLABLES, 4))
+            used.add(name)
+            heading = f"Configuring the {name} component"
+            lines += [f"### {heading}", ""]
+            body = synthetic_sentences(SENTENCES_PER_SECTION, seed=seed * 1_000_003 + chapter * 1000 + section)
+            body[rng.randrange(len(body))] += f" The {name} component reads this setting."
+            lines += [" ".join(body[i:i + 5]) + "\n" for i in range(0, len(body), 5)]
+            path = f"Platform Manual > {topic.capitalize()} chapter {chapter + 1} > {heading}"
+            questions.append((f"How do I configure the {name} component?", path))
+    rng.shuffle(questions)
+    return "\n".join(lines), questions[:QUESTIONS]
+
+
+def main():
+    """Compare section hit rate, chunks scored and latency."""
+    print("\n" + "=" * 70)
+    print("🌳 Markdown Section-Tree Retrieval Benchmark")
+    print("=" * 70)
+
+    sample = load_sample_texts()["sample_documentation.md"]
+    print("\n  utils/docs/sample_documentation.md as a section tree:")
+    for section in parse_sections(sample)[1:]:
+        print(f"    {'  ' * (section.level - 1)}{section.title:<30} bytes {section.start:>5}-{section.end:<5}")
+
+    text, questions = synthetic_manual()
+    # Wider buckets than the default: 1,000 component names must not collide with question words.
+    embeddings = HashingEmbeddings(dim=2048)
+    splitter = MarkdownSectionSplitter(chunk_size=400, chunk_overlap=50)
+    start = time.perf_counter()
+    tree = SectionTreeRetriever.from_documents([Document(page_content=text)], embeddings, splitter, k=4)
+    build = time.perf_counter() - start
+    print(f"\n  synthetic manual: {len(text) / 1e6:.1f} MB, {CHAPTERS} chapters x {SECTIONS_PER_CHAPTER} sections,"
+          f" {len(tree.vectorstore)} chunks, {len(tree.heading_store)} headings (built in {build:.1f}s)")
+
+    # Module 13 style: the same text flattened and split on generic separators.
+    flat_splitter = OffsetRecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=50)
+    flat = NumpyVectorStore.from_texts(flat_splitter.split_text(text), embeddings)
+    flat_sections = tree.vectorstore
+
+    def section_hit(docs, path):
+        return any(doc.metadata.get("section_path") == path for doc in docs)
+
+    def text_hit(docs, question):
+        name = question.split()[-2]
+        return any(f"The {name} component" in doc.page_content for doc in docs)
+
+    print(f"\n  {QUESTIONS} questions, k=4:")
+    print(f"    {'retriever':<44} {'hit':>6} {'chunks scored':>13} {'ms/q':>6}")
+    rows = [
+        ("flat split, flat search (module 13)", lambda q: flat.similarity_search(q, k=4), len(flat), text_hit),
+        ("section chunks, flat search", lambda q: flat_sections.similarity_search(q, k=4), len(flat_sections),
+         None),
+    ]
+    for label, search, scored, hit in rows:
+        start = time.perf_counter()
+        results = [search(question) for question, _ in questions]
+        seconds = (time.perf_counter() - start) / len(questions)
+        hits = statistics.mean(
+            (hit(docs, question) if hit else section_hit(docs, path)) for docs, (question, path) in zip(results, questions)
+        )
+        print(f"    {label:<44} {hits:>6.1%} {scored:>13,} {seconds * 1000:>6.2f}")
+
+    for section_k in (1, 3):
+        tree.section_k = section_k
+        start = time.perf_counter()
+        results = [tree.invoke(question) for question, _ in questions]
+        seconds = (time.perf_counter() - start) / len(questions)
+        hits = statistics.mean(section_hit(docs, path) for docs, (_, path) in zip(results, questions))
+        scored = statistics.mean(
+            len(tree.heading_store) + len(tree.vectorstore.filter_rows(subtree_filter([d for d, _ in tree.sections(q)])))
+            for q, _ in questions
+        )
+        print(f"    {f'SectionTreeRetriever(section_k={section_k})':<44} {hits:>6.1%} {scored:>13,.0f}"
+              f" {seconds * 1000:>6.2f}")
+    print("    (chunks scored for the tree = headings + chunks inside the chosen subtrees)")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
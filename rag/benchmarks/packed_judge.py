@@ -0,0 +1,103 @@
+"""Benchmark: module 15 single-item grading vs packed multi-item grading.
+
+Grades a few hundred (question, reference, answer) rows built from
+``evaluation_set``: each question paired with every question's reference
+answer, whole or cut to two thirds or one third.  The fake judge grades by
+term overlap, and in packed mode misbehaves the way real models do: now and
+then it returns prose instead of JSON, skips an item, or invents a grade
+("PARTIALLY CORRECT").  Those items are re-graded one at a time.  It also
+grades items far down a long pack a little more leniently, which is what
+the agreement column is there to catch.
+
+The fake judge's latency is the same for every request; a real packed
+request returns more tokens and takes somewhat longer than a single grade,
+so the wall-time gain is smaller than the request reduction.
+
+Run with: python -m rag.benchmarks.packed_judge
+"""
+
+import json
+import re
+import time
+import zlib
+
+from rag.benchmarks._fixtures import FakeChatModel, evaluation_set
+from rag.benchmarks.evaluation import _coverage, fake_judge
+from rag.evaluation import AnswerCorrectness, RAGEvaluator
+from rag.packed_judge import PackedAnswerCorrectness, agreement
+
+JUDGE_LATENCY = 0.1
+CONCURRENCY = 16
+PACK_SIZES = [5, 10, 20]
+_ITEM = re.compile(r"Item (\d+)\nQuestion: .*?\nExpected correct answer: (.*?)\nAnswer to evaluate: (.*?)\n", re.DOTALL)
+
+
+def packed_fake_judge(prompt):
+    """``fake_judge`` plus the packed JSON format, with occasional format slips."""
+    if not prompt.endswith("JSON:"):
+        return fake_judge(prompt)
+    seed = zlib.crc32(prompt.encode("utf-8"))
+    if seed % 25 == 0:
+        return "Here is my assessment of each item: they mostly look right."
+    verdicts = []
+    for item_id, reference, answer in _ITEM.findall(prompt):
+        item_seed = zlib.crc32(f"{seed}:{item_id}".encode("utf-8"))
+        if item_seed % 60 == 0:
+            continue
+        # Position bias: items further down a long pack are graded a little more leniently.
+        threshold = 0.6 - 0.01 * (int(item_id) - 1)
+        grade = "CORRECT" if _coverage(reference, answer) >= threshold else "INCORRECT"
+        if item_seed % 60 == 1:
+            grade = "PARTIALLY CORRECT"
+        verdicts.append({"id": int(item_id), "grade": grade})
+    return "```json\n" + json.dumps({"verdicts": verdicts}) + "\n```"
+
+
+def grading_rows():
+    items = evaluation_set()
+    rows = []
+    for item in items:
+        for other in items:
+            words = other["reference"].split()
+            for keep in (len(words), 2 * len(words) // 3, len(words) // 3):
+                rows.append({**item, "answer": " ".join(words[:keep])})
+    return rows
+
+
+def main():
+    """Compare judge requests, wall time and agreement."""
+    print("\n" + "=" * 70)
+    print("📦 Packed LLM-as-Judge Grading Benchmark")
+    print("=" * 70)
+    rows = grading_rows()
+    print(f"  {len(rows)} rows, judge {JUDGE_LATENCY * 1000:.0f}ms per request, max_concurrency={CONCURRENCY}")
+
+    judge = FakeChatModel(latency=JUDGE_LATENCY, respond=packed_fake_judge)
+    single = RAGEvaluator(judge, metrics=[AnswerCorrectness()], max_concurrency=CONCURRENCY).evaluate(rows)
+    print(f"\n    {'grading':<26} {'requests':>8} {'seconds':>8} {'re-graded':>9} {'agreement':>9} {'kappa':>6}")
+    print(f"    {'one item per request':<26} {single.judge_calls:>8} {single.seconds:>7.2f}s {'-':>9} {'-':>9} {'-':>6}")
+
+    for pack_size in PACK_SIZES:
+        metric = PackedAnswerCorrectness(pack_size=pack_size)
+        start = time.perf_counter()
+        # Admit enough samples to fill every request slot with a full pack.
+        packed = RAGEvaluator(judge, metrics=[metric], max_concurrency=CONCURRENCY,
+                              max_pending=CONCURRENCY * pack_size).evaluate(rows)
+        seconds = time.perf_counter() - start
+        check = agreement(packed, single)
+        print(f"    {f'packed, {pack_size} per request':<26} {packed.judge_calls:>8} {seconds:>7.2f}s"
+              f" {metric.regraded:>9} {check['agreement']:>9.1%} {check['kappa']:>6.3f}")
+
+    # Spot-check: grade a sample both ways before switching a whole dataset to packed grading.
+    sample = rows[::9]
+    evaluator = RAGEvaluator(judge, metrics=[PackedAnswerCorrectness(pack_size=10)], max_concurrency=CONCURRENCY,
+                             max_pending=CONCURRENCY * 10)
+    check = agreement(evaluator.evaluate(sample),
+                      RAGEvaluator(judge, metrics=[AnswerCorrectness()], max_concurrency=CONCURRENCY).evaluate(sample))
+    print(f"\n  spot check on {len(sample)} rows: {check['agreement']:.1%} agreement,"
+          f" {len(check['disagreements'])} rows differ")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Benchmark: small chunks vs large chunks vs small-to-big parent retrieval.
+
+Part 1 plants questions whose answer sits a few sentences after the
+sentence that matches them and reports how often the returned context
+contains the answer (module 09 splitter settings for the small chunks).
+Part 2 indexes a synthetic corpus and compares
+what each layout stores and embeds.
+
+Run with: python -m rag.benchmarks.parent_document
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from rag.benchmarks._fixtures import HashingEmbeddings, synthetic_document, synthetic_sentences, timed
+from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter
+from rag.parent_document import DocumentStore, ParentSectionRetriever
+from rag.vectorstore import NumpyVectorStore
+
+QUALITY_DOCUMENTS = 500
+CORPUS_DOCUMENTS = 2000
+SENTENCES_PER_DOCUMENT = 60
+_SYLLABLES = ["ka", "lo", "mi", "zu", "re", "tan", "vo", "xi", "pe", "dro", "qua", "sen"]
+
+
+def child_splitter():
+    """Module 09's recursive splitter settings (300 chars, 100 overlap, sentence separators first)."""
+    return OffsetRecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=100, separators=[".", "\n", " ", ""])
+
+
+def parent_splitter():
+    return OffsetRecursiveCharacterTextSplitter(chunk_size=1200, chunk_overlap=0)
+
+
+def chunk_store(documents, splitter, embeddings, persist_directory=None):
+    texts, metadatas = [], []
+    for doc in documents:
+        for span in splitter.split_spans(doc.page_content):
+            texts.append(span.text)
+            metadatas.append({**doc.metadata, "start_index": span.start})
+    return NumpyVectorStore.from_texts(texts, embeddings, metadatas=metadatas, persist_directory=persist_directory)
+
+
+def _directory_bytes(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def planted_corpus(count, seed=0):
+    """Documents whose answer sits a few sentences after the sentence naming the subject.
+
+    Returns ``(documents, [(question, answer)])``: the question matches the
+    sentence naming an option, the answer (its value) is ~400 characters
+    later in the same section, so a single 300-char chunk rarely holds both.
+    """
+    rng = random.Random(seed)
+    documents, questions = [], []
+    for i in range(count):
+        name = " ".join("".join(rng.sample(_SYLLABLES, 3)) for _ in range(3))
+        answer = str(rng.randint(100, 9999))
+        filler = synthetic_sentences(20, seed=seed * 100003 + i)
+        body = filler[:8] + [f"The {name} option controls request batching."] + filler[8:12]
+        body += [f"Unless overridden it starts at {answer}."] + filler[12:]
+        documents.append(Document(page_content=" ".join(body), metadata={"source": f"doc{i}.txt"}))
+        questions.append((f"What is the {name} option set to?", answer))
+    return documents, questions
+
+
+def answer_coverage():
+    documents, questions = planted_corpus(QUALITY_DOCUMENTS)
+    embeddings = HashingEmbeddings()
+    small = chunk_store(documents, child_splitter(), embeddings).as_retriever(search_kwargs={"k": 2})
+    large = chunk_store(documents, parent_splitter(), embeddings).as_retriever(search_kwargs={"k": 2})
+    parents = ParentSectionRetriever.from_documents(
+        documents, NumpyVectorStore(embeddings), parent_splitter=parent_splitter(), child_splitter=child_splitter(), k=2
+    )
+
+    print(f"\n  {QUALITY_DOCUMENTS} documents, one question each (answer ~400 chars after the matching sentence):")
+    print(f"    {'retriever (2 results)':<40} {'answer in context':>17} {'chars/q':>8}")
+    for label, retriever in (("small chunks (300, module 09)", small), ("large chunks (1200)", large),
+                             ("ParentSectionRetriever (300 -> 1200)", parents)):
+        results = [retriever.invoke(question) for question, _ in questions]
+        found = statistics.mean(
+            any(f"at {answer}." in doc.page_content for doc in docs) for docs, (_, answer) in zip(results, questions)
+        )
+        chars = statistics.mean(sum(len(doc.page_content) for doc in docs) for docs in results)
+        print(f"    {label:<40} {found:>17.1%} {chars:>8.0f}")
+
+
+def storage():
+    documents = [
+        Document(page_content=synthetic_document(SENTENCES_PER_DOCUMENT, seed=i), metadata={"source": f"doc{i}.txt"})
+        for i in range(CORPUS_DOCUMENTS)
+    ]
+    source_bytes = sum(len(doc.page_content.encode("utf-8")) for doc in documents)
+    print(f"\n  synthetic corpus: {CORPUS_DOCUMENTS} documents, {source_bytes / 1e6:.1f} MB of text")
+    print(f"    {'layout':<40} {'on disk':>8} {'chars embedded':>15} {'build':>7}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        embeddings = HashingEmbeddings()
+        start = time.perf_counter()
+        chunk_store(documents, parent_splitter(), embeddings, os.path.join(directory, "large"))
+        seconds = time.perf_counter() - start
+        print(f"    {'large chunks in the vector store':<40} {_directory_bytes(os.path.join(directory, 'large')) / 1e6:>6.1f}MB"
+              f" {source_bytes:>15,} {seconds:>6.2f}s")
+
+        # Small-to-big without a document store: the parent text rides along in every child's metadata.
+        splitter, texts, metadatas = child_splitter(), [], []
+        start = time.perf_counter()
+        for doc in documents:
+            for span in parent_splitter().split_spans(doc.page_content):
+                parent = span.text
+                for child in splitter.split_spans(parent):
+                    texts.append(child.text)
+                    metadatas.append({**doc.metadata, "parent_text": parent})
+        NumpyVectorStore.from_texts(texts, embeddings, metadatas=metadatas,
+                                    persist_directory=os.path.join(directory, "copied"))
+        seconds = time.perf_counter() - start
+        embedded = sum(map(len, texts))
+        print(f"    {'children + parent text in metadata':<40} {_directory_bytes(os.path.join(directory, 'copied')) / 1e6:>6.1f}MB"
+              f" {embedded:>15,} {seconds:>6.2f}s")
+
+        start = time.perf_counter()
+        retriever = ParentSectionRetriever.from_documents(
+            documents,
+            NumpyVectorStore(embeddings, persist_directory=os.path.join(directory, "children")),
+            DocumentStore(os.path.join(directory, "parents")),
+            parent_splitter=parent_splitter(),
+            child_splitter=child_splitter(),
+        )
+        seconds = time.perf_counter() - start
+        total = _directory_bytes(os.path.join(directory, "children")) + _directory_bytes(os.path.join(directory, "parents"))
+        print(f"    {'children + DocumentStore (this module)':<40} {total / 1e6:>6.1f}MB {embedded:>15,} {seconds:>6.2f}s")
+        print(f"      of which DocumentStore: {_directory_bytes(os.path.join(directory, 'parents')) / 1e6:.1f}MB"
+              f" for {len(retriever.docstore)} parent sections")
+
+        (store, opened) = timed(DocumentStore, os.path.join(directory, "parents"), repeat=3)
+        ids = list(range(0, len(store), 7))
+        parents, fetched = timed(store.get, ids, repeat=3)
+        print(f"\n    DocumentStore open {opened * 1000:.2f}ms, fetch {fetched / len(ids) * 1e6:.1f}µs per parent section")
+        _, seconds = timed(lambda: [retriever.invoke(f"{word} retrieval agent") for word in ("vector", "graph", "loss")],
+                           repeat=3)
+        print(f"    ParentSectionRetriever.invoke {seconds / 3 * 1000:.2f}ms per query"
+              f" ({len(retriever.vectorstore)} children)")
+
+
+def main():
+    """Compare answer coverage and storage of the three layouts."""
+    print("\n" + "=" * 70)
+    print("🧩 Parent-Document (Small-to-Big) Retrieval Benchmark")
+    print("=" * 70)
+    answer_coverage()
+    storage()
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark: semantic query cache in front of a slow retrieval chain.
+
+Run with: python -m rag.benchmarks.query_cache
+"""
+
+import random
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from rag.benchmarks._fixtures import HashingEmbeddings
+from rag.query_cache import SemanticCache
+
+INTENTS = [
+    ["What is LangChain used for?", "What's LangChain used for", "what is langchain used for",
+     "What is LangChain for?"],
+    ["How do I split documents into chunks?", "How do I split a document into chunks?",
+     "how to split documents into chunks", "Splitting documents into chunks, how?"],
+    ["What is a vector store?", "what is a vector store", "What's a vector store?", "Explain what a vector store is"],
+    ["What is a graph store?", "what is a graph store", "What's a graph store?", "Explain what a graph store is"],
+    ["How does BM25 ranking work?", "how does bm25 ranking work", "How does the BM25 ranking work?",
+     "BM25 ranking: how does it work?"],
+    ["What is retrieval augmented generation?", "what is retrieval-augmented generation",
+     "What is retrieval augmented generation (RAG)?", "Explain retrieval augmented generation"],
+    ["How do agents use tools?", "how do agents use tools", "How do LangChain agents use tools?",
+     "How does an agent use tools?"],
+    ["What is the faithfulness metric?", "what is the faithfulness metric", "Explain the faithfulness metric",
+     "What does the faithfulness metric measure?"],
+    ["How do I write a Cypher query?", "how to write a cypher query", "How do I write Cypher queries?",
+     "Writing a Cypher query, how?"],
+]
+REQUESTS = 400
+CHAIN_LATENCY = 0.02
+THRESHOLDS = [0.6, 0.75, 0.85, 0.95]
+
+
+def traffic(count, seed=0):
+    """``(intent, question)`` pairs; popular intents repeat more (Zipf-like)."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(INTENTS))]
+    picks = rng.choices(range(len(INTENTS)), weights=weights, k=count)
+    return [(intent, rng.choice(INTENTS[intent])) for intent in picks]
+
+
+def answer(question):
+    return f"answer to {question!r}"
+
+
+def slow_chain(question):
+    """Stand-in for retrieval + generation."""
+    time.sleep(CHAIN_LATENCY)
+    return answer(question)
+
+
+def main():
+    """Report hit rate, wrong-answer rate and latency across thresholds."""
+    print("\n" + "=" * 70)
+    print(f"🗄️  Semantic Query Cache Benchmark ({REQUESTS} requests, chain {CHAIN_LATENCY * 1000:.0f}ms)")
+    print("=" * 70)
+
+    requests = traffic(REQUESTS)
+    intent_of = {q: i for i, phrasings in enumerate(INTENTS) for q in phrasings}
+    answer_of = {answer(q): q for q in intent_of}
+    chain = RunnableLambda(slow_chain)
+
+    start = time.perf_counter()
+    for _, question in requests:
+        chain.invoke(question)
+    uncached = (time.perf_counter() - start) / len(requests) * 1000
+    print(f"\n  no cache: {uncached:.1f}ms per request")
+    print(f"  exact-match cache: {1 - len({q for _, q in requests}) / len(requests):.1%} hit rate\n")
+    print(f"  {'threshold':>9}  {'hit rate':>8}  {'wrong hits':>10}  {'ms/request':>10}  {'speedup':>7}")
+
+    for threshold in THRESHOLDS:
+        cache = SemanticCache(HashingEmbeddings(), threshold=threshold, max_entries=64, ttl=600)
+        cached_chain = cache.wrap(chain)
+        wrong = 0
+        start = time.perf_counter()
+        for intent, question in requests:
+            # A hit answered for a different intent is a wrong answer.
+            if intent_of[answer_of[cached_chain.invoke(question)]] != intent:
+                wrong += 1
+        per_request = (time.perf_counter() - start) / len(requests) * 1000
+        print(f"  {threshold:>9.2f}  {cache.hit_rate:>8.1%}  {wrong:>10}  {per_request:>10.1f}  {uncached / per_request:>6.1f}x")
+
+    print("\n" + "-" * 70)
+    print("⏱️  TTL and LRU eviction (simulated clock):")
+    print("-" * 70)
+    now = [0.0]
+    cache = SemanticCache(HashingEmbeddings(), threshold=0.85, max_entries=3, ttl=60, clock=lambda: now[0])
+    for phrasings in INTENTS[:3]:
+        cache.store(phrasings[0], "cached")
+    cache.lookup(INTENTS[0][0])
+    cache.store(INTENTS[3][0], "cached")
+    print(f"  4 questions into 3 slots: {cache.evictions} eviction, "
+          f"{'most recently used kept' if cache.lookup(INTENTS[0][0]) else 'MRU lost'}, "
+          f"{'LRU evicted' if cache.lookup(INTENTS[1][0]) is None else 'LRU kept'}")
+    now[0] = 61
+    result = cache.lookup(INTENTS[0][0])
+    print(f"  after 61s: lookup -> {result}, {cache.expirations} entries expired, {len(cache)} left")
+    print(f"  stats: {cache.stats()}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: cross-encoder re-ranking latency vs quality.
+
+Runs offline against a simulated cross-encoder with a CPU-like cost model (a
+fixed per-call overhead plus a per-pair cost), so batching, early cutoff and
+the pair cache can be compared without downloading a model.
+
+Run with: python -m rag.benchmarks.rerank
+"""
+
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.rerank import CrossEncoderReranker
+
+QUERIES = 40
+POOL = 100
+TOP_N = 5
+FIRST_STAGE_NOISE = 1.0
+CALL_OVERHEAD = 0.004
+PAIR_COST = 0.0005
+
+
+class SimulatedCrossEncoder:
+    """Scores pairs with a near-exact relevance signal; sleeps like a CPU model."""
+
+    def __init__(self, relevance, noise=0.1, seed=0):
+        rng = np.random.default_rng(seed)
+        self._scores = {text: r + rng.normal(0, noise) for text, r in relevance.items()}
+
+    def score(self, pairs):
+        time.sleep(CALL_OVERHEAD + PAIR_COST * len(pairs))
+        return [self._scores[text] for _, text in pairs]
+
+
+def candidate_pools(seed=0):
+    """Per query: candidates in first-stage order, and the true top-n texts."""
+    rng = np.random.default_rng(seed)
+    pools, relevance = [], {}
+    for q in range(QUERIES):
+        truth = rng.normal(size=POOL)
+        first_stage = truth + rng.normal(0, FIRST_STAGE_NOISE, size=POOL)
+        texts = [f"query {q} chunk {i}" for i in range(POOL)]
+        relevance.update(zip(texts, truth))
+        order = np.argsort(-first_stage, kind="stable")
+        docs = [Document(page_content=texts[i]) for i in order]
+        best = {texts[i] for i in np.argsort(-truth)[:TOP_N]}
+        pools.append((f"query {q}", docs, best))
+    return pools, relevance
+
+
+def _run(reranker, pools, fetch):
+    hits, start = 0, time.perf_counter()
+    for query, docs, best in pools:
+        ranked = reranker.rerank(query, docs[:fetch]) if reranker else [(d, None) for d in docs[:TOP_N]]
+        hits += len(best & {doc.page_content for doc, _ in ranked})
+    seconds = time.perf_counter() - start
+    return hits / (len(pools) * TOP_N), seconds / len(pools) * 1000
+
+
+def main():
+    """Compare recall@n and latency across fetch sizes and settings."""
+    print("\n" + "=" * 70)
+    print(f"🏅 Cross-Encoder Re-ranking Benchmark ({QUERIES} queries, top-{TOP_N})")
+    print("=" * 70)
+    print(f"  simulated model: {CALL_OVERHEAD * 1000:.0f}ms per call + {PAIR_COST * 1000:.1f}ms per pair")
+
+    pools, relevance = candidate_pools()
+    recall, ms = _run(None, pools, TOP_N)
+    print(f"\n  first stage only                    recall@{TOP_N} {recall:.3f}  {ms:>6.1f}ms/query")
+
+    settings = [
+        ("unbatched, score all", dict(batch_size=1, patience=None)),
+        ("batch 16, score all", dict(batch_size=16, patience=None)),
+        ("batch 16, early cutoff (patience 2)", dict(batch_size=16, patience=2)),
+        ("batch 16, early cutoff (patience 1)", dict(batch_size=16, patience=1)),
+    ]
+    for fetch in (20, 50, 100):
+        print(f"\n  re-rank top {fetch} candidates:")
+        for label, params in settings:
+            if fetch == 100 and params["batch_size"] == 1:
+                continue
+            reranker = CrossEncoderReranker(SimulatedCrossEncoder(relevance), top_n=TOP_N, **params)
+            recall, ms = _run(reranker, pools, fetch)
+            print(f"    {label:<36} recall@{TOP_N} {recall:.3f}  {ms:>6.1f}ms/query"
+                  f"  {reranker.pairs_scored / len(pools):>5.1f} pairs")
+
+    print("\n" + "-" * 70)
+    print("♻️  Repeated queries (pair-score cache):")
+    print("-" * 70)
+    reranker = CrossEncoderReranker(SimulatedCrossEncoder(relevance), top_n=TOP_N, patience=1)
+    _, cold = _run(reranker, pools, 50)
+    _, warm = _run(reranker, pools, 50)
+    print(f"  cold {cold:.1f}ms/query, warm {warm:.2f}ms/query, cache hit rate {reranker.cache.hit_rate:.1%}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
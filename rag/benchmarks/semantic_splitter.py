@@ -0,0 +1,60 @@
+"""Benchmark: SemanticChunker vs VectorizedSemanticChunker on long documents.
+
+Run with: python -m rag.benchmarks.semantic_splitter
+"""
+
+import warnings
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from langchain_experimental.text_splitter import SemanticChunker  # noqa: E402
+
+from rag.benchmarks._fixtures import HashingEmbeddings, synthetic_document, timed  # noqa: E402
+from rag.embedding_cache import CachedEmbeddings  # noqa: E402
+from rag.semantic_splitter import VectorizedSemanticChunker  # noqa: E402
+
+SENTENCE_COUNTS = [1000, 5000, 20000]
+SETTINGS = {"breakpoint_threshold_type": "gradient"}  # default threshold: 95th percentile
+
+
+def main():
+    """Time both chunkers on growing documents and check the chunks match."""
+    print("\n" + "=" * 70)
+    print("🧠 Semantic Chunker Benchmark (gradient breakpoints)")
+    print("=" * 70)
+    print("\n  Embeddings are pre-warmed in a shared cache, so the timings below")
+    print("  measure sentence combining, distances and breakpoints only.")
+    print(f"\n  {'sentences':>10} {'chunks':>8} {'baseline':>10} {'vectorised':>11} {'speedup':>8}  match")
+
+    for count in SENTENCE_COUNTS:
+        text = synthetic_document(count, seed=count)
+        embeddings = CachedEmbeddings(HashingEmbeddings())
+        VectorizedSemanticChunker(embeddings, **SETTINGS).split_text(text)
+
+        baseline = SemanticChunker(embeddings, **SETTINGS)
+        expected, base_seconds = timed(baseline.split_text, text)
+
+        fast = VectorizedSemanticChunker(embeddings, **SETTINGS)
+        actual, fast_seconds = timed(fast.split_text, text)
+
+        print(
+            f"  {count:>10} {len(actual):>8} {base_seconds:>9.3f}s {fast_seconds:>10.3f}s"
+            f" {base_seconds / fast_seconds:>7.1f}x  {'✓' if actual == expected else '✗'}"
+        )
+
+    print("\n" + "-" * 70)
+    print("📦 Many documents through the embedding cache:")
+    print("-" * 70)
+    texts = [synthetic_document(200, seed=i % 10) for i in range(50)]
+    embeddings = HashingEmbeddings()
+    cached = CachedEmbeddings(embeddings)
+    fast = VectorizedSemanticChunker(cached, **SETTINGS)
+    _, seconds = timed(fast.split_texts, texts)
+    print(f"  Split {len(texts)} documents in {seconds:.3f}s")
+    print(f"  Embedding calls: {embeddings.calls}  texts embedded: {embeddings.texts_embedded}")
+    print(f"  Cache hit rate: {cached.hit_rate:.0%} (documents repeat, so sentences do too)")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: full A/B evaluation vs sequential early stopping.
+
+Simulates two RAG configurations answering the same few hundred questions
+(each answer is the reference, or another question's reference, with a
+per-configuration accuracy) and compares them on ``answer_correctness``
+with the offline judge from ``rag.benchmarks.evaluation``.  For a clear
+gap, a small gap and no gap it reports what a full run of both
+configurations concludes, and where the SPRT and bootstrap comparisons stop
+and how many judge calls they spend.  A repeated no-gap run measures how
+often each method wrongly declares a winner.
+
+Run with: python -m rag.benchmarks.sequential_eval
+"""
+
+import random
+
+from rag.benchmarks._fixtures import FakeChatModel, synthetic_sentences
+from rag.benchmarks.evaluation import fake_judge
+from rag.evaluation import AnswerCorrectness, RAGEvaluator
+from rag.sequential_eval import bootstrap_interval
+
+QUESTIONS = 600
+JUDGE_LATENCY = 0.05
+CONCURRENCY = 32
+SCENARIOS = [("clear gap", 0.80, 0.60), ("small gap", 0.74, 0.68), ("no gap", 0.70, 0.70)]
+NULL_REPEATS = 40
+_SYLLABLES = ["ka", "lo", "mi", "zu", "re", "tan", "vo", "xi", "pe", "dro", "qua", "sen"]
+
+
+def paired_rows(accuracy_a, accuracy_b, seed=0):
+    """``(rows_a, rows_b)``: the same questions answered with the given accuracies."""
+    rng = random.Random(seed)
+    sentences = synthetic_sentences(QUESTIONS, seed=seed + 7)
+    items = []
+    for i, sentence in enumerate(sentences):
+        name = "".join(rng.sample(_SYLLABLES, 4))
+        items.append({"question": f"What does the {name} setting do?",
+                      "reference": f"The {name} setting {sentence[0].lower()}{sentence[1:]}",
+                      "contexts": [sentence]})
+
+    def answered(accuracy):
+        rows = []
+        for i, item in enumerate(items):
+            correct = rng.random() < accuracy
+            answer = item["reference"] if correct else items[(i + rng.randrange(1, QUESTIONS)) % QUESTIONS]["reference"]
+            rows.append({**item, "answer": answer})
+        return rows
+
+    return answered(accuracy_a), answered(accuracy_b)
+
+
+def evaluator(latency=JUDGE_LATENCY):
+    judge = FakeChatModel(latency=latency, respond=fake_judge)
+    return RAGEvaluator(judge, metrics=[AnswerCorrectness()], max_concurrency=CONCURRENCY)
+
+
+def full_comparison(rows_a, rows_b):
+    runner = evaluator()
+    report_a, report_b = runner.evaluate(rows_a), runner.evaluate(rows_b)
+    pairs = [(a.scores["answer_correctness"], b.scores["answer_correctness"])
+             for a, b in zip(report_a.results, report_b.results)
+             if a.scores["answer_correctness"] is not None and b.scores["answer_correctness"] is not None]
+    low, high = bootstrap_interval([a - b for a, b in pairs])
+    winner = "a" if low > 0 else "b" if high < 0 else "tie"
+    seconds = report_a.seconds + report_b.seconds
+    return winner, (low, high), report_a.judge_calls + report_b.judge_calls, seconds
+
+
+def main():
+    """Compare decisions, pairs evaluated and judge calls."""
+    print("\n" + "=" * 70)
+    print("🏁 Sequential Early-Stopping Comparison Benchmark")
+    print("=" * 70)
+    print(f"  {QUESTIONS} questions per configuration, judge {JUDGE_LATENCY * 1000:.0f}ms,"
+          f" max_concurrency={CONCURRENCY}, alpha=0.05")
+
+    for label, accuracy_a, accuracy_b in SCENARIOS:
+        rows_a, rows_b = paired_rows(accuracy_a, accuracy_b)
+        winner, (low, high), calls, seconds = full_comparison(rows_a, rows_b)
+        print(f"\n  {label}: accuracy A {accuracy_a:.0%}, B {accuracy_b:.0%}")
+        print(f"    {'run':<28} {'winner':>6} {'pairs':>6} {'judge calls':>11} {'saved':>6} {'seconds':>8}")
+        print(f"    {'full evaluation':<28} {winner:>6} {QUESTIONS:>6} {calls:>11} {'-':>6} {seconds:>7.2f}s"
+              f"  diff CI [{low:+.3f}, {high:+.3f}]")
+        for method, kwargs in (("sprt", {}), ("bootstrap", {"margin": 0.05})):
+            report = evaluator().compare(rows_a, rows_b, method=method, **kwargs)
+            saved = 1 - report.judge_calls / calls
+            print(f"    {f'compare(method={method!r})':<28} {str(report.winner):>6} {report.pairs:>6}"
+                  f" {report.judge_calls:>11} {saved:>6.0%} {report.seconds:>7.2f}s"
+                  f"  diff {report.difference:+.3f}")
+
+    print(f"\n  no gap, {NULL_REPEATS} independent datasets: how often is a winner declared?")
+    for method, kwargs in (("sprt", {}), ("bootstrap", {"margin": 0.05})):
+        false_winners, pairs = 0, 0
+        for seed in range(NULL_REPEATS):
+            rows_a, rows_b = paired_rows(0.7, 0.7, seed=100 + seed)
+            report = evaluator(latency=0.0).compare(rows_a, rows_b, method=method, seed=seed, **kwargs)
+            false_winners += report.winner in ("a", "b")
+            pairs += report.pairs
+        print(f"    {method:<10} {false_winners}/{NULL_REPEATS} false winners, {pairs / NULL_REPEATS:.0f} pairs on average")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
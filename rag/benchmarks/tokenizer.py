@@ -0,0 +1,68 @@
+"""Benchmark: BM25 tokenisation, whitespace split vs Tokenizer vs process pool.
+
+Run with: python -m rag.benchmarks.tokenizer
+"""
+
+import os
+import warnings
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from langchain_community.retrievers.bm25 import default_preprocessing_func  # noqa: E402
+
+from rag.benchmarks._fixtures import load_sample_texts, synthetic_sentences, timed  # noqa: E402
+from rag.bm25 import PersistentBM25Retriever  # noqa: E402
+from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter  # noqa: E402
+from rag.tokenizer import Tokenizer, Vocabulary, tokenize_corpus  # noqa: E402
+
+DOCUMENTS = 200000
+QUERIES = ["How do Agents remember previous interactions?", "Which loaders extract text?"]
+
+
+def main():
+    """Time tokenising a large corpus and show the effect on matching."""
+    print("\n" + "=" * 70)
+    print("🔤 BM25 Tokenisation Benchmark")
+    print("=" * 70)
+
+    sentences = synthetic_sentences(DOCUMENTS, seed=3)
+    texts = [f"{s} Retrievers, indexing and the LangChain's chains!" for s in sentences]
+    tokenizer = Tokenizer()
+    print(f"\n  {len(texts)} documents, {os.cpu_count()} CPUs:")
+
+    tokens, seconds = timed(lambda: [default_preprocessing_func(t) for t in texts])
+    print(f"    whitespace split            {seconds:>6.2f}s  {len({t for d in tokens for t in d}):>6} distinct terms")
+
+    tokens, seconds = timed(lambda: [tokenizer(t) for t in texts])
+    print(f"    Tokenizer (1 process)       {seconds:>6.2f}s  {len({t for d in tokens for t in d}):>6} distinct terms")
+
+    def intern_serial():
+        vocab = Vocabulary()
+        return [vocab.encode(tokenizer(t), add=True) for t in texts], vocab
+
+    (_, vocab), seconds = timed(intern_serial)
+    print(f"    Tokenizer + interning       {seconds:>6.2f}s  {len(vocab):>6} term IDs")
+
+    (_, vocab), seconds = timed(tokenize_corpus, texts, tokenizer)
+    print(f"    tokenize_corpus (pool)      {seconds:>6.2f}s  {len(vocab):>6} term IDs")
+
+    print("\n" + "-" * 70)
+    print("🎯 Query terms that match the utils/docs index:")
+    print("-" * 70)
+    splitter = OffsetRecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=0)
+    chunks = [c for text in load_sample_texts().values() for c in splitter.split_text(text)]
+    retrievers = {
+        label: PersistentBM25Retriever.from_texts(chunks, k=1, preprocess_func=func)
+        for label, func in (("whitespace", default_preprocessing_func), ("Tokenizer", tokenizer))
+    }
+    for query in QUERIES:
+        print(f"    {query!r}")
+        for label, retriever in retrievers.items():
+            terms = retriever.preprocess_func(query)
+            found = [t for t in terms if t in retriever.index.vocab]
+            print(f"      {label:<11} {len(found)}/{len(terms)} matched: {found}")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
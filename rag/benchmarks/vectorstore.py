@@ -0,0 +1,114 @@
+"""Benchmark: NumpyVectorStore vs Chroma for build, open and query time.
+
+Run with: python -m rag.benchmarks.vectorstore
+
+Chroma is only timed when ``langchain_chroma`` (or ``chromadb`` for the
+community wrapper) is installed; otherwise that column is skipped.
+"""
+
+import shutil
+import statistics
+import tempfile
+import time
+
+from rag.benchmarks._fixtures import HashingEmbeddings, random_unit_vectors, timed
+from rag.vectorstore import NumpyVectorStore
+
+SIZES = [10000, 100000]
+DIM = 384
+QUERIES = 200
+
+
+def _load_chroma():
+    try:
+        from langchain_chroma import Chroma
+        return Chroma
+    except ImportError:
+        pass
+    try:
+        import chromadb  # noqa: F401
+        from langchain_community.vectorstores import Chroma
+        return Chroma
+    except ImportError:
+        return None
+
+
+def _latencies(search, queries):
+    """Per-query latencies in milliseconds."""
+    out = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def _report(label, build_seconds, open_seconds, latencies):
+    p50 = statistics.median(latencies)
+    p99 = sorted(latencies)[int(len(latencies) * 0.99) - 1]
+    open_text = f"{open_seconds * 1000:>8.1f}ms" if open_seconds is not None else f"{'-':>10}"
+    print(f"    {label:<16} build {build_seconds:>7.2f}s  open {open_text}  p50 {p50:>6.2f}ms  p99 {p99:>6.2f}ms")
+
+
+def main():
+    """Build stores of growing size, reopen them and time top-10 queries."""
+    print("\n" + "=" * 70)
+    print("🗄️  Vector Store Benchmark (exact top-10, cosine)")
+    print("=" * 70)
+
+    chroma = _load_chroma()
+    if chroma is None:
+        print("\n  ⚠️  Chroma not installed - only NumpyVectorStore is timed.")
+
+    embeddings = HashingEmbeddings(dim=DIM)
+    for size in SIZES:
+        print(f"\n  {size} vectors x {DIM} dims:")
+        vectors = random_unit_vectors(size, DIM, seed=size)
+        queries = random_unit_vectors(QUERIES, DIM, seed=size + 1)
+        texts = [f"chunk {i}" for i in range(size)]
+        metadatas = [{"source": f"doc-{i % 50}"} for i in range(size)]
+
+        for dtype in ("float32", "float16"):
+            directory = tempfile.mkdtemp()
+            try:
+                store = NumpyVectorStore(embeddings, persist_directory=directory, dtype=dtype)
+                _, build_seconds = timed(store.add_embeddings, texts, vectors, metadatas)
+                reopened, open_seconds = timed(NumpyVectorStore, embeddings, persist_directory=directory)
+                latencies = _latencies(lambda q: reopened.similarity_search_by_vector(q, k=10), queries)
+                _report(f"numpy {dtype}", build_seconds, open_seconds, latencies)
+            finally:
+                shutil.rmtree(directory)
+
+        if chroma is not None:
+            directory = tempfile.mkdtemp()
+            try:
+                store = chroma(
+                    embedding_function=embeddings,
+                    persist_directory=directory,
+                    collection_metadata={"hnsw:space": "cosine"},
+                )
+                batch = 5000
+                start = time.perf_counter()
+                for i in range(0, size, batch):
+                    store._collection.add(
+                        ids=[str(j) for j in range(i, min(i + batch, size))],
+                        embeddings=vectors[i:i + batch].tolist(),
+                        documents=texts[i:i + batch],
+                        metadatas=metadatas[i:i + batch],
+                    )
+                build_seconds = time.perf_counter() - start
+                latencies = _latencies(
+                    lambda q: store.similarity_search_by_vector(q.tolist(), k=10), queries
+                )
+                _report("chroma (hnsw)", build_seconds, None, latencies)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    print("\n  The NumPy store opens by memory-mapping vectors.bin, so a second")
+    print("  process opening the same directory shares the pages instead of")
+    print("  loading its own copy.")
+    print("\n" + "=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
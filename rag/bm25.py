@@ -0,0 +1,403 @@
+"""Persistent BM25 retriever over a block-compressed inverted index.
+
+``BM25Retriever.from_texts(chunks, k=3)`` (module 14) rebuilds a
+``rank_bm25`` model on every run and scores every document for every query.
+``PersistentBM25Retriever`` builds an inverted index once, saves it, and at
+query time only touches the posting lists of the query terms:
+
+- postings are split into blocks of 128 documents, each stored as varint
+  doc-id deltas followed by varint term frequencies;
+- IDF, document lengths and a per-term and per-block score upper bound are
+  precomputed at build time;
+- queries use MaxScore pruning: terms are processed from the highest upper
+  bound down, and once the remaining terms cannot lift an unseen document
+  into the top k, their postings are only decoded in the blocks that hold
+  candidates whose block-max bound can still reach the top k.
+
+Scores are identical to ``rank_bm25.BM25Okapi`` (same ``k1``, ``b`` and
+``epsilon`` IDF floor), so it is a drop-in replacement for the
+``bm25_retriever`` in a chain.  Unlike ``rank_bm25`` it does not pad the
+results with documents that match no query term.  A term found in most
+documents can get a negative IDF (the floor is ``epsilon`` times the mean
+IDF, which can itself be negative); it lowers the score of every document
+holding it, so queries with such a term are scored without pruning.
+"""
+
+import json
+import os
+from collections import Counter
+
+import numpy as np
+from langchain_community.retrievers.bm25 import default_preprocessing_func
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from rag.tokenizer import TOKENIZER_FILE, Tokenizer, Vocabulary, tokenize_corpus
+from rag.vectorstore import top_k_indices
+
+BLOCK_SIZE = 128
+_META_FILE = "meta.json"
+_VOCAB_FILE = "vocab.json"
+_POSTINGS_FILE = "postings.bin"
+_DOCS_FILE = "docs.jsonl"
+_DOCS_INDEX_FILE = "docs.idx"
+_PRUNE_TOLERANCE = 1e-9
+_ARRAYS = ("idf", "term_max", "term_blocks", "block_offsets", "block_counts", "block_first", "block_max", "doc_len")
+
+
+def _varint_sizes(values):
+    sizes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+    return sizes
+
+
+def varint_encode(values):
+    """LEB128-encode a sequence of non-negative integers into a ``uint8`` array."""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = _varint_sizes(values)
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    starts = np.cumsum(sizes) - sizes
+    rest = values.copy()
+    for group in range(int(sizes.max()) if len(values) else 0):
+        active = sizes > group
+        more = (sizes[active] > group + 1).astype(np.uint8) << 7
+        out[starts[active] + group] = (rest[active] & np.uint64(0x7F)).astype(np.uint8) | more
+        rest[active] >>= np.uint64(7)
+    return out
+
+
+def varint_decode(data):
+    """Decode a ``uint8`` array produced by ``varint_encode`` (vectorised)."""
+    data = np.asarray(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    shifts = (np.arange(len(data)) - np.repeat(starts, ends - starts + 1)) * 7
+    parts = (data & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(parts, starts)
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index with block-compressed postings.
+
+    Build with ``BM25Index.build(tokenized_texts, documents)``, save with
+    ``save(directory)`` and reopen with ``BM25Index.load(directory)``; the
+    postings are memory-mapped on load.
+    """
+
+    def __init__(self, vocab, arrays, postings, documents=None, directory=None, k1=1.5, b=0.75,
+                 epsilon=0.25, avgdl=0.0):
+        self.vocab = vocab
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.avgdl = avgdl
+        self.documents = documents
+        self.directory = directory
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self._doc_offsets = None
+        self.postings_decoded = 0
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    @property
+    def total_postings(self):
+        return int(np.asarray(self.block_counts, dtype=np.int64).sum())
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, tokenized_texts, documents, k1=1.5, b=0.75, epsilon=0.25):
+        """Index ``tokenized_texts`` (lists of tokens), one per ``documents`` entry."""
+        vocab = Vocabulary()
+        id_arrays = [vocab.encode(tokens, add=True) for tokens in tokenized_texts]
+        return cls.build_ids(id_arrays, vocab, documents, k1=k1, b=b, epsilon=epsilon)
+
+    @classmethod
+    def build_ids(cls, id_arrays, vocab, documents, k1=1.5, b=0.75, epsilon=0.25):
+        """Index documents already interned to term IDs (see ``rag.tokenizer.tokenize_corpus``)."""
+        doc_len = np.fromiter((len(ids) for ids in id_arrays), dtype=np.int64, count=len(id_arrays))
+        corpus_size = len(doc_len)
+        avgdl = float(doc_len.sum()) / corpus_size if corpus_size else 0.0
+
+        # Count (term, doc) pairs in one pass; sorting the combined key puts
+        # postings in (term, doc) order.
+        flat = np.concatenate(id_arrays) if corpus_size else np.zeros(0, dtype=np.int64)
+        owner = np.repeat(np.arange(corpus_size, dtype=np.int64), doc_len)
+        keys, tfs = np.unique(flat.astype(np.int64) * max(corpus_size, 1) + owner, return_counts=True)
+        term_ids, doc_ids = np.divmod(keys, max(corpus_size, 1))
+        doc_len = doc_len.astype(np.uint32)
+        df = np.bincount(term_ids, minlength=len(vocab))
+
+        # Same IDF as rank_bm25.BM25Okapi, including the epsilon floor.
+        idf = np.log(corpus_size - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            idf[idf < 0] = epsilon * idf.mean()
+
+        norm = k1 * (1 - b + b * doc_len[doc_ids] / avgdl) if len(doc_ids) else np.zeros(0)
+        scores = idf[term_ids] * tfs * (k1 + 1) / (tfs + norm)
+
+        term_start = np.concatenate([[0], np.cumsum(df)])
+        position = np.arange(len(term_ids)) - term_start[term_ids]
+        blocks_per_term = (df + BLOCK_SIZE - 1) // BLOCK_SIZE
+        term_blocks = np.concatenate([[0], np.cumsum(blocks_per_term)]).astype(np.int64)
+        block_of = term_blocks[term_ids] + position // BLOCK_SIZE
+        block_counts = np.bincount(block_of, minlength=int(term_blocks[-1])).astype(np.uint16)
+        block_start = np.concatenate([[0], np.cumsum(block_counts, dtype=np.int64)])[:-1]
+
+        # The first doc id of each block is absolute, the rest are deltas.
+        deltas = doc_ids.copy()
+        inner = np.ones(len(doc_ids), dtype=bool)
+        inner[block_start] = False
+        deltas[inner] -= doc_ids[np.flatnonzero(inner) - 1]
+
+        # Lay each block out as [deltas..., tfs...] and varint the lot.
+        offset_in_block = np.arange(len(doc_ids)) - block_start[block_of]
+        slots = np.empty(2 * len(doc_ids), dtype=np.int64)
+        slot_delta = 2 * block_start[block_of] + offset_in_block
+        slots[slot_delta] = deltas
+        slots[slot_delta + block_counts[block_of]] = tfs
+        encoded = varint_encode(slots)
+        byte_start = np.concatenate([[0], np.cumsum(_varint_sizes(slots.astype(np.uint64)))])
+        block_offsets = np.concatenate([byte_start[2 * block_start], [len(encoded)]]).astype(np.int64)
+
+        arrays = {
+            "idf": idf.astype(np.float64),
+            "term_max": (np.maximum.reduceat(scores, term_start[:-1]) if len(scores) else np.zeros(0)),
+            "term_blocks": term_blocks,
+            "block_offsets": block_offsets,
+            "block_counts": block_counts,
+            "block_first": doc_ids[block_start].astype(np.uint32),
+            "block_max": (np.maximum.reduceat(scores, block_start) if len(scores) else np.zeros(0)),
+            "doc_len": doc_len,
+        }
+        return cls(vocab, arrays, encoded, documents=list(documents), k1=k1, b=b, epsilon=epsilon, avgdl=avgdl)
+
+    # ------------------------------------------------------------------
+    # Postings
+    # ------------------------------------------------------------------
+
+    def _decode_blocks(self, blocks):
+        """Doc ids and term frequencies for the given (sorted) global block ids."""
+        if len(blocks) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        offsets = self.block_offsets
+        if blocks[-1] - blocks[0] + 1 == len(blocks):
+            raw = self.postings[offsets[blocks[0]]:offsets[blocks[-1] + 1]]
+        else:
+            raw = np.concatenate([self.postings[offsets[g]:offsets[g + 1]] for g in blocks])
+        values = varint_decode(raw)
+        counts = np.asarray(self.block_counts[blocks], dtype=np.int64)
+        self.postings_decoded += int(counts.sum())
+        value_start = np.concatenate([[0], np.cumsum(2 * counts)])[:-1]
+        within = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        first = np.repeat(value_start, counts)
+        deltas = values[first + within]
+        tfs = values[first + within + np.repeat(counts, counts)]
+        # Cumulative sum of deltas, restarted at each block's absolute first id.
+        totals = np.cumsum(deltas)
+        block_base = np.repeat(totals[np.cumsum(counts) - counts] - deltas[np.cumsum(counts) - counts], counts)
+        return totals - block_base, tfs
+
+    def _term_scores(self, term, docs, tfs):
+        norm = self.k1 * (1 - self.b + self.b * np.asarray(self.doc_len)[docs] / self.avgdl)
+        return self.idf[term] * tfs * (self.k1 + 1) / (tfs + norm)
+
+    # ------------------------------------------------------------------
+    # Searching
+    # ------------------------------------------------------------------
+
+    def search(self, query_tokens, k):
+        """Top-``k`` ``(rows, scores)`` for a tokenised query, best first."""
+        return self.search_ids(self.vocab.encode(query_tokens), k)
+
+    def search_ids(self, term_ids, k):
+        """Top-``k`` ``(rows, scores)`` for a query given as term IDs."""
+        weights = Counter(int(t) for t in term_ids)
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        if not weights or k <= 0:
+            return empty
+        terms = sorted(weights, key=lambda t: self.term_max[t] * weights[t], reverse=True)
+        bounds = np.array([float(self.term_max[t]) * weights[t] for t in terms])
+        # Bound of the terms after each one, summed from the end so it is never negative
+        # (subtracting from a running total leaves -4e-16 residues that prune the threshold holder).
+        suffixes = np.append(np.cumsum(bounds[::-1])[::-1][1:], 0.0)
+        # A term whose IDF is floored below zero lowers the scores of the documents holding it,
+        # so partial scores are no longer lower bounds and nothing can be pruned safely.
+        prune = all(self.idf[t] >= 0 for t in terms)
+
+        candidates = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+        threshold = -np.inf
+        for term, bound, remaining in zip(terms, bounds, suffixes):
+            blocks = np.arange(self.term_blocks[term], self.term_blocks[term + 1])
+            # Prune against a slightly lowered threshold: query-time scores may differ from the
+            # precomputed bounds in the last bits.
+            slack = threshold - _PRUNE_TOLERANCE * max(1.0, abs(threshold))
+            if prune and len(candidates) >= k and bound + remaining < slack:
+                # MaxScore: no unseen document can reach the top k any more.
+                # Bound each candidate by the max score of the block it would
+                # sit in, drop hopeless ones and decode only their blocks.
+                first_docs = np.asarray(self.block_first[blocks[0]:blocks[-1] + 1], dtype=np.int64)
+                slot = np.searchsorted(first_docs, candidates, side="right") - 1
+                block_bound = np.where(
+                    slot >= 0, weights[term] * np.asarray(self.block_max)[blocks[np.maximum(slot, 0)]], 0.0
+                )
+                keep = scores + block_bound + remaining >= slack
+                candidates, scores, slot = candidates[keep], scores[keep], slot[keep]
+                needed = np.unique(slot[slot >= 0])
+                docs, tfs = self._decode_blocks(blocks[needed])
+                position = np.searchsorted(docs, candidates)
+                hit = position < len(docs)
+                hit[hit] = docs[position[hit]] == candidates[hit]
+                scores[hit] += weights[term] * self._term_scores(term, candidates[hit], tfs[position[hit]])
+            else:
+                docs, tfs = self._decode_blocks(blocks)
+                term_scores = weights[term] * self._term_scores(term, docs, tfs)
+                merged = np.union1d(candidates, docs)
+                new_scores = np.zeros(len(merged), dtype=np.float64)
+                new_scores[np.searchsorted(merged, candidates)] += scores
+                new_scores[np.searchsorted(merged, docs)] += term_scores
+                candidates, scores = merged, new_scores
+            if len(candidates) >= k:
+                threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    # ------------------------------------------------------------------
+    # Documents and persistence
+    # ------------------------------------------------------------------
+
+    def document(self, row):
+        """The ``Document`` stored at ``row``."""
+        if self.documents is not None:
+            return self.documents[row]
+        if self._doc_offsets is None:
+            self._doc_offsets = np.memmap(os.path.join(self.directory, _DOCS_INDEX_FILE), dtype=np.uint64, mode="r")
+        start, end = int(self._doc_offsets[row]), int(self._doc_offsets[row + 1])
+        with open(os.path.join(self.directory, _DOCS_FILE), "rb") as f:
+            f.seek(start)
+            record = json.loads(f.read(end - start))
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"])
+
+    def save(self, directory):
+        """Write the index and its documents to ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        np.asarray(self.postings, dtype=np.uint8).tofile(os.path.join(directory, _POSTINGS_FILE))
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, name + ".npy"), np.asarray(getattr(self, name)))
+        self.vocab.save(os.path.join(directory, _VOCAB_FILE))
+
+        offsets = [0]
+        with open(os.path.join(directory, _DOCS_FILE), "wb") as f:
+            for row in range(len(self)):
+                doc = self.document(row)
+                line = json.dumps(
+                    {"id": doc.id, "text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False
+                ).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.asarray(offsets, dtype=np.uint64).tofile(os.path.join(directory, _DOCS_INDEX_FILE))
+
+        meta = {"version": 1, "k1": self.k1, "b": self.b, "epsilon": self.epsilon, "avgdl": self.avgdl}
+        with open(os.path.join(directory, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Open an index written by ``save``; postings and documents stay on disk."""
+        with open(os.path.join(directory, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        vocab = Vocabulary.load(os.path.join(directory, _VOCAB_FILE))
+        arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in _ARRAYS}
+        path = os.path.join(directory, _POSTINGS_FILE)
+        postings = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, np.uint8)
+        return cls(vocab, arrays, postings, directory=directory, k1=meta["k1"], b=meta["b"],
+                   epsilon=meta["epsilon"], avgdl=meta["avgdl"])
+
+
+class PersistentBM25Retriever(BaseRetriever):
+    """``BM25Retriever`` replacement backed by a saved ``BM25Index``.
+
+    ``preprocess_func`` defaults to LangChain's whitespace split so scores
+    match ``BM25Retriever``; pass a ``rag.tokenizer.Tokenizer`` for
+    stopwords and stemming, which also enables process-pool tokenisation at
+    build time and is saved with the index.
+    """
+
+    index: BM25Index
+    """The inverted index."""
+    k: int = 4
+    """Number of documents to return."""
+    preprocess_func: object = default_preprocessing_func
+    """Tokeniser applied to texts and queries (must match the one used at build time)."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @classmethod
+    def from_texts(cls, texts, metadatas=None, ids=None, bm25_params=None,
+                   preprocess_func=default_preprocessing_func, persist_directory=None, processes=None, **kwargs):
+        """Build (and optionally save) an index over ``texts``."""
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [None] * len(texts)
+        documents = [Document(page_content=t, metadata=m, id=i) for t, m, i in zip(texts, metadatas, ids)]
+        return cls.from_documents(documents, bm25_params=bm25_params, preprocess_func=preprocess_func,
+                                  persist_directory=persist_directory, processes=processes, **kwargs)
+
+    @classmethod
+    def from_documents(cls, documents, *, bm25_params=None, preprocess_func=default_preprocessing_func,
+                       persist_directory=None, processes=None, **kwargs):
+        """Build (and optionally save) an index over ``documents``.
+
+        ``processes`` is passed to ``tokenize_corpus`` when ``preprocess_func``
+        is a ``Tokenizer``.
+        """
+        documents = list(documents)
+        if isinstance(preprocess_func, Tokenizer):
+            id_arrays, vocab = tokenize_corpus(
+                [doc.page_content for doc in documents], preprocess_func, processes=processes
+            )
+            index = BM25Index.build_ids(id_arrays, vocab, documents, **(bm25_params or {}))
+        else:
+            index = BM25Index.build(
+                [preprocess_func(doc.page_content) for doc in documents], documents, **(bm25_params or {})
+            )
+        if persist_directory is not None:
+            index.save(persist_directory)
+            if isinstance(preprocess_func, Tokenizer):
+                preprocess_func.save(persist_directory)
+        return cls(index=index, preprocess_func=preprocess_func, **kwargs)
+
+    @classmethod
+    def load(cls, persist_directory, preprocess_func=None, **kwargs):
+        """Open a saved index without re-tokenising anything.
+
+        The saved ``Tokenizer`` is restored when there is one and no
+        ``preprocess_func`` is given.
+        """
+        if preprocess_func is None:
+            if os.path.isfile(os.path.join(persist_directory, TOKENIZER_FILE)):
+                preprocess_func = Tokenizer.load(persist_directory)
+            else:
+                preprocess_func = default_preprocessing_func
+        return cls(index=BM25Index.load(persist_directory), preprocess_func=preprocess_func, **kwargs)
+
+    def get_documents_with_scores(self, query):
+        """Top-``k`` ``(document, bm25_score)`` pairs for ``query``."""
+        rows, scores = self.index.search(self.preprocess_func(query), self.k)
+        return [(self.index.document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return [doc for doc, _ in self.get_documents_with_scores(query)]
@@ -0,0 +1,341 @@
+"""Symbol index over Python sources for code RAG.
+
+Module 12 chunks ``sample_code.py`` like prose, so "what does
+``RAGApplication._setup_chain`` do" depends on the embedding of a chunk
+happening to land near the question.  Code has names; this module looks
+them up:
+
+- ``extract_symbols`` walks the ``ast`` of a file and records every class,
+  function and method as a ``Symbol``: qualified name, signature,
+  docstring, the names it calls, and its source span (lines and character
+  offsets, decorators included);
+- ``SymbolIndex`` keeps the symbols of many files in dictionaries keyed by
+  qualified name, module-qualified name and bare name, plus one sorted key
+  list, so exact lookups are a dict hit and prefix lookups a ``bisect``
+  (microseconds, no embedding call).  Call edges are resolved to indexed
+  symbols for ``callees``/``callers``;
+- ``SymbolRetriever`` answers questions that name a symbol from the index
+  and falls back to a vector store (e.g. of ``rag.code_splitter`` chunks)
+  for everything else.
+"""
+
+import ast
+import bisect
+import os
+import re
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from rag.code_splitter import line_offsets, own_start, split_lines
+
+_BACKTICKED = re.compile(r"`([^`\s]+)`")
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*")
+
+
+class Symbol:
+    """A class, function or method and where its source lives."""
+
+    __slots__ = ("name", "kind", "module", "path", "signature", "docstring", "calls",
+                 "start_line", "end_line", "start_index", "end_index")
+
+    def __init__(self, name, kind, module, path, signature, docstring, calls,
+                 start_line, end_line, start_index, end_index):
+        self.name = name
+        self.kind = kind
+        self.module = module
+        self.path = path
+        self.signature = signature
+        self.docstring = docstring
+        self.calls = calls
+        self.start_line = start_line
+        self.end_line = end_line
+        self.start_index = start_index
+        self.end_index = end_index
+
+    @property
+    def qualified_name(self):
+        """``module.Class.method`` (just ``name`` when the module is unknown)."""
+        return f"{self.module}.{self.name}" if self.module else self.name
+
+    @property
+    def short_name(self):
+        return self.name.rsplit(".", 1)[-1]
+
+    def __repr__(self):
+        return f"Symbol({self.qualified_name!r}, {self.kind}, lines {self.start_line}-{self.end_line})"
+
+
+def _call_name(node, class_name):
+    """Dotted name of a call target; ``self.x``/``cls.x`` become ``Class.x``."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return parts[0] if parts else None
+    if node.id in ("self", "cls") and class_name and parts:
+        parts.append(class_name)
+    else:
+        parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _signature(node):
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(base) for base in node.bases + node.keywords)
+        return f"class {node.name}({bases})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _own_calls(node, class_name):
+    """Call targets in ``node``'s body, not counting nested defs and classes."""
+    calls, stack = [], list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(child, ast.Call):
+            name = _call_name(child.func, class_name)
+            if name:
+                calls.append((child.lineno, child.col_offset, name))
+        stack.extend(ast.iter_child_nodes(child))
+    return list(dict.fromkeys(name for _, _, name in sorted(calls)))
+
+
+def extract_symbols(source, module="", path=None):
+    """``Symbol`` for every class, function and method in ``source`` (source order)."""
+    tree = ast.parse(source)
+    offsets = line_offsets(split_lines(source))
+    symbols = []
+
+    def visit(body, prefix, class_name, in_class):
+        for node in body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            name = prefix + node.name
+            start_line, end_line = own_start(node), node.end_lineno
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            else:
+                kind = "method" if in_class else "function"
+            owner = node.name if isinstance(node, ast.ClassDef) else class_name
+            symbols.append(Symbol(
+                name, kind, module, path, _signature(node), ast.get_docstring(node) or "",
+                _own_calls(node, owner), start_line, end_line, offsets[start_line - 1], offsets[end_line],
+            ))
+            visit(node.body, name + ".", owner, isinstance(node, ast.ClassDef))
+
+    visit(tree.body, "", None, False)
+    return symbols
+
+
+def module_name(path, root=None):
+    """Dotted module name of ``path`` relative to ``root`` (``a/b/c.py`` -> ``a.b.c``)."""
+    relative = os.path.relpath(path, root) if root else os.path.basename(path)
+    parts = os.path.splitext(relative)[0].split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(part for part in parts if part not in ("", "."))
+
+
+class SymbolIndex:
+    """Exact and prefix lookup of Python symbols, with call edges and source spans."""
+
+    def __init__(self):
+        self.symbols = []
+        self._sources = {}
+        self._by_key = {}
+        self._keys = None
+        self._callers = None
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def files(self):
+        """``{path: source}`` of the indexed files."""
+        return {path: source for (_, path), source in self._sources.items()}
+
+    def add_source(self, source, module="", path=None):
+        """Index the symbols of one file's ``source``; returns how many were added.
+
+        Adding a ``(module, path)`` again replaces the symbols indexed for it.
+        """
+        symbols = extract_symbols(source, module, path)
+        if (module, path) in self._sources:
+            self._drop(module, path)
+        self._sources[(module, path)] = source
+        for symbol in symbols:
+            self.symbols.append(symbol)
+            for key in {symbol.name, symbol.qualified_name, symbol.short_name}:
+                self._by_key.setdefault(key, []).append(symbol)
+        self._keys = None
+        self._callers = None
+        return len(symbols)
+
+    def _drop(self, module, path):
+        """Forget the symbols indexed for ``(module, path)``."""
+        stale = [symbol for symbol in self.symbols if symbol.module == module and symbol.path == path]
+        stale_ids = {id(symbol) for symbol in stale}
+        self.symbols = [symbol for symbol in self.symbols if id(symbol) not in stale_ids]
+        for key in {key for symbol in stale for key in (symbol.name, symbol.qualified_name, symbol.short_name)}:
+            remaining = [symbol for symbol in self._by_key[key] if id(symbol) not in stale_ids]
+            if remaining:
+                self._by_key[key] = remaining
+            else:
+                del self._by_key[key]
+
+    def add_file(self, path, root=None):
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        return self.add_source(source, module_name(path, root), path)
+
+    def add_directory(self, root, skip_errors=True):
+        """Index every ``.py`` file under ``root``; files that do not parse are skipped.
+
+        Module names are relative to ``root``, or to its parent when ``root``
+        is itself a package (``rag/hybrid.py`` -> ``rag.hybrid``).
+        """
+        base = root
+        if os.path.isfile(os.path.join(root, "__init__.py")):
+            base = os.path.dirname(os.path.abspath(root))
+        added = 0
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    try:
+                        added += self.add_file(os.path.join(directory, filename), base)
+                    except (SyntaxError, UnicodeDecodeError):
+                        if not skip_errors:
+                            raise
+        return added
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, name):
+        """Symbols whose qualified, module-qualified or bare name is ``name``."""
+        return list(self._by_key.get(name, ()))
+
+    def prefix(self, prefix, limit=20):
+        """Symbols with a name key starting with ``prefix`` (sorted by key, deduplicated)."""
+        keys = self._sorted_keys()
+        found = {}
+        for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+            key = keys[i]
+            if not key.startswith(prefix) or len(found) >= limit:
+                break
+            for symbol in self._by_key[key]:
+                found.setdefault(id(symbol), symbol)
+        return list(found.values())[:limit]
+
+    def callees(self, symbol):
+        """Indexed symbols ``symbol`` calls (same-module matches preferred)."""
+        result = []
+        for call in symbol.calls:
+            targets = self.lookup(call) or self.lookup(call.rsplit(".", 1)[-1])
+            local = [target for target in targets if target.module == symbol.module]
+            result.extend(local or targets)
+        return list(dict.fromkeys(result))
+
+    def callers(self, symbol):
+        """Indexed symbols whose calls resolve to ``symbol``."""
+        if self._callers is None:
+            self._callers = {}
+            for caller in self.symbols:
+                for callee in self.callees(caller):
+                    self._callers.setdefault(id(callee), []).append(caller)
+        return list(self._callers.get(id(symbol), ()))
+
+    def source(self, symbol):
+        """Source text of ``symbol`` (decorators included)."""
+        return self._sources[(symbol.module, symbol.path)][symbol.start_index:symbol.end_index]
+
+    def document(self, symbol):
+        """``Document`` with the symbol's source and flat, store-friendly metadata."""
+        metadata = {
+            "symbol": symbol.qualified_name,
+            "kind": symbol.kind,
+            "signature": symbol.signature,
+            "start_line": symbol.start_line,
+            "end_line": symbol.end_line,
+            "start_index": symbol.start_index,
+            "calls": ",".join(symbol.calls),
+        }
+        if symbol.path:
+            metadata["source"] = symbol.path
+        return Document(page_content=self.source(symbol), metadata=metadata)
+
+    def _sorted_keys(self):
+        if self._keys is None:
+            self._keys = sorted(self._by_key)
+        return self._keys
+
+
+def _looks_like_code(name):
+    """Dotted, snake_case, _private or CamelCase (an upper-case letter after the first)."""
+    return "." in name or "_" in name or any(c.isupper() for c in name[1:])
+
+
+def query_symbols(query):
+    """Candidate symbol names mentioned in ``query``.
+
+    Backticked names come first and are taken as written (a trailing ``*``
+    asks for a prefix match); bare words only count when they look like
+    code, so "how do I query the store" does not hit a ``query`` method.
+    """
+    names = [name.strip("().:,") for name in _BACKTICKED.findall(query)]
+    names += [name for name in _IDENTIFIER.findall(_BACKTICKED.sub(" ", query)) if _looks_like_code(name)]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class SymbolRetriever(BaseRetriever):
+    """Answer symbol questions from a ``SymbolIndex``, others from a vector store.
+
+    A question that names a symbol (``RAGApplication._setup_chain``,
+    ``_setup_chain``, or a backticked ``RAGApp*`` prefix) returns the matching
+    symbols' source as documents with ``metadata["match"]`` set to
+    ``"exact"`` or ``"prefix"``.  Otherwise, or when nothing matches, the
+    ``vectorstore`` (if any) is searched.
+    """
+
+    index: SymbolIndex
+    """Symbols to look up."""
+    vectorstore: VectorStore = None
+    """Fallback for questions that name no known symbol."""
+    k: int = 4
+    """Maximum documents to return."""
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        docs = self._lookup(query)
+        if docs or self.vectorstore is None:
+            return docs
+        return self.vectorstore.similarity_search(query, k=self.k)
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        docs = self._lookup(query)
+        if docs or self.vectorstore is None:
+            return docs
+        return await self.vectorstore.asimilarity_search(query, k=self.k)
+
+    def _lookup(self, query):
+        matches = {}
+        for name in query_symbols(query):
+            if name.endswith("*"):
+                hits, match = self.index.prefix(name.rstrip("*"), self.k), "prefix"
+            else:
+                hits, match = self.index.lookup(name), "exact"
+            for symbol in hits:
+                matches.setdefault(id(symbol), (symbol, match))
+        docs = []
+        for symbol, match in list(matches.values())[:self.k]:
+            doc = self.index.document(symbol)
+            doc.metadata["match"] = match
+            docs.append(doc)
+        return docs
@@ -0,0 +1,345 @@
+"""Python code splitter driven by ``ast`` with incremental re-splitting.
+
+``RecursiveCharacterTextSplitter.from_language(Language.PYTHON)`` (module 12)
+splits on regex separators such as ``\\nclass `` and ``\\ndef ``, which cuts
+decorators off their functions and nested functions out of their parents.
+``PythonCodeSplitter`` chunks along statement boundaries instead:
+
+- every top-level statement owns its source lines, including decorators and
+  the comments/blank lines just above it;
+- small neighbouring statements are merged up to ``chunk_size``;
+- an oversized class or function is split into its header and its body
+  statements (methods, nested functions), recursively;
+- anything still too large falls back to the offset-based recursive splitter.
+
+``IncrementalCodeSplitter`` keeps the previous split of one file and, on each
+update, re-parses and re-splits only the top-level statements whose lines
+changed.
+"""
+
+import ast
+import bisect
+import copy
+import hashlib
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter
+
+_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+_DEFS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def split_lines(source):
+    """Split on the same line endings the Python tokenizer uses."""
+    return _LINE.findall(source)
+
+
+def line_offsets(lines):
+    """Character offset of the start of every line, plus the end of the last."""
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def own_start(node):
+    """First line of a statement, counting its decorators."""
+    decorators = getattr(node, "decorator_list", None) or []
+    return min([node.lineno] + [d.lineno for d in decorators])
+
+
+def _symbols(node, prefix):
+    """Qualified names of ``node`` and every def/class nested inside it."""
+    if not isinstance(node, _DEFS):
+        return []
+    name = prefix + node.name
+    names = [name]
+    for child in node.body:
+        names.extend(_symbols(child, name + "."))
+    return names
+
+
+class CodeChunk:
+    """A chunk of Python source with its location and the symbols it defines."""
+
+    __slots__ = ("text", "start_index", "start_line", "end_line", "symbols")
+
+    def __init__(self, text, start_index, start_line, end_line, symbols):
+        self.text = text
+        self.start_index = start_index
+        self.start_line = start_line
+        self.end_line = end_line
+        self.symbols = symbols
+
+    @property
+    def id(self):
+        """Content hash; unchanged code keeps the same id across re-splits."""
+        return hashlib.sha1(self.text.encode("utf-8")).hexdigest()[:16]
+
+    def shifted(self, lines, chars):
+        """Copy of this chunk moved by ``lines`` lines and ``chars`` characters."""
+        return CodeChunk(
+            self.text,
+            self.start_index + chars,
+            self.start_line + lines,
+            self.end_line + lines,
+            self.symbols,
+        )
+
+    def __repr__(self):
+        return f"CodeChunk(lines={self.start_line}-{self.end_line}, symbols={self.symbols})"
+
+
+class PythonCodeSplitter(TextSplitter):
+    """Split Python source along ``ast`` statement boundaries.
+
+    ``chunk_overlap`` only applies when a single statement is too large and
+    has to be split by lines; statement-aligned chunks never overlap.
+    Sources that do not parse are split with the language separators instead.
+    """
+
+    def __init__(self, chunk_size=1000, chunk_overlap=0, **kwargs):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self._fallback = OffsetRecursiveCharacterTextSplitter(
+            separators=["\n\n", "\n", " ", ""],
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=self._length_function,
+            strip_whitespace=False,
+        )
+
+    def split_chunks(self, source):
+        """Split ``source`` into ``CodeChunk`` objects."""
+        return [chunk for group in self._groups(source) for chunk in group[2]]
+
+    def split_text(self, text):
+        """Split ``text`` and return the chunk strings (LangChain-compatible)."""
+        return [chunk.text for chunk in self.split_chunks(text)]
+
+    def create_documents(self, texts, metadatas=None):
+        """Create ``Document`` chunks carrying line ranges and symbol names."""
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for chunk in self.split_chunks(text):
+                documents.append(chunk_to_document(chunk, metadata))
+        return documents
+
+    # ------------------------------------------------------------------
+    # Grouping
+    # ------------------------------------------------------------------
+
+    def _groups(self, source):
+        """Split a whole file into ``(start_line, end_line, chunks)`` groups."""
+        lines = split_lines(source)
+        offsets = line_offsets(lines)
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            return [(1, len(lines), self._split_fallback(source, offsets, 1, len(lines), []))]
+        return self._region_groups(source, offsets, tree.body, 1, len(lines))
+
+    def _region_groups(self, source, offsets, body, first_line, last_line):
+        """Group the top-level ``body`` statements covering lines ``first_line..last_line``."""
+        if last_line < first_line:
+            return []
+        segments = self._segments(body, first_line, last_line, "")
+        if not segments:
+            segments = [(first_line, last_line, None, [])]
+        groups = []
+        for segment_group in self._merge(source, offsets, segments):
+            start, end = segment_group[0][0], segment_group[-1][1]
+            if len(segment_group) == 1 and self._span_length(source, offsets, start, end) > self._chunk_size:
+                chunks = self._split_oversized(source, offsets, segment_group[0], "")
+            else:
+                chunks = self._make_chunks(source, offsets, segment_group)
+            groups.append((start, end, chunks))
+        return groups
+
+    def _segments(self, body, first_line, last_line, prefix):
+        """Assign every line in ``first_line..last_line`` to one body statement.
+
+        Each segment runs from the line after the previous statement to the
+        end of its own statement, so leading comments and decorators travel
+        with the code they annotate; trailing lines join the last segment.
+        """
+        segments = []
+        start = first_line
+        for node in body:
+            if segments and node.end_lineno <= segments[-1][1]:
+                # Statements sharing a line (``a = 1; b = 2``) stay together.
+                _, end, prev_node, names = segments[-1]
+                segments[-1] = (segments[-1][0], end, prev_node, names + _symbols(node, prefix))
+                continue
+            segments.append((start, node.end_lineno, node, _symbols(node, prefix)))
+            start = node.end_lineno + 1
+        if segments and segments[-1][1] < last_line:
+            seg_start, _, node, names = segments[-1]
+            segments[-1] = (seg_start, last_line, node, names)
+        return segments
+
+    def _merge(self, source, offsets, segments):
+        """Greedily merge neighbouring segments while they fit in ``chunk_size``."""
+        groups = []
+        current = []
+        for segment in segments:
+            if current:
+                length = self._span_length(source, offsets, current[0][0], segment[1])
+                if length > self._chunk_size:
+                    groups.append(current)
+                    current = []
+            current.append(segment)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _split_oversized(self, source, offsets, segment, prefix, owner=None):
+        """Split one statement that is larger than ``chunk_size``.
+
+        Chunks that define no symbol of their own (e.g. part of a method body)
+        are labelled with ``owner``, the qualified name of the enclosing def.
+        """
+        start, end, node, names = segment
+        body = getattr(node, "body", None) if isinstance(node, _DEFS) else None
+        if body and own_start(body[0]) > node.lineno:
+            qualname = prefix + node.name
+            body_start = own_start(body[0])
+            children = self._segments(body, body_start, end, qualname + ".")
+            header = (start, body_start - 1, None, [qualname])
+            chunks = []
+            for group in self._merge(source, offsets, [header] + children):
+                g_start, g_end = group[0][0], group[-1][1]
+                if len(group) == 1 and self._span_length(source, offsets, g_start, g_end) > self._chunk_size:
+                    chunks.extend(
+                        self._split_oversized(source, offsets, group[0], qualname + ".", qualname)
+                    )
+                else:
+                    chunks.extend(self._make_chunks(source, offsets, group, qualname))
+            return chunks
+        return self._split_fallback(source, offsets, start, end, names or ([owner] if owner else []))
+
+    def _split_fallback(self, source, offsets, start_line, end_line, names):
+        base = offsets[start_line - 1]
+        text = source[base:offsets[end_line]]
+        chunks = []
+        for span in self._fallback.split_spans(text):
+            chunk_text = span.text
+            if not chunk_text.strip():
+                continue
+            first = bisect.bisect_right(offsets, base + span.start)
+            last = bisect.bisect_right(offsets, base + span.end - 1)
+            chunks.append(CodeChunk(chunk_text, base + span.start, first, last, list(names)))
+        return chunks
+
+    def _make_chunks(self, source, offsets, segments, owner=None):
+        start, end = segments[0][0], segments[-1][1]
+        text = source[offsets[start - 1]:offsets[end]]
+        if not text.strip():
+            return []
+        names = [name for segment in segments for name in segment[3]]
+        if not names and owner:
+            names = [owner]
+        return [CodeChunk(text, offsets[start - 1], start, end, names)]
+
+    def _span_length(self, source, offsets, start_line, end_line):
+        if self._length_function is len:
+            return offsets[end_line] - offsets[start_line - 1]
+        return self._length_function(source[offsets[start_line - 1]:offsets[end_line]])
+
+
+def chunk_to_document(chunk, metadata=None):
+    """Convert a ``CodeChunk`` into a ``Document`` with flat, store-friendly metadata."""
+    chunk_metadata = copy.deepcopy(metadata or {})
+    chunk_metadata.update(
+        {
+            "start_index": chunk.start_index,
+            "start_line": chunk.start_line,
+            "end_line": chunk.end_line,
+            "symbols": ",".join(chunk.symbols),
+            "chunk_id": chunk.id,
+        }
+    )
+    return Document(page_content=chunk.text, metadata=chunk_metadata)
+
+
+class IncrementalCodeSplitter:
+    """Re-split one Python file, touching only the top-level statements that changed.
+
+    After each ``update`` the unchanged prefix and suffix of the file are
+    matched line-for-line against the previous version.  Groups of top-level
+    statements that lie entirely inside them are reused (shifted to their new
+    position); only the region in between is re-parsed and re-split.
+
+    ``stats`` reports how many groups were reused and re-split, and
+    ``new_chunk_ids`` lists the chunks that did not exist before, i.e. the
+    only ones that need re-embedding.
+    """
+
+    def __init__(self, splitter=None):
+        self.splitter = splitter or PythonCodeSplitter()
+        self._lines = []
+        self._groups = []
+        self.stats = {"reused_groups": 0, "resplit_groups": 0}
+        self.new_chunk_ids = []
+
+    @property
+    def chunks(self):
+        """Chunks for the most recent version of the file."""
+        return [chunk for group in self._groups for chunk in group[2]]
+
+    def update(self, source):
+        """Split the new version of the file and return all of its chunks."""
+        old_ids = {chunk.id for chunk in self.chunks}
+        lines = split_lines(source)
+        groups = self._incremental_groups(source, lines)
+        if groups is None:
+            groups = self.splitter._groups(source)
+            self.stats = {"reused_groups": 0, "resplit_groups": len(groups)}
+        self._lines = lines
+        self._groups = groups
+        self.new_chunk_ids = [chunk.id for chunk in self.chunks if chunk.id not in old_ids]
+        return self.chunks
+
+    def _incremental_groups(self, source, lines):
+        old_lines, old_groups = self._lines, self._groups
+        if not old_groups:
+            return None
+
+        limit = min(len(old_lines), len(lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix
+            and old_lines[len(old_lines) - 1 - suffix] == lines[len(lines) - 1 - suffix]
+        ):
+            suffix += 1
+
+        line_delta = len(lines) - len(old_lines)
+        old_offsets = line_offsets(old_lines)
+        offsets = line_offsets(lines)
+        char_delta = offsets[-1] - old_offsets[-1]
+        changed_last = len(old_lines) - suffix
+
+        head = [g for g in old_groups if g[1] <= prefix]
+        tail = [g for g in old_groups if g[0] > changed_last and g[1] > prefix]
+        region_first = head[-1][1] + 1 if head else 1
+        region_last = (tail[0][0] - 1 if tail else len(old_lines)) + line_delta
+        region_text = source[offsets[region_first - 1]:offsets[region_last]] if region_last >= region_first else ""
+        try:
+            tree = ast.parse(region_text)
+        except SyntaxError:
+            return None
+        ast.increment_lineno(tree, region_first - 1)
+        middle = self.splitter._region_groups(source, offsets, tree.body, region_first, region_last)
+
+        shifted_tail = [
+            (start + line_delta, end + line_delta, [c.shifted(line_delta, char_delta) for c in chunks])
+            for start, end, chunks in tail
+        ]
+        self.stats = {"reused_groups": len(head) + len(tail), "resplit_groups": len(middle)}
+        return head + middle + shifted_tail
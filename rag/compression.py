@@ -0,0 +1,230 @@
+"""Extractive prompt compression: keep the sentences that answer the question.
+
+Even well-chosen chunks are mostly sentences the question does not need, and
+``retrieval_chain_example.py`` pays for every one of them as LLM input
+tokens.  ``ExtractiveCompressor`` splits the retrieved context into
+sentences, scores each against the question and keeps the best ones until
+``ratio`` of the original tokens is used, in their original order.  No LLM
+call is made:
+
+- with ``embeddings`` (ideally ``rag.embedding_cache.CachedEmbeddings``, so
+  recurring sentences are embedded once) a sentence scores its cosine
+  similarity to the question;
+- without, it scores BM25 over the context's own sentences using
+  ``rag.tokenizer.Tokenizer`` terms (stemmed, stopwords dropped);
+- ``lexical_weight`` between 0 and 1 mixes the two (min-max normalised).
+
+Tokens are counted with tiktoken, as in ``rag.context_packing``.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from rag.token_splitter import load_encoding
+from rag.tokenizer import Tokenizer
+
+# Sentence ends, or line breaks (bullets, headings and list items stand alone).
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n+")
+
+
+def _split_units(text):
+    """``[(sentence, ends_line)]``: sentences plus whether a line break follows."""
+    units, start = [], 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        units.append((text[start:match.start()].strip(), "\n" in match.group()))
+        start = match.end()
+    units.append((text[start:].strip(), False))
+    return [(sentence, ends_line) for sentence, ends_line in units if sentence]
+
+
+def split_sentences(text):
+    """Split ``text`` into sentences and standalone lines (whitespace dropped)."""
+    return [sentence for sentence, _ in _split_units(text)]
+
+
+def _join(units, indices):
+    """Kept sentences, separated by a newline where the original broke the line."""
+    pieces = []
+    for position, i in enumerate(indices):
+        pieces.append(units[i][0])
+        if position + 1 < len(indices):
+            pieces.append("\n" if any(units[j][1] for j in range(i, indices[position + 1])) else " ")
+    return "".join(pieces)
+
+
+@dataclass
+class CompressedText:
+    """Result of ``ExtractiveCompressor.compress``."""
+
+    text: str
+    tokens: int
+    original_tokens: int
+    kept: int
+    total: int
+
+    @property
+    def ratio(self):
+        return self.tokens / self.original_tokens if self.original_tokens else 1.0
+
+
+def _min_max(scores):
+    low, high = scores.min(), scores.max()
+    return (scores - low) / (high - low) if high > low else np.ones_like(scores)
+
+
+class ExtractiveCompressor:
+    """Drop low-value sentences from retrieved context down to a token ratio.
+
+    Args:
+        ratio: Target fraction of the context's tokens to keep.
+        embeddings: Optional ``Embeddings`` for semantic scoring.
+        lexical_weight: Weight of the BM25 score when ``embeddings`` is set
+            (``0.0`` = embeddings only).
+        tokenizer: Term extractor for lexical scoring (``Tokenizer()``).
+        min_sentences: Always keep at least this many sentences (the best ones).
+        encoding_name / model_name / encoding: tiktoken encoding for counts.
+    """
+
+    def __init__(self, ratio=0.5, embeddings=None, lexical_weight=0.3, tokenizer=None, min_sentences=1,
+                 encoding_name="cl100k_base", model_name=None, encoding=None):
+        if not 0 < ratio <= 1:
+            raise ValueError("ratio must be in (0, 1]")
+        self.ratio = ratio
+        self.embeddings = embeddings
+        self.lexical_weight = lexical_weight if embeddings is not None else 1.0
+        self.tokenizer = tokenizer or Tokenizer()
+        self.min_sentences = min_sentences
+        self.encoding = encoding or load_encoding(encoding_name, model_name)
+        self.count_tokens = lru_cache(maxsize=65536)(self._count_tokens)
+        self.original_tokens = 0
+        self.kept_tokens = 0
+
+    def _count_tokens(self, text):
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def lexical_scores(self, question, sentences, k1=1.2, b=0.75):
+        """BM25 of ``question`` against each sentence, with IDF over ``sentences``."""
+        query_terms = set(self.tokenizer(question))
+        terms = [self.tokenizer(sentence) for sentence in sentences]
+        if not query_terms:
+            return np.zeros(len(sentences))
+        df = Counter(term for sentence_terms in terms for term in set(sentence_terms) & query_terms)
+        avg_len = sum(map(len, terms)) / len(terms) or 1.0
+        count = len(sentences)
+        idf = {term: math.log(1 + (count - n + 0.5) / (n + 0.5)) for term, n in df.items()}
+        scores = np.zeros(count)
+        for i, sentence_terms in enumerate(terms):
+            tf = Counter(t for t in sentence_terms if t in idf)
+            norm = k1 * (1 - b + b * len(sentence_terms) / avg_len)
+            scores[i] = sum(idf[t] * f * (k1 + 1) / (f + norm) for t, f in tf.items())
+        return scores
+
+    def semantic_scores(self, question, sentences):
+        """Cosine similarity of each sentence to ``question``."""
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        if hasattr(self.embeddings, "embed_documents_array"):
+            vectors = self.embeddings.embed_documents_array(sentences)
+        else:
+            vectors = np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        norms[norms == 0] = 1.0
+        return vectors @ query / norms
+
+    def scores(self, question, sentences):
+        """Combined relevance score per sentence (higher = keep)."""
+        lexical = self.lexical_scores(question, sentences)
+        if self.embeddings is None or self.lexical_weight >= 1.0:
+            return lexical
+        semantic = self.semantic_scores(question, sentences)
+        if self.lexical_weight <= 0.0:
+            return semantic
+        return self.lexical_weight * _min_max(lexical) + (1 - self.lexical_weight) * _min_max(semantic)
+
+    # ------------------------------------------------------------------
+    # Compression
+    # ------------------------------------------------------------------
+
+    def _select(self, question, contexts):
+        """Per context, the indices of its sentences to keep."""
+        split = [_split_units(text) for text in contexts]
+        sentences = [sentence for units in split for sentence, _ in units]
+        if not sentences:
+            return split, [[] for _ in split]
+        costs = np.fromiter((self.count_tokens(s) for s in sentences), dtype=np.int64, count=len(sentences))
+        budget = self.ratio * costs.sum()
+        keep = np.zeros(len(sentences), dtype=bool)
+        order = np.argsort(-self.scores(question, sentences), kind="stable")
+        # The best min_sentences are always kept, then fill the budget by score.
+        keep[order[:self.min_sentences]] = True
+        used = costs[keep].sum()
+        for i in order:
+            if not keep[i] and used + costs[i] <= budget:
+                keep[i] = True
+                used += costs[i]
+        starts = np.cumsum([0] + [len(parts) for parts in split])
+        kept = [np.flatnonzero(keep[starts[c]:starts[c + 1]]).tolist() for c in range(len(split))]
+        return split, kept
+
+    def compress(self, question, text):
+        """Compress one context string."""
+        return self.compress_texts(question, [text])[0]
+
+    def compress_texts(self, question, contexts):
+        """Compress several contexts against one shared token budget."""
+        contexts = list(contexts)
+        split, kept = self._select(question, contexts)
+        results = []
+        for context, parts, indices in zip(contexts, split, kept):
+            text = _join(parts, indices)
+            original = self.count_tokens(context)
+            result = CompressedText(text, self.count_tokens(text), original, len(indices), len(parts))
+            self.original_tokens += result.original_tokens
+            self.kept_tokens += result.tokens
+            results.append(result)
+        return results
+
+    def compress_documents(self, documents, query):
+        """Compressed copies of ``documents`` (``BaseDocumentCompressor`` argument order)."""
+        documents = list(documents)
+        results = self.compress_texts(query, [doc.page_content for doc in documents])
+        return [
+            Document(
+                page_content=result.text,
+                metadata={**doc.metadata, "compression_ratio": round(result.ratio, 3)},
+                id=doc.id,
+            )
+            for doc, result in zip(documents, results)
+            if result.text
+        ]
+
+    def stats(self):
+        """Token totals and the achieved ratio so far."""
+        return {
+            "original_tokens": self.original_tokens,
+            "kept_tokens": self.kept_tokens,
+            "ratio": self.kept_tokens / self.original_tokens if self.original_tokens else 1.0,
+        }
+
+    def as_runnable(self, context_key="context", question_key="question"):
+        """Runnable compressing ``input[context_key]`` (documents or a string) in place."""
+
+        def compress(inputs):
+            context = inputs[context_key]
+            if isinstance(context, str):
+                compressed = self.compress(inputs[question_key], context).text
+            else:
+                compressed = self.compress_documents(context, inputs[question_key])
+            return {**inputs, context_key: compressed}
+
+        return RunnableLambda(compress, name="ExtractiveCompressor")
@@ -0,0 +1,150 @@
+"""Token-budgeted context packing for retrieval chains.
+
+The module 11 and 14 chains pipe the retriever straight into ``{context}``,
+so the prompt receives ``str(list_of_documents)``: every
+``Document(id=..., metadata={...}, page_content='...')`` wrapper, escaped
+newlines and all, for however many chunks came back, including chunks that
+say the same thing twice.
+
+``ContextBuilder`` sits between the retriever and the prompt:
+
+1. orders the candidates by maximal marginal relevance
+   (``rag.vectorstore.mmr_indices``: one similarity matrix, no Python inner
+   loop), so near-duplicate chunks drop down the list;
+2. packs them greedily into ``token_budget`` tokens, counted with tiktoken
+   (a chunk that does not fit is skipped in favour of smaller ones);
+3. formats each chunk as a compact ``[n] source p.page`` header plus its
+   text.
+
+Over-fetch from the retriever (``search_kwargs={"k": 10}``) and let the
+budget decide how much reaches the LLM.  ``stats()`` reports prompt tokens
+saved per query against stuffing the raw document list.
+"""
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+from rag.token_splitter import load_encoding
+from rag.vectorstore import mmr_indices
+
+
+@dataclass
+class PackedContext:
+    """Result of ``ContextBuilder.pack``."""
+
+    text: str
+    documents: list = field(default_factory=list)
+    tokens: int = 0
+    raw_tokens: int = 0
+
+    @property
+    def tokens_saved(self):
+        """Tokens saved against stuffing ``str(documents)`` into the prompt."""
+        return self.raw_tokens - self.tokens
+
+
+def format_chunk(index, doc):
+    """``[index] source p.page`` header line followed by the chunk text."""
+    header = f"[{index}]"
+    source = doc.metadata.get("source")
+    if source:
+        header += f" {os.path.basename(str(source))}"
+    page = doc.metadata.get("page")
+    if page is not None:
+        header += f" p.{page}"
+    return f"{header}\n{doc.page_content.strip()}"
+
+
+class ContextBuilder:
+    """Select, budget and format retrieved chunks for the ``{context}`` slot.
+
+    Args:
+        embeddings: ``Embeddings`` for the question and candidate chunks
+            (wrap in ``rag.embedding_cache.CachedEmbeddings`` so chunks seen
+            before are not re-embedded).
+        token_budget: Maximum tokens of formatted context.
+        lambda_mult: MMR trade-off, 1.0 = pure relevance, 0.0 = pure diversity.
+        encoding_name: tiktoken encoding used to count tokens.
+        model_name: Resolve the encoding from a model name instead.
+        encoding: Already-loaded encoding (anything with ``encode``).
+        separator: Text placed between chunks.
+        formatter: ``formatter(index, doc) -> str`` for one chunk.
+    """
+
+    def __init__(self, embeddings, token_budget=1000, lambda_mult=0.5, encoding_name="cl100k_base",
+                 model_name=None, encoding=None, separator="\n\n", formatter=format_chunk):
+        self.embeddings = embeddings
+        self.token_budget = token_budget
+        self.lambda_mult = lambda_mult
+        self.encoding = encoding or load_encoding(encoding_name, model_name)
+        self.separator = separator
+        self.formatter = formatter
+        self.count_tokens = lru_cache(maxsize=65536)(self._count_tokens)
+        self._separator_tokens = self.count_tokens(separator)
+        self.queries = 0
+        self.tokens_used = 0
+        self.tokens_saved = 0
+
+    def _count_tokens(self, text):
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _embed_candidates(self, documents):
+        texts = [doc.page_content for doc in documents]
+        if hasattr(self.embeddings, "embed_documents_array"):
+            return self.embeddings.embed_documents_array(texts)
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def pack(self, question, documents):
+        """Choose and format chunks from ``documents`` within the token budget."""
+        documents = list(documents)
+        raw_tokens = self.count_tokens(str(documents))
+        if not documents:
+            return PackedContext("", [], 0, raw_tokens)
+        if len(documents) > 1:
+            query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+            order = mmr_indices(query, self._embed_candidates(documents), k=len(documents),
+                                lambda_mult=self.lambda_mult)
+        else:
+            order = [0]
+
+        blocks, chosen, used = [], [], 0
+        for i in order:
+            block = self.formatter(len(chosen) + 1, documents[i])
+            cost = self.count_tokens(block) + (self._separator_tokens if blocks else 0)
+            if used + cost > self.token_budget:
+                continue
+            blocks.append(block)
+            chosen.append(documents[i])
+            used += cost
+        packed = PackedContext(self.separator.join(blocks), chosen, used, raw_tokens)
+        self.queries += 1
+        self.tokens_used += packed.tokens
+        self.tokens_saved += packed.tokens_saved
+        return packed
+
+    def stats(self):
+        """Average prompt tokens used and saved per query so far."""
+        queries = self.queries or 1
+        return {
+            "queries": self.queries,
+            "tokens_per_query": self.tokens_used / queries,
+            "tokens_saved_per_query": self.tokens_saved / queries,
+        }
+
+    def as_runnable(self, context_key="context", question_key="question"):
+        """Runnable that replaces ``input[context_key]`` (documents) with packed text.
+
+        Use between the retrieval step and the prompt::
+
+            {"context": retriever, "question": RunnablePassthrough()} | builder.as_runnable() | prompt | llm
+        """
+
+        def build(inputs):
+            packed = self.pack(inputs[question_key], inputs[context_key])
+            return {**inputs, context_key: packed.text}
+
+        return RunnableLambda(build, name="ContextBuilder")
@@ -0,0 +1,257 @@
+"""Near-duplicate chunk elimination with MinHash signatures and banded LSH.
+
+Overlapping chunks (``chunk_overlap`` up to 100 in modules 09 and 12) and
+repeated boilerplate (headers, licence blocks, navigation text) end up in the
+vector store many times over, and every copy costs an embedding call.
+``NearDuplicateFilter`` sits between the splitter and the vector store and
+drops chunks whose estimated Jaccard similarity to an earlier chunk is above
+a threshold.
+
+Candidate pairs come from locality-sensitive hashing over bands of the
+MinHash signature, so only chunks that collide in some band are compared and
+the work stays close to linear in the number of chunks.
+"""
+
+import copy
+import math
+import re
+import zlib
+
+import numpy as np
+from langchain_core.documents import BaseDocumentTransformer
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+def lsh_params(num_perm, threshold):
+    """Pick ``(bands, rows)`` whose S-curve midpoint is closest to ``threshold``.
+
+    Two chunks with Jaccard ``s`` share at least one band with probability
+    ``1 - (1 - s**rows) ** bands``; the curve is steepest near
+    ``(1 / bands) ** (1 / rows)``.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1.0 / bands) ** (1.0 / rows)
+        # Prefer landing slightly below the threshold: a missed duplicate is
+        # never checked, a false candidate only costs one comparison.
+        score = abs(midpoint - threshold) + (0.05 if midpoint > threshold else 0.0)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """Compute MinHash signatures over character shingles of normalised text."""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, text):
+        """Hashes of the distinct character shingles of ``text``."""
+        text = _WHITESPACE.sub(" ", text.lower()).strip()
+        k = self.shingle_size
+        if len(text) <= k:
+            grams = {text}
+        else:
+            grams = {text[i:i + k] for i in range(len(text) - k + 1)}
+        return np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) & _MERSENNE_PRIME for g in grams),
+            dtype=np.uint64,
+            count=len(grams),
+        )
+
+    def signature(self, text):
+        """MinHash signature of ``text`` as a ``uint32`` vector of ``num_perm`` values."""
+        hashes = self.shingles(text)
+        permuted = (self._a * hashes[None, :] + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def signatures(self, texts):
+        """Stack signatures for ``texts`` into an ``(n, num_perm)`` matrix."""
+        if not texts:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        return np.stack([self.signature(text) for text in texts])
+
+
+class DedupReport:
+    """What a deduplication pass removed and what that saves downstream."""
+
+    def __init__(self, total, kept, candidate_pairs, duplicate_pairs, dropped_chars,
+                 embedding_dim=1536, embedding_batch_size=1000, bytes_per_value=4):
+        self.total = total
+        self.kept = kept
+        self.dropped = total - kept
+        self.candidate_pairs = candidate_pairs
+        self.duplicate_pairs = duplicate_pairs
+        self.dropped_chars = dropped_chars
+        self.embedding_texts_saved = self.dropped
+        self.embedding_calls_saved = (
+            math.ceil(total / embedding_batch_size) - math.ceil(kept / embedding_batch_size)
+        )
+        self.index_bytes_saved = self.dropped * embedding_dim * bytes_per_value
+
+    @property
+    def all_pairs(self):
+        """Pairs a brute-force comparison would have checked."""
+        return self.total * (self.total - 1) // 2
+
+    def summary(self):
+        """One-line human-readable summary."""
+        return (
+            f"kept {self.kept}/{self.total} chunks, dropped {self.dropped} near-duplicates; "
+            f"saved {self.embedding_texts_saved} embedded texts "
+            f"({self.embedding_calls_saved} batched calls) and "
+            f"{self.index_bytes_saved / 1024:.1f} KiB of vectors; "
+            f"compared {self.candidate_pairs} of {self.all_pairs} pairs"
+        )
+
+    def __repr__(self):
+        return f"DedupReport({self.summary()})"
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # Keep the earliest chunk as the cluster representative.
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def near_duplicate_clusters(signatures, threshold, bands, rows):
+    """Cluster rows of ``signatures`` whose estimated Jaccard is >= ``threshold``.
+
+    Returns ``(representative, candidate_pairs, duplicate_pairs)`` where
+    ``representative[i]`` is the index of the earliest chunk in ``i``'s cluster.
+    """
+    count = len(signatures)
+    union_find = _UnionFind(count)
+    seen = set()
+    duplicate_pairs = 0
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        buckets = {}
+        for i in range(count):
+            buckets.setdefault(block[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # Identical signatures are duplicates outright; keep one of each for the comparisons.
+            distinct = {}
+            for i in members:
+                first = distinct.setdefault(signatures[i].tobytes(), i)
+                if first != i and (first, i) not in seen:
+                    seen.add((first, i))
+                    duplicate_pairs += 1
+                    union_find.union(first, i)
+            # Check every pair, not just pairs with the first member: it may be a false
+            # candidate while others in the bucket are true duplicates of each other.
+            distinct = list(distinct.values())
+            for position, first in enumerate(distinct[:-1]):
+                others = [
+                    other for other in distinct[position + 1:]
+                    if (first, other) not in seen and union_find.find(first) != union_find.find(other)
+                ]
+                if not others:
+                    continue
+                seen.update((first, other) for other in others)
+                similarity = np.count_nonzero(signatures[others] == signatures[first], axis=1) / signatures.shape[1]
+                for other in np.asarray(others)[similarity >= threshold]:
+                    duplicate_pairs += 1
+                    union_find.union(first, int(other))
+    representative = [union_find.find(i) for i in range(count)]
+    return representative, len(seen), duplicate_pairs
+
+
+class NearDuplicateFilter(BaseDocumentTransformer):
+    """Drop or merge near-duplicate ``Document`` chunks before embedding.
+
+    Args:
+        threshold: Estimated Jaccard similarity at or above which two chunks
+            count as duplicates.
+        num_perm: MinHash signature length; more permutations give tighter
+            similarity estimates.
+        shingle_size: Character n-gram size used for shingling.
+        mode: ``"drop"`` keeps the first chunk of each cluster unchanged;
+            ``"merge"`` also records ``duplicate_count`` and the distinct
+            ``duplicate_sources`` of the dropped chunks on the kept one.
+        embedding_dim: Vector width used to estimate index size saved.
+        embedding_batch_size: Texts per embedding request, used to estimate
+            the number of API calls saved.
+
+    ``last_report`` holds the ``DedupReport`` of the most recent call.
+    """
+
+    def __init__(self, threshold=0.85, num_perm=128, shingle_size=5, mode="drop",
+                 embedding_dim=1536, embedding_batch_size=1000):
+        if mode not in ("drop", "merge"):
+            raise ValueError(f"mode must be 'drop' or 'merge', got {mode!r}")
+        self.threshold = threshold
+        self.mode = mode
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        self.embedding_dim = embedding_dim
+        self.embedding_batch_size = embedding_batch_size
+        self.last_report = None
+
+    def transform_documents(self, documents, **kwargs):
+        """Return ``documents`` with near-duplicates removed (order preserved)."""
+        documents = list(documents)
+        signatures = self.hasher.signatures([doc.page_content for doc in documents])
+        representative, candidates, duplicates = near_duplicate_clusters(
+            signatures, self.threshold, self.bands, self.rows
+        )
+
+        kept = {}
+        dropped_chars = 0
+        for i, doc in enumerate(documents):
+            rep = representative[i]
+            if rep == i:
+                kept[i] = copy.copy(doc) if self.mode == "merge" else doc
+                continue
+            dropped_chars += len(doc.page_content)
+            if self.mode == "merge":
+                keeper = kept[rep]
+                keeper.metadata = dict(keeper.metadata)
+                keeper.metadata["duplicate_count"] = keeper.metadata.get("duplicate_count", 0) + 1
+                source = doc.metadata.get("source")
+                sources = [s for s in keeper.metadata.get("duplicate_sources", "").split(",") if s]
+                if source is not None and str(source) not in sources:
+                    sources.append(str(source))
+                    keeper.metadata["duplicate_sources"] = ",".join(sources)
+
+        self.last_report = DedupReport(
+            total=len(documents),
+            kept=len(kept),
+            candidate_pairs=candidates,
+            duplicate_pairs=duplicates,
+            dropped_chars=dropped_chars,
+            embedding_dim=self.embedding_dim,
+            embedding_batch_size=self.embedding_batch_size,
+        )
+        return list(kept.values())
+
+    def filter_texts(self, texts):
+        """Return the indices of ``texts`` that survive deduplication."""
+        signatures = self.hasher.signatures(list(texts))
+        representative, _, _ = near_duplicate_clusters(
+            signatures, self.threshold, self.bands, self.rows
+        )
+        return [i for i, rep in enumerate(representative) if rep == i]
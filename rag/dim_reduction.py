@@ -0,0 +1,166 @@
+"""Smaller embeddings: Matryoshka truncation, OpenAI ``dimensions`` and PCA.
+
+Modules 10-14 always store full-width vectors (1536 for
+``text-embedding-3-small``, 384 for ``all-MiniLM-L6-v2``).  Memory and
+similarity cost are both linear in the width, so halving it halves both.
+Which tool fits depends on the model:
+
+- ``openai_embeddings(dimensions=256)``: OpenAI's ``text-embedding-3-*``
+  models are Matryoshka-trained and shorten server-side;
+- ``TruncatedEmbeddings(base, 256)``: the same truncation done locally, for
+  Matryoshka models without a ``dimensions`` option or for vectors that were
+  already computed at full width;
+- ``ProjectedEmbeddings`` with a ``PCAProjection`` fitted on the corpus: for
+  models like MiniLM whose leading dimensions are not special.  Call
+  ``save(directory)`` to write the projection next to the index, and
+  ``load`` it there, so queries are projected the same way.
+
+All three are LangChain ``Embeddings``, so they drop into any vector store.
+"""
+
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag.vectorstore import normalize_rows
+
+PROJECTION_FILE = "projection.npz"
+_BLOCK_ROWS = 8192
+
+
+def openai_embeddings(dimensions, model="text-embedding-3-small", **kwargs):
+    """``OpenAIEmbeddings`` that return ``dimensions``-wide vectors from the API."""
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model, dimensions=dimensions, **kwargs)
+
+
+class TruncatedEmbeddings(Embeddings):
+    """Keep the first ``dimensions`` values of each vector (Matryoshka truncation).
+
+    Only meaningful for models trained so that prefixes are usable
+    embeddings; vectors are re-normalised after truncation.
+    """
+
+    def __init__(self, embeddings, dimensions, normalize=True):
+        self.embeddings = embeddings
+        self.dimensions = dimensions
+        self.normalize = normalize
+
+    def reduce(self, vectors):
+        """Truncate a ``(n, dim)`` array of full-width vectors."""
+        reduced = np.asarray(vectors, dtype=np.float32)[:, :self.dimensions]
+        return normalize_rows(reduced) if self.normalize else reduced
+
+    def embed_documents(self, texts):
+        return self.reduce(self.embeddings.embed_documents(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.reduce([self.embeddings.embed_query(text)])[0].tolist()
+
+
+class PCAProjection:
+    """Principal-component projection fitted on a sample of corpus vectors."""
+
+    def __init__(self, mean=None, components=None, explained_variance_ratio=None):
+        self.mean = mean
+        self.components = components
+        self.explained_variance_ratio = explained_variance_ratio
+
+    @property
+    def dimensions(self):
+        return None if self.components is None else self.components.shape[0]
+
+    def fit(self, vectors, dimensions, sample_size=50000, seed=0):
+        """Fit the top ``dimensions`` components on (a sample of) ``vectors``.
+
+        Uses the ``dim x dim`` covariance matrix, accumulated in blocks, so
+        memory does not grow with the sample size.
+        """
+        vectors = np.asarray(vectors)
+        if dimensions > vectors.shape[1]:
+            raise ValueError(f"Cannot reduce {vectors.shape[1]} dimensions to {dimensions}")
+        if len(vectors) > sample_size:
+            rows = np.sort(np.random.default_rng(seed).choice(len(vectors), size=sample_size, replace=False))
+            vectors = vectors[rows]
+        dim = vectors.shape[1]
+        mean = np.zeros(dim, dtype=np.float64)
+        for start in range(0, len(vectors), _BLOCK_ROWS):
+            mean += np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float64).sum(axis=0)
+        mean /= len(vectors)
+        covariance = np.zeros((dim, dim), dtype=np.float64)
+        for start in range(0, len(vectors), _BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float64) - mean
+            covariance += block.T @ block
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:dimensions]
+        self.mean = mean.astype(np.float32)
+        self.components = eigenvectors[:, order].T.astype(np.float32)
+        total = eigenvalues.clip(min=0).sum()
+        self.explained_variance_ratio = (eigenvalues[order].clip(min=0) / total).astype(np.float32) if total else None
+        return self
+
+    def transform(self, vectors):
+        """Project a ``(n, dim)`` array to ``(n, dimensions)``."""
+        if self.components is None:
+            raise ValueError("Projection is not fitted; call fit() first")
+        return (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+
+    def save(self, path):
+        """Write the projection to ``path`` (an ``.npz`` file)."""
+        arrays = {"mean": self.mean, "components": self.components}
+        if self.explained_variance_ratio is not None:
+            arrays["explained_variance_ratio"] = self.explained_variance_ratio
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a projection written by ``save``."""
+        with np.load(path) as data:
+            return cls(
+                mean=data["mean"],
+                components=data["components"],
+                explained_variance_ratio=data["explained_variance_ratio"] if "explained_variance_ratio" in data else None,
+            )
+
+
+class ProjectedEmbeddings(Embeddings):
+    """Wrap ``embeddings`` so every vector goes through a fitted ``PCAProjection``."""
+
+    def __init__(self, embeddings, projection, normalize=True):
+        self.embeddings = embeddings
+        self.projection = projection
+        self.normalize = normalize
+
+    @classmethod
+    def fit(cls, embeddings, texts, dimensions, **kwargs):
+        """Embed ``texts`` once, fit a projection on them and return ``(wrapper, reduced_vectors)``.
+
+        Pass the reduced vectors to ``NumpyVectorStore.add_embeddings`` to
+        avoid embedding the corpus a second time.
+        """
+        full = np.asarray(embeddings.embed_documents(list(texts)), dtype=np.float32)
+        wrapper = cls(embeddings, PCAProjection().fit(full, dimensions, **kwargs))
+        return wrapper, wrapper.reduce(full)
+
+    def reduce(self, vectors):
+        """Project a ``(n, dim)`` array of full-width vectors."""
+        reduced = self.projection.transform(vectors)
+        return normalize_rows(reduced) if self.normalize else reduced
+
+    def embed_documents(self, texts):
+        return self.reduce(self.embeddings.embed_documents(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.reduce([self.embeddings.embed_query(text)])[0].tolist()
+
+    def save(self, directory):
+        """Save the projection as ``projection.npz`` in ``directory`` (e.g. the store's)."""
+        self.projection.save(os.path.join(directory, PROJECTION_FILE))
+
+    @classmethod
+    def load(cls, embeddings, directory, normalize=True):
+        """Re-create the wrapper from a projection saved in ``directory``."""
+        return cls(embeddings, PCAProjection.load(os.path.join(directory, PROJECTION_FILE)), normalize)
@@ -0,0 +1,96 @@
+"""Content-addressed embedding cache with batched, de-duplicated misses."""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def text_key(namespace, text):
+    """Cache key for ``text`` under ``namespace``."""
+    return hashlib.sha1(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an ``Embeddings`` model so every distinct text is embedded once.
+
+    Vectors are keyed by a hash of ``namespace`` + text, so caches for
+    different models can share a directory without colliding.  Misses are
+    de-duplicated and sent to the wrapped model in ``batch_size`` batches.
+    ``embed_documents_array`` returns a float32 matrix for callers that do
+    their maths in NumPy; ``embed_documents`` keeps the LangChain interface.
+    """
+
+    def __init__(self, embeddings, namespace="", batch_size=256):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self._vectors = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._vectors)
+
+    @property
+    def hit_rate(self):
+        """Fraction of looked-up texts served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def embed_documents_array(self, texts):
+        """Embed ``texts`` and return an ``(len(texts), dim)`` float32 matrix."""
+        keys = [text_key(self.namespace, text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._vectors and key not in missing:
+                missing[key] = text
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        pending = list(missing.items())
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            vectors = self.embeddings.embed_documents([text for _, text in batch])
+            for (key, _), vector in zip(batch, vectors):
+                self._vectors[key] = np.asarray(vector, dtype=np.float32)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([self._vectors[key] for key in keys])
+
+    def embed_documents(self, texts):
+        """Embed ``texts`` through the cache (LangChain ``Embeddings`` API)."""
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text):
+        """Embed a query through the cache."""
+        key = text_key(self.namespace, text)
+        if key in self._vectors:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._vectors[key] = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        return self._vectors[key].tolist()
+
+    def save(self, path):
+        """Persist the cache to ``path`` (a ``.npy`` matrix plus a key list)."""
+        os.makedirs(path, exist_ok=True)
+        keys = list(self._vectors)
+        matrix = np.stack([self._vectors[k] for k in keys]) if keys else np.zeros((0, 0), np.float32)
+        np.save(os.path.join(path, "vectors.npy"), matrix)
+        with open(os.path.join(path, "keys.json"), "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+
+    def load(self, path):
+        """Merge a cache previously written with ``save`` into this one."""
+        keys_path = os.path.join(path, "keys.json")
+        if not os.path.isfile(keys_path):
+            return
+        with open(keys_path, encoding="utf-8") as f:
+            keys = json.load(f)
+        matrix = np.load(os.path.join(path, "vectors.npy"))
+        for key, vector in zip(keys, matrix):
+            self._vectors.setdefault(key, vector)
@@ -0,0 +1,578 @@
+"""Concurrent batch evaluation of RAG outputs with cached judge calls.
+
+``rag_evaluation_example.py`` (module 15) grades one hard-coded answer with
+its ``eval_chain`` and runs ragas ``Faithfulness`` / ``ContextPrecision``
+over one-sample datasets.  ``RAGEvaluator`` runs the same kind of metrics
+over a whole dataset of ``{"question", "contexts", "answer", "reference"}``
+rows (``load_dataset`` reads JSONL or JSON, ragas column names accepted):
+
+- every (sample, metric) pair is scored concurrently; at most
+  ``max_concurrency`` judge requests are in flight and at most
+  ``max_pending`` samples are admitted at a time;
+- judge replies are cached by a hash of the judge namespace + prompt
+  (``JudgeCache``, appended to ``judge.jsonl`` in ``cache_dir``), and
+  identical prompts already in flight share one request.  A reply that
+  does not parse is not cached, so a re-run asks again;
+- embedding calls go through ``rag.embedding_cache.CachedEmbeddings``, with
+  every text the run needs embedded up front in batches;
+- ``evaluate(rows, output_dir)`` writes ``results.jsonl`` (one line per
+  sample, as samples finish) and ``summary.json`` (mean scores, failures,
+  timings, judge calls and cache hits).
+
+``compare(rows_a, rows_b)`` scores two configurations on the same
+questions and stops as soon as a sequential test decides which is better
+(see ``rag.sequential_eval``).
+
+The metrics follow module 15: ``AnswerCorrectness`` is its CORRECT /
+INCORRECT prompt (parsed strictly; the example's ``"CORRECT" in grade``
+also matches INCORRECT), ``Faithfulness`` and ``ContextPrecision`` are
+ragas-style judge prompts, and ``AnswerSimilarity`` is the cosine between
+answer and reference embeddings.
+"""
+
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from rag.embedding_cache import CachedEmbeddings, text_key
+
+CORRECTNESS_PROMPT = """You are an evaluator comparing two answers to determine if they match.
+
+Question being evaluated:
+{question}
+
+Expected correct answer:
+{reference}
+
+Answer to evaluate:
+{answer}
+
+Compare the answers and respond with only CORRECT or INCORRECT:
+
+Grade:"""
+
+FAITHFULNESS_PROMPT = """You are checking whether an answer is supported by retrieved context.
+
+Context:
+{context}
+
+Question:
+{question}
+
+Answer:
+{answer}
+
+Split the answer into its individual factual claims. Write one line per claim:
+<claim> | SUPPORTED    if the claim can be inferred from the context
+<claim> | UNSUPPORTED  otherwise
+
+Claims:"""
+
+CONTEXT_PRECISION_PROMPT = """You are judging one retrieved passage for a question.
+
+Question:
+{question}
+
+Reference answer:
+{reference}
+
+Passage:
+{passage}
+
+Was the passage useful in arriving at the reference answer? Respond with only YES or NO:
+
+Verdict:"""
+
+_CLAIM = re.compile(r"\|\s*(SUPPORTED|UNSUPPORTED)\b", re.IGNORECASE)
+_FIRST_WORD = re.compile(r"[A-Za-z]+")
+_ALIASES = {"user_input": "question", "retrieved_contexts": "contexts", "response": "answer",
+            "ground_truth": "reference", "query": "question"}
+# Module 15 rows hold the reference in ``answer`` and the prediction in ``result``.
+_MODULE_15_ALIASES = {**_ALIASES, "answer": "reference", "result": "answer"}
+
+
+def normalise_row(row):
+    """Map ragas / module 15 column names onto ``question``, ``contexts``, ``answer``, ``reference``."""
+    aliases = _MODULE_15_ALIASES if "result" in row else _ALIASES
+    sample = {aliases.get(key, key): value for key, value in row.items()}
+    if isinstance(sample.get("contexts"), str):
+        sample["contexts"] = [sample["contexts"]]
+    return sample
+
+
+def load_dataset(path):
+    """Rows from a ``.jsonl`` file (one object per line) or a ``.json`` list."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = json.load(f)
+    if isinstance(rows, dict):
+        rows = rows.get("samples", rows.get("rows", []))
+    return [normalise_row(row) for row in rows]
+
+
+def _first_word(reply):
+    match = _FIRST_WORD.search(reply)
+    return match.group(0).upper() if match else ""
+
+
+def parse_grade(reply):
+    """``1.0`` for CORRECT, ``0.0`` for INCORRECT; anything else is an error."""
+    word = _first_word(reply)
+    if word not in ("CORRECT", "INCORRECT"):
+        raise ValueError(f"expected CORRECT or INCORRECT, got {reply[:80]!r}")
+    return 1.0 if word == "CORRECT" else 0.0
+
+
+def parse_yes_no(reply):
+    word = _first_word(reply)
+    if word not in ("YES", "NO"):
+        raise ValueError(f"expected YES or NO, got {reply[:80]!r}")
+    return word == "YES"
+
+
+def parse_claims(reply):
+    """Share of ``<claim> | SUPPORTED`` lines among all claim lines."""
+    verdicts = [match.group(1).upper() for match in _CLAIM.finditer(reply)]
+    if not verdicts:
+        raise ValueError(f"no '<claim> | SUPPORTED/UNSUPPORTED' lines in {reply[:80]!r}")
+    return verdicts.count("SUPPORTED") / len(verdicts)
+
+
+def average_precision(relevant):
+    """Ragas context precision: mean precision@k over the ranks holding a relevant passage."""
+    hits, total = 0, 0.0
+    for rank, is_relevant in enumerate(relevant, 1):
+        if is_relevant:
+            hits += 1
+            total += hits / rank
+    return total / hits if hits else 0.0
+
+
+# ----------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------
+
+
+class AnswerCorrectness:
+    """Module 15's judge prompt: does the answer match the reference?"""
+
+    name = "answer_correctness"
+    requires = ("question", "answer", "reference")
+
+    async def ascore(self, sample, evaluator):
+        prompt = CORRECTNESS_PROMPT.format(
+            question=sample["question"], reference=sample["reference"], answer=sample["answer"]
+        )
+        return await evaluator.ajudge(prompt, parse_grade)
+
+
+class Faithfulness:
+    """Share of the answer's claims the judge finds supported by the contexts."""
+
+    name = "faithfulness"
+    requires = ("question", "answer", "contexts")
+
+    async def ascore(self, sample, evaluator):
+        prompt = FAITHFULNESS_PROMPT.format(
+            context="\n\n".join(sample["contexts"]), question=sample["question"], answer=sample["answer"]
+        )
+        return await evaluator.ajudge(prompt, parse_claims)
+
+
+class ContextPrecision:
+    """Average precision of the contexts, one YES/NO judge call per passage.
+
+    Passages are judged one at a time so a passage retrieved for the same
+    question by several configurations is only judged once.
+    """
+
+    name = "context_precision"
+    requires = ("question", "reference", "contexts")
+
+    async def ascore(self, sample, evaluator):
+        prompts = [
+            CONTEXT_PRECISION_PROMPT.format(question=sample["question"], reference=sample["reference"], passage=passage)
+            for passage in sample["contexts"]
+        ]
+        verdicts = await asyncio.gather(*(evaluator.ajudge(prompt, parse_yes_no) for prompt in prompts))
+        return average_precision(verdicts)
+
+
+class AnswerSimilarity:
+    """Cosine similarity of the answer and reference embeddings (no judge call)."""
+
+    name = "answer_similarity"
+    requires = ("answer", "reference")
+
+    def embedding_texts(self, sample):
+        return [sample["answer"], sample["reference"]]
+
+    async def ascore(self, sample, evaluator):
+        answer, reference = await evaluator.aembed(self.embedding_texts(sample))
+        norms = float(np.linalg.norm(answer) * np.linalg.norm(reference))
+        return float(answer @ reference) / norms if norms else 0.0
+
+
+def default_metrics(embeddings=None):
+    metrics = [AnswerCorrectness(), Faithfulness(), ContextPrecision()]
+    if embeddings is not None:
+        metrics.append(AnswerSimilarity())
+    return metrics
+
+
+# ----------------------------------------------------------------------
+# Caching
+# ----------------------------------------------------------------------
+
+
+class JudgeCache:
+    """Judge replies keyed by a hash of ``namespace`` + prompt.
+
+    With a ``path`` the cache is loaded from and appended to a JSONL file,
+    so an interrupted or repeated run only pays for the prompts it has not
+    seen.  Use one namespace per judge model and temperature.
+    """
+
+    def __init__(self, path=None, namespace=""):
+        self.path = path
+        self.namespace = namespace
+        self._replies = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._replies[entry["key"]] = entry["reply"]
+
+    def __len__(self):
+        return len(self._replies)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def key(self, prompt):
+        return text_key(self.namespace, prompt)
+
+    def get(self, key):
+        reply = self._replies.get(key)
+        if reply is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return reply
+
+    def put(self, key, reply):
+        if key in self._replies:
+            return
+        self._replies[key] = reply
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "reply": reply}) + "\n")
+
+
+def _judge_namespace(judge):
+    for attribute in ("model_name", "model", "model_id"):
+        value = getattr(judge, attribute, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(judge).__name__
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class SampleResult:
+    """Scores of one dataset row; a metric that failed has ``None`` and an entry in ``errors``."""
+
+    index: int
+    question: str
+    scores: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def to_dict(self):
+        return {"index": self.index, "question": self.question, "scores": self.scores,
+                "errors": self.errors, "timings": self.timings, "seconds": round(self.seconds, 6)}
+
+
+@dataclass
+class EvaluationReport:
+    """Per-sample results plus aggregate scores and run statistics."""
+
+    results: list
+    seconds: float
+    judge_calls: int
+    judge_cache_hits: int
+    judge_seconds: float
+    embedding_hits: int = 0
+    embedding_misses: int = 0
+
+    @property
+    def scores(self):
+        """Mean of each metric over the samples it scored."""
+        names = dict.fromkeys(name for result in self.results for name in result.scores)
+        means = {}
+        for name in names:
+            values = [r.scores[name] for r in self.results if r.scores.get(name) is not None]
+            means[name] = statistics.fmean(values) if values else None
+        return means
+
+    def summary(self):
+        latencies = sorted(result.seconds for result in self.results)
+        names = dict.fromkeys(name for result in self.results for name in result.scores)
+        return {
+            "samples": len(self.results),
+            "scores": self.scores,
+            "scored": {name: sum(r.scores.get(name) is not None for r in self.results) for name in names},
+            "failed": {name: sum(name in r.errors for r in self.results) for name in names},
+            "seconds": round(self.seconds, 3),
+            "samples_per_second": round(len(self.results) / self.seconds, 2) if self.seconds else None,
+            "sample_seconds_p50": round(latencies[len(latencies) // 2], 4) if latencies else None,
+            "sample_seconds_p95": round(latencies[int(len(latencies) * 0.95)], 4) if latencies else None,
+            "metric_seconds": {
+                name: round(sum(r.timings.get(name, 0.0) for r in self.results), 3) for name in names
+            },
+            "judge_calls": self.judge_calls,
+            "judge_cache_hits": self.judge_cache_hits,
+            "judge_seconds": round(self.judge_seconds, 3),
+            "embedding_hits": self.embedding_hits,
+            "embedding_misses": self.embedding_misses,
+        }
+
+    def write(self, output_dir):
+        """Write ``results.jsonl`` (input order) and ``summary.json`` to ``output_dir``."""
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "results.jsonl"), "w", encoding="utf-8") as f:
+            for result in self.results:
+                f.write(json.dumps(result.to_dict()) + "\n")
+        self.write_summary(output_dir)
+
+    def write_summary(self, output_dir):
+        with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class RAGEvaluator:
+    """Score many RAG samples with judge-LLM and embedding metrics, concurrently.
+
+    Args:
+        judge: Chat model or runnable taking a prompt string (module 15 uses
+            ``ChatOpenAI(temperature=0, model="gpt-4o-mini")``).
+        embeddings: Optional ``Embeddings``; enables ``AnswerSimilarity``.
+            Wrapped in ``CachedEmbeddings`` unless it already is one.
+        metrics: Metric objects (``default_metrics(embeddings)`` if omitted).
+        max_concurrency: Judge requests in flight at once.
+        max_pending: Samples admitted at once (defaults to
+            ``4 * max_concurrency``), so memory stays flat on long datasets.
+        cache_dir: Directory for ``judge.jsonl`` and the embedding cache;
+            reused across runs.  ``None`` keeps the caches in memory only.
+        namespace: Judge cache namespace (defaults to the judge's model name).
+    """
+
+    def __init__(self, judge, embeddings=None, metrics=None, max_concurrency=16, max_pending=None,
+                 cache_dir=None, namespace=None):
+        self.judge = judge
+        if embeddings is not None and not isinstance(embeddings, CachedEmbeddings):
+            embeddings = CachedEmbeddings(embeddings, namespace=type(embeddings).__name__)
+        self.embeddings = embeddings
+        self.metrics = list(metrics) if metrics is not None else default_metrics(embeddings)
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending or 4 * max_concurrency
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            if embeddings is not None:
+                embeddings.load(os.path.join(cache_dir, "embeddings"))
+        self.judge_cache = JudgeCache(
+            os.path.join(cache_dir, "judge.jsonl") if cache_dir else None,
+            _judge_namespace(judge) if namespace is None else namespace,
+        )
+        self.judge_calls = 0
+        self.judge_seconds = 0.0
+        self._slots = None
+        self._inflight = {}
+
+    def evaluate(self, rows, output_dir=None):
+        """Score ``rows``; returns an ``EvaluationReport`` (results in input order)."""
+        return asyncio.run(self.aevaluate(rows, output_dir))
+
+    async def aevaluate(self, rows, output_dir=None):
+        rows = [normalise_row(row) for row in rows]
+        calls, hits, seconds = self.judge_calls, self.judge_cache.hits, self.judge_seconds
+        embedding_hits, embedding_misses = self._embedding_counters()
+        results = [None] * len(rows)
+        stream = None
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            stream = open(os.path.join(output_dir, "results.jsonl"), "w", encoding="utf-8")
+        start = time.perf_counter()
+        try:
+            async for result in self.astream(rows):
+                results[result.index] = result
+                if stream:
+                    stream.write(json.dumps(result.to_dict()) + "\n")
+        finally:
+            if stream:
+                stream.close()
+        embedding_hits_now, embedding_misses_now = self._embedding_counters()
+        report = EvaluationReport(
+            results=results,
+            seconds=time.perf_counter() - start,
+            judge_calls=self.judge_calls - calls,
+            judge_cache_hits=self.judge_cache.hits - hits,
+            judge_seconds=self.judge_seconds - seconds,
+            embedding_hits=embedding_hits_now - embedding_hits,
+            embedding_misses=embedding_misses_now - embedding_misses,
+        )
+        if output_dir:
+            report.write_summary(output_dir)
+        if self.cache_dir and self.embeddings is not None:
+            self.embeddings.save(os.path.join(self.cache_dir, "embeddings"))
+        return report
+
+    def compare(self, rows_a, rows_b, output_dir=None, **kwargs):
+        """Decide whether configuration A or B scores better, stopping as soon as a test decides.
+
+        ``rows_a[i]`` and ``rows_b[i]`` are the two configurations' rows for
+        the same question.  Keyword arguments go to
+        ``rag.sequential_eval.acompare`` (``metric``, ``method``, ``alpha``,
+        ...); returns a ``ComparisonReport``.
+        """
+        return asyncio.run(self.acompare(rows_a, rows_b, output_dir, **kwargs))
+
+    async def acompare(self, rows_a, rows_b, output_dir=None, **kwargs):
+        from rag.sequential_eval import acompare
+
+        report = await acompare(self, rows_a, rows_b, **kwargs)
+        if output_dir:
+            report.write(output_dir)
+        if self.cache_dir and self.embeddings is not None:
+            self.embeddings.save(os.path.join(self.cache_dir, "embeddings"))
+        return report
+
+    async def astream(self, rows, metrics=None):
+        """Yield a ``SampleResult`` per row as soon as all its metrics are scored.
+
+        ``metrics`` overrides ``self.metrics`` for this call.
+        """
+        rows = [normalise_row(row) for row in rows]
+        metrics = self.metrics if metrics is None else list(metrics)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        admission = asyncio.Semaphore(self.max_pending)
+        done = asyncio.Queue()
+        await self._prefetch_embeddings(rows, metrics)
+
+        async def score(index, sample):
+            started = time.perf_counter()
+            result = SampleResult(index, sample.get("question", ""))
+            outcomes = await asyncio.gather(*(self._score_metric(metric, sample) for metric in metrics))
+            for metric, (value, error, seconds) in zip(metrics, outcomes):
+                result.scores[metric.name] = value
+                result.timings[metric.name] = round(seconds, 6)
+                if error is not None:
+                    result.errors[metric.name] = error
+            result.seconds = time.perf_counter() - started
+            admission.release()
+            await done.put(result)
+
+        async def produce():
+            tasks = []
+            for index, sample in enumerate(rows):
+                await admission.acquire()
+                tasks.append(asyncio.create_task(score(index, sample)))
+            await asyncio.gather(*tasks)
+
+        producer = asyncio.create_task(produce())
+        try:
+            for _ in range(len(rows)):
+                yield await done.get()
+            await producer
+        finally:
+            producer.cancel()
+
+    async def _score_metric(self, metric, sample):
+        """``(score, error, seconds)``; metrics whose fields are missing score ``None``."""
+        if any(not sample.get(name) for name in metric.requires):
+            return None, None, 0.0
+        started = time.perf_counter()
+        try:
+            value = await metric.ascore(sample, self)
+            error = None
+        except Exception as exc:  # noqa: BLE001 - reported per sample and metric
+            value, error = None, f"{type(exc).__name__}: {exc}"
+        return value, error, time.perf_counter() - started
+
+    # ------------------------------------------------------------------
+    # Judge and embedding calls
+    # ------------------------------------------------------------------
+
+    async def ajudge(self, prompt, parse=str):
+        """``parse(reply)`` for ``prompt``, from the cache or one (shared) judge request.
+
+        The reply is cached only once ``parse`` accepts it.
+        """
+        key = self.judge_cache.key(prompt)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.judge_cache.hits += 1
+            return parse(await pending)
+        reply = self.judge_cache.get(key)
+        if reply is not None:
+            return parse(reply)
+        pending = self._inflight[key] = asyncio.ensure_future(self._call_judge(prompt))
+        try:
+            reply = await pending
+        finally:
+            self._inflight.pop(key, None)
+        value = parse(reply)
+        self.judge_cache.put(key, reply)
+        return value
+
+    async def _call_judge(self, prompt):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            started = time.perf_counter()
+            output = await self.judge.ainvoke(prompt)
+            self.judge_seconds += time.perf_counter() - started
+            self.judge_calls += 1
+        return str(getattr(output, "content", output))
+
+    async def aembed(self, texts):
+        """Embedding matrix for ``texts`` through the cache."""
+        if self.embeddings is None:
+            raise ValueError("this metric needs RAGEvaluator(embeddings=...)")
+        return await asyncio.to_thread(self.embeddings.embed_documents_array, texts)
+
+    async def _prefetch_embeddings(self, rows, metrics):
+        """Embed every text the embedding metrics will ask for, in batches, before scoring."""
+        if self.embeddings is None:
+            return
+        texts = [
+            text for metric in metrics if hasattr(metric, "embedding_texts")
+            for sample in rows if all(sample.get(name) for name in metric.requires)
+            for text in metric.embedding_texts(sample)
+        ]
+        if texts:
+            await asyncio.to_thread(self.embeddings.embed_documents_array, list(dict.fromkeys(texts)))
+
+    def _embedding_counters(self):
+        if self.embeddings is None:
+            return 0, 0
+        return self.embeddings.hits, self.embeddings.misses
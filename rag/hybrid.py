@@ -0,0 +1,144 @@
+"""Hybrid retrieval: query dense and sparse retrievers concurrently and fuse.
+
+``advanced_retrieval_example.py`` (module 14) runs the dense retriever and
+``bm25_retriever`` one after the other, so a hybrid lookup costs the sum of
+both.  ``HybridRetriever`` submits every retriever at once (a thread pool for
+``invoke``, ``asyncio.gather`` for ``ainvoke``), so end-to-end latency is
+close to the slowest retriever, then fuses the ranked lists:
+
+- ``fusion="rrf"``: reciprocal-rank fusion, ``sum(weight / (rrf_k + rank))``;
+  needs no scores and is robust to incomparable score scales;
+- ``fusion="weighted"``: min-max normalise each retriever's scores and sum
+  them with ``weights``.  Scores come from ``rag.vectorstore.scored_search``
+  for vector-store retrievers (cosine for ``NumpyVectorStore``, relevance
+  scores for other stores) and
+  ``get_documents_with_scores`` where a retriever provides it (the
+  persistent BM25 retriever does); anything else falls back to ranks.
+
+Documents are deduplicated by chunk ID (``Document.id`` or the ``id_key``
+metadata field) and, because stores assign their own IDs, by text as well,
+so a chunk found by both retrievers appears once with its combined score.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+
+from rag.vectorstore import ascored_search, scored_search
+
+_FUSIONS = ("rrf", "weighted")
+
+
+def document_keys(doc, id_key="chunk_id"):
+    """Identities under which two results count as the same chunk."""
+    keys = []
+    if doc.id:
+        keys.append(("id", doc.id))
+    if id_key and doc.metadata.get(id_key) is not None:
+        keys.append((id_key, doc.metadata[id_key]))
+    keys.append(("text", doc.page_content))
+    return keys
+
+
+def with_scores(retriever, query, config):
+    """``[(doc, score)]`` from ``retriever``; ``score`` is ``None`` when unavailable."""
+    if isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity":
+        return scored_search(retriever.vectorstore, query, **retriever.search_kwargs)
+    if hasattr(retriever, "get_documents_with_scores"):
+        return retriever.get_documents_with_scores(query)
+    return [(doc, None) for doc in retriever.invoke(query, config=config)]
+
+
+async def awith_scores(retriever, query, config):
+    """Async ``with_scores``."""
+    if isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity":
+        return await ascored_search(retriever.vectorstore, query, **retriever.search_kwargs)
+    if hasattr(retriever, "get_documents_with_scores"):
+        return await asyncio.to_thread(retriever.get_documents_with_scores, query)
+    return [(doc, None) for doc in await retriever.ainvoke(query, config=config)]
+
+
+class HybridRetriever(BaseRetriever):
+    """Run several retrievers concurrently and fuse their results.
+
+    Drop-in for any retriever in an LCEL chain, e.g.
+    ``{"context": HybridRetriever(retrievers=[dense, bm25]), "question": ...}``.
+    """
+
+    retrievers: list
+    """Retrievers to query (typically a dense and a BM25 retriever)."""
+    weights: list = None
+    """Per-retriever weights; equal weights when ``None``."""
+    fusion: str = "rrf"
+    """``"rrf"`` (reciprocal-rank fusion) or ``"weighted"`` (normalised scores)."""
+    k: int = 4
+    """Number of fused documents to return."""
+    rrf_k: int = 60
+    """RRF rank constant; larger values flatten the rank weighting."""
+    id_key: str = "chunk_id"
+    """Metadata field used as chunk ID when ``Document.id`` is unset."""
+
+    def _fused(self, results):
+        weights = self.weights or [1.0] * len(self.retrievers)
+        if len(weights) != len(self.retrievers):
+            raise ValueError("weights must have one entry per retriever")
+        if self.fusion not in _FUSIONS:
+            raise ValueError(f"fusion must be one of {_FUSIONS}, got {self.fusion!r}")
+
+        docs, totals, seen = [], [], {}
+        for weight, ranked in zip(weights, results):
+            contributions = self._contributions(ranked)
+            for (doc, _), contribution in zip(ranked, contributions):
+                keys = document_keys(doc, self.id_key)
+                slot = next((seen[key] for key in keys if key in seen), None)
+                if slot is None:
+                    slot = len(docs)
+                    docs.append(doc)
+                    totals.append(0.0)
+                for key in keys:
+                    seen.setdefault(key, slot)
+                totals[slot] += weight * contribution
+        # Ties keep first-seen order (earlier retrievers, better ranks first).
+        order = sorted(range(len(docs)), key=lambda slot: -totals[slot])
+        return [docs[slot] for slot in order[:self.k]]
+
+    def _contributions(self, ranked):
+        if self.fusion == "rrf":
+            return [1.0 / (self.rrf_k + rank) for rank in range(1, len(ranked) + 1)]
+        if any(score is None for _, score in ranked):
+            # No scores available: use a linear rank score in [0, 1].
+            return [1.0 - rank / len(ranked) for rank in range(len(ranked))]
+        scores = [score for _, score in ranked]
+        low, high = min(scores), max(scores)
+        if high == low:
+            return [1.0] * len(scores)
+        return [(score - low) / (high - low) for score in scores]
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        configs = [{"callbacks": run_manager.get_child(tag=f"retriever_{i + 1}")} for i in range(len(self.retrievers))]
+        with ThreadPoolExecutor(max_workers=len(self.retrievers)) as pool:
+            futures = [
+                pool.submit(self._run, retriever, query, config)
+                for retriever, config in zip(self.retrievers, configs)
+            ]
+            results = [future.result() for future in futures]
+        return self._fused(results)
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        configs = [{"callbacks": run_manager.get_child(tag=f"retriever_{i + 1}")} for i in range(len(self.retrievers))]
+        results = await asyncio.gather(*(
+            self._arun(retriever, query, config) for retriever, config in zip(self.retrievers, configs)
+        ))
+        return self._fused(results)
+
+    def _run(self, retriever, query, config):
+        if self.fusion == "rrf":
+            return [(doc, None) for doc in retriever.invoke(query, config=config)]
+        return with_scores(retriever, query, config)
+
+    async def _arun(self, retriever, query, config):
+        if self.fusion == "rrf":
+            return [(doc, None) for doc in await retriever.ainvoke(query, config=config)]
+        return await awith_scores(retriever, query, config)
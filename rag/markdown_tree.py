@@ -0,0 +1,287 @@
+"""Markdown section tree and heading-first hierarchical retrieval.
+
+``UnstructuredMarkdownLoader`` (modules 12 and 13) flattens a Markdown file
+to plain text and the recursive splitter then cuts it on generic separators,
+so a chunk no longer knows which chapter it came from.  This module keeps
+the header hierarchy:
+
+- ``parse_sections`` turns a document into a pre-order list of
+  ``MarkdownSection`` nodes (ATX ``#`` headings, fenced code skipped), each
+  with its heading path and UTF-8 byte offsets.  Because the list is in
+  pre-order, a section's subtree is the contiguous id range
+  ``[id, last]``;
+- ``MarkdownSectionSplitter`` emits each section's own body as chunks
+  (long bodies re-split with ``rag.offset_splitter``) tagged with
+  ``section_id``, ``section_path`` and ``byte_start``/``byte_end``;
+- ``SectionTreeRetriever`` searches a small index of section headings
+  first, then scores only the chunks inside the ``section_k`` best
+  subtrees.  The descent is a ``section_id`` range filter, which
+  ``rag.vectorstore.NumpyVectorStore`` resolves through its metadata index
+  before scoring, so a long manual is searched a few sections at a time.
+"""
+
+import re
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from rag.offset_splitter import OffsetRecursiveCharacterTextSplitter
+from rag.parent_document import byte_offsets
+from rag.vectorstore import NumpyVectorStore, ascored_search, scored_search
+
+# A fence line or an ATX heading; headings inside fences are skipped while parsing.
+_BLOCK = re.compile(
+    rb"^ {0,3}(?:(?P<fence>```|~~~)[^\r\n]*|(?P<hashes>#{1,6})(?:[ \t]+(?P<title>[^\r\n]*?))?[ \t]*)$", re.MULTILINE
+)
+_CLOSING_HASHES = re.compile(rb"(?:^|[ \t]+)#+$")
+
+
+class MarkdownSection:
+    """One heading and everything below it, as byte offsets into the UTF-8 source.
+
+    ``start:end`` covers the heading line and all subsections;
+    ``body_start:body_end`` is the section's own text, up to its first
+    subsection.  ``last`` is the id of its last descendant (``id`` if none).
+    """
+
+    __slots__ = ("id", "level", "title", "path", "parent", "last", "start", "end", "body_start", "body_end")
+
+    def __init__(self, id, level, title, path, parent, start, body_start):
+        self.id = id
+        self.level = level
+        self.title = title
+        self.path = path
+        self.parent = parent
+        self.last = id
+        self.start = start
+        self.end = None
+        self.body_start = body_start
+        self.body_end = None
+
+    @property
+    def path_text(self):
+        """Heading path joined as ``"Title > Chapter > Section"``."""
+        return " > ".join(self.path)
+
+    def __repr__(self):
+        return f"MarkdownSection(id={self.id}, level={self.level}, path={self.path_text!r})"
+
+
+def parse_sections(text, title=""):
+    """Pre-order ``MarkdownSection`` list for ``text``; item 0 is the level-0 root.
+
+    The root covers the whole document, its body is any text before the
+    first heading and its ``title`` is ``title`` (e.g. the file name).
+    """
+    data = text.encode("utf-8")
+    root = MarkdownSection(0, 0, title, (title,) if title else (), None, 0, 0)
+    sections, stack, in_fence = [root], [root], None
+    for match in _BLOCK.finditer(data):
+        fence = match.group("fence")
+        if fence:
+            if in_fence is None:
+                in_fence = fence
+            elif fence == in_fence:
+                in_fence = None
+            continue
+        if in_fence is not None:
+            continue
+        level = len(match.group("hashes"))
+        heading = _CLOSING_HASHES.sub(b"", (match.group("title") or b"").strip()).decode("utf-8").strip()
+        while stack[-1].level >= level:
+            _close(stack.pop(), match.start())
+        parent = stack[-1]
+        if parent.body_end is None:
+            parent.body_end = match.start()
+        body_start = match.end() + (1 if data[match.end():match.end() + 1] == b"\n" else 0)
+        section = MarkdownSection(len(sections), level, heading, parent.path + (heading,), parent.id,
+                                  match.start(), body_start)
+        sections.append(section)
+        stack.append(section)
+    while stack:
+        _close(stack.pop(), len(data))
+    for section in reversed(sections[1:]):
+        parent = sections[section.parent]
+        parent.last = max(parent.last, section.last)
+    return sections
+
+
+def _close(section, end):
+    section.end = end
+    if section.body_end is None:
+        section.body_end = end
+
+
+class MarkdownSectionSplitter:
+    """Split Markdown along its header tree; long section bodies are re-split.
+
+    Args:
+        chunk_size: Maximum characters per chunk (module 13 uses 400).
+        chunk_overlap: Overlap when a section body has to be re-split.
+        include_path: Prefix each chunk with its heading path, so the chunk
+            embedding knows which chapter it belongs to.
+    """
+
+    def __init__(self, chunk_size=1000, chunk_overlap=100, include_path=False):
+        self.chunk_size = chunk_size
+        self.include_path = include_path
+        self._body_splitter = OffsetRecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def split_sections(self, text, title=""):
+        """``(sections, chunks)`` where chunks are ``(section, byte_start, byte_end, text)``."""
+        sections = parse_sections(text, title)
+        data = text.encode("utf-8")
+        chunks = []
+        for section in sections:
+            body = data[section.body_start:section.body_end].decode("utf-8")
+            if not body.strip():
+                continue
+            offsets = byte_offsets(body)
+            for span in self._body_splitter.split_spans(body):
+                chunk = span.text.strip()
+                if chunk:
+                    start = span.start + len(span.text) - len(span.text.lstrip())
+                    end = start + len(chunk)
+                    chunks.append((section, section.body_start + int(offsets[start]),
+                                   section.body_start + int(offsets[end]), chunk))
+        return sections, chunks
+
+    def split_documents(self, documents, first_section_id=0):
+        """``(heading_documents, chunk_documents)`` for ``documents``.
+
+        Section ids are numbered from ``first_section_id`` across all
+        documents, so several files can share one index.
+        """
+        headings, chunks = [], []
+        next_id = first_section_id
+        for doc in documents:
+            title = str(doc.metadata.get("title") or doc.metadata.get("source") or "")
+            sections, pieces = self.split_sections(doc.page_content, title)
+            has_preamble = any(piece[0].level == 0 for piece in pieces)
+            for section in sections:
+                if section.level == 0 and not has_preamble:
+                    continue
+                metadata = {
+                    **doc.metadata,
+                    "section_id": next_id + section.id,
+                    # The root's entry stands for the text before the first heading only.
+                    "section_last": next_id + (section.last if section.level else section.id),
+                    "section_path": section.path_text,
+                    "level": section.level,
+                    "byte_start": section.start,
+                    "byte_end": section.end,
+                }
+                headings.append(Document(page_content=section.path_text or title, metadata=metadata))
+            for section, start, end, text in pieces:
+                metadata = {
+                    **doc.metadata,
+                    "section_id": next_id + section.id,
+                    "section_path": section.path_text,
+                    "byte_start": start,
+                    "byte_end": end,
+                }
+                content = f"{section.path_text}\n\n{text}" if self.include_path and section.path_text else text
+                chunks.append(Document(page_content=content, metadata=metadata))
+            next_id += len(sections)
+        return headings, chunks
+
+
+def _most_specific(sections):
+    """Drop matched sections whose subtree contains another matched section."""
+    ids = [doc.metadata["section_id"] for doc, _ in sections]
+    return [
+        (doc, score) for doc, score in sections
+        if not any(doc.metadata["section_id"] < i <= doc.metadata["section_last"] for i in ids)
+    ]
+
+
+def subtree_filter(sections):
+    """``filter`` matching the chunks under any of ``sections`` (heading documents)."""
+    ranges = [
+        {"$and": [{"section_id": {"$gte": doc.metadata["section_id"]}},
+                  {"section_id": {"$lte": doc.metadata["section_last"]}}]}
+        for doc in sections
+    ]
+    if not ranges:
+        return None
+    return ranges[0] if len(ranges) == 1 else {"$or": ranges}
+
+
+class SectionTreeRetriever(BaseRetriever):
+    """Search section headings first, then chunks inside the matching subtrees.
+
+    Build with ``from_documents``; both stores must support Chroma-style
+    ``filter`` arguments (``NumpyVectorStore`` does).  A matched section
+    whose subtree contains another match is dropped for the more specific
+    one, so a document-wide ``#`` title does not turn the descent back into
+    a full scan.  Chunks are ranked by their own relevance plus
+    ``heading_weight`` times their section's heading relevance.  If the
+    chosen subtrees hold fewer than ``k`` chunks the rest is filled from a
+    flat search.
+    """
+
+    vectorstore: VectorStore
+    """Store of section body chunks (``section_id`` metadata)."""
+    heading_store: VectorStore
+    """Store of one document per section: its heading path."""
+    section_k: int = 3
+    """Number of heading matches whose subtrees are searched."""
+    k: int = 4
+    """Number of chunks to return."""
+    fetch_k: int = 20
+    """Chunks fetched from the chosen subtrees before re-ranking."""
+    heading_weight: float = 0.5
+    """Weight of the heading relevance in the chunk ranking."""
+
+    @classmethod
+    def from_documents(cls, documents, embeddings, splitter=None, vectorstore_cls=None, **kwargs):
+        """Parse ``documents`` and index their headings and chunks in two stores."""
+        vectorstore_cls = vectorstore_cls or NumpyVectorStore
+        headings, chunks = (splitter or MarkdownSectionSplitter()).split_documents(documents)
+        return cls(
+            vectorstore=vectorstore_cls.from_documents(chunks, embeddings),
+            heading_store=vectorstore_cls.from_documents(headings, embeddings),
+            **kwargs,
+        )
+
+    def sections(self, query):
+        """``[(heading_document, relevance)]`` for the subtrees to search."""
+        return _most_specific(scored_search(self.heading_store, query, k=self.section_k))
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        sections = self.sections(query)
+        chunks = scored_search(
+            self.vectorstore, query, k=self.fetch_k, filter=subtree_filter([doc for doc, _ in sections])
+        )
+        docs = self._rank(sections, chunks)
+        if len(docs) < self.k:
+            docs = self._fill(docs, self.vectorstore.similarity_search(query, k=2 * self.k))
+        return docs
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        sections = _most_specific(
+            await ascored_search(self.heading_store, query, k=self.section_k)
+        )
+        chunks = await ascored_search(
+            self.vectorstore, query, k=self.fetch_k, filter=subtree_filter([doc for doc, _ in sections])
+        )
+        docs = self._rank(sections, chunks)
+        if len(docs) < self.k:
+            docs = self._fill(docs, await self.vectorstore.asimilarity_search(query, k=2 * self.k))
+        return docs
+
+    def _rank(self, sections, chunks):
+        def heading_score(doc):
+            section_id = doc.metadata["section_id"]
+            return max((score for heading, score in sections
+                        if heading.metadata["section_id"] <= section_id <= heading.metadata["section_last"]),
+                       default=0.0)
+
+        ranked = sorted(chunks, key=lambda pair: -(pair[1] + self.heading_weight * heading_score(pair[0])))
+        return [doc for doc, _ in ranked[:self.k]]
+
+    def _fill(self, docs, flat):
+        seen = {(doc.metadata["section_id"], doc.metadata["byte_start"]) for doc in docs}
+        extra = [doc for doc in flat if (doc.metadata["section_id"], doc.metadata["byte_start"]) not in seen]
+        return (docs + extra)[:self.k]
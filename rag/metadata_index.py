@@ -0,0 +1,282 @@
+"""Metadata index for filtered vector search.
+
+Every chunk in modules 10 and 11 carries ``source``/``page`` metadata, and
+production queries filter by source, team or date.  Post-filtering the top-k
+wastes work and can return fewer than k hits; scanning every row's metadata
+(what ``NumpyVectorStore`` used to do) costs a dict lookup per row per query.
+
+``MetadataIndex`` keeps one *sorted index* per metadata field: rows are
+dictionary-encoded to a small integer code per distinct value, and a row
+order sorted by value is kept next to the sorted distinct values, so
+
+- ``field == value`` and ``field in [...]`` are slices of the row order
+  (cost proportional to the number of matches), and
+- ``$gt``/``$gte``/``$lt``/``$lte`` are a ``searchsorted`` over the distinct
+  values plus one contiguous slice (ISO date strings sort correctly).
+
+Filters use the Chroma-style syntax the course already knows::
+
+    {"source": "guide.md"}
+    {"page": {"$gte": 3}}
+    {"$and": [{"team": {"$in": ["search", "ml"]}}, {"date": {"$gte": "2024-01-01"}}]}
+
+Operators: ``$eq $ne $gt $gte $lt $lte $in $nin`` on a field and ``$and``/
+``$or`` across clauses.  A filter evaluates to a sorted array of row numbers;
+rows that lack a field never match a condition on it.  Values must be
+``str``, numbers, ``bool`` or ``None``; other values (lists, dicts) are not
+indexed, and a filter comparing against one raises ``ValueError``.
+Ranges compare numbers with numbers and strings with strings.
+
+Additions only append codes; the sorted order is rebuilt with one
+``argsort`` the next time a filter runs.  On disk each field is an
+append-only ``<n>.codes`` file and a ``<n>.values.jsonl`` of its distinct
+values, and ``fields.json`` records how much of each is valid, so saving
+after an add writes the new rows only.
+"""
+
+import json
+import os
+
+import numpy as np
+
+_FIELDS_FILE = "fields.json"
+_EMPTY = np.zeros(0, dtype=np.int64)
+_RANGE_OPS = {"$gt", "$gte", "$lt", "$lte"}
+
+
+def _group(value):
+    """Type group so values of different types never compare with each other."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    return None
+
+
+_MISSING = object()
+
+
+def _append(path, offset, data):
+    """Write ``data`` at ``offset``, dropping anything an interrupted save left past it."""
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.seek(offset)
+        f.truncate()
+        f.write(data)
+
+
+def _sorted(rows, count):
+    """``rows`` sorted; large sets go through a boolean mask instead of a sort."""
+    if len(rows) * 16 < count:
+        return np.sort(rows)
+    mask = np.zeros(count, dtype=bool)
+    mask[rows] = True
+    return np.flatnonzero(mask)
+
+
+def _intersect(a, b, count):
+    """Intersection of two sorted row arrays (stays sorted)."""
+    if min(len(a), len(b)) * 16 < count:
+        return np.intersect1d(a, b, assume_unique=True)
+    mask = np.zeros(count, dtype=bool)
+    mask[a] = True
+    return b[mask[b]]
+
+
+def _union(a, b, count):
+    """Union of two sorted row arrays."""
+    mask = np.zeros(count, dtype=bool)
+    mask[a] = True
+    mask[b] = True
+    return np.flatnonzero(mask)
+
+
+class _FieldIndex:
+    """Sorted index over one metadata field."""
+
+    def __init__(self, values=(), codes=None):
+        self.values = list(values)
+        self._codes_of = {(_group(v), v): code for code, v in enumerate(self.values)}
+        self._codes = np.asarray(codes if codes is not None else [], dtype=np.int32)
+        self._pending = []
+        self._layout_cache = None
+        # (rows, values, bytes of the values file) already written by ``MetadataIndex.save``.
+        self.saved = (0, 0, 0)
+
+    def __len__(self):
+        return len(self._codes) + len(self._pending)
+
+    def add(self, start_row, values):
+        """Append codes for rows ``start_row, start_row + 1, ...`` (``-1`` = missing)."""
+        self._pending.extend([-1] * (start_row - len(self)))
+        for value in values:
+            group = None if value is _MISSING else _group(value)
+            if group is None:
+                self._pending.append(-1)
+                continue
+            code = self._codes_of.get((group, value))
+            if code is None:
+                code = self._codes_of[(group, value)] = len(self.values)
+                self.values.append(value)
+            self._pending.append(code)
+        self._layout_cache = None
+
+    @property
+    def codes(self):
+        if self._pending:
+            self._codes = np.concatenate([self._codes, np.asarray(self._pending, dtype=np.int32)])
+            self._pending = []
+        return self._codes
+
+    def codes_since(self, row):
+        """Codes of rows ``row, row + 1, ...`` without merging pending additions."""
+        if row >= len(self._codes):
+            return np.asarray(self._pending[row - len(self._codes):], dtype=np.int32)
+        return self.codes[row:]
+
+    def _layout(self):
+        """``(keys, rank_of_code, order, bounds)`` for the current rows.
+
+        ``keys`` are the distinct ``(group, value)`` pairs in sorted order,
+        ``order`` lists rows by key rank (missing values last) and rows with
+        rank ``r`` are ``order[bounds[r]:bounds[r + 1]]``.
+        """
+        if self._layout_cache is None:
+            keys = sorted(self._codes_of)
+            rank_of_code = np.empty(len(self.values) + 1, dtype=np.int64)
+            rank_of_code[[self._codes_of[key] for key in keys]] = np.arange(len(keys))
+            rank_of_code[-1] = len(keys)
+            ranks = rank_of_code[self.codes]
+            order = np.argsort(ranks, kind="stable")
+            bounds = np.searchsorted(ranks[order], np.arange(len(keys) + 1))
+            self._layout_cache = (keys, rank_of_code, order, bounds)
+        return self._layout_cache
+
+    def rows(self, condition):
+        """Sorted rows matching ``condition`` (a value or an operator dict)."""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        result = None
+        for op, operand in condition.items():
+            rows = self._evaluate(op, operand)
+            result = rows if result is None else _intersect(result, rows, len(self))
+        return result if result is not None else _EMPTY
+
+    def _evaluate(self, op, operand):
+        keys, rank_of_code, order, bounds = self._layout()
+        if op in ("$eq", "$in"):
+            operands = [operand] if op == "$eq" else list(operand)
+            for value in operands:
+                if _group(value) is None:
+                    raise ValueError(f"{op} needs str, number, bool or None values, got {value!r}")
+            codes = {self._codes_of.get((_group(value), value)) for value in operands}
+            ranks = sorted(int(rank_of_code[code]) for code in codes if code is not None)
+            if not ranks:
+                return _EMPTY
+            return _sorted(np.concatenate([order[bounds[r]:bounds[r + 1]] for r in ranks]), len(self))
+        if op in ("$ne", "$nin"):
+            excluded = self._evaluate("$eq" if op == "$ne" else "$in", operand)
+            mask = np.zeros(len(self), dtype=bool)
+            mask[order[:bounds[-1]]] = True
+            mask[excluded] = False
+            return np.flatnonzero(mask)
+        if op in _RANGE_OPS:
+            group = _group(operand)
+            if group not in (2, 3):
+                raise ValueError(f"{op} needs a number or a string, got {operand!r}")
+            # Keys are sorted by (group, value): find the group, then the cut inside it.
+            groups = np.fromiter((key[0] for key in keys), dtype=np.int64, count=len(keys))
+            first, last = np.searchsorted(groups, group, side="left"), np.searchsorted(groups, group, side="right")
+            values = np.empty(last - first, dtype=object)
+            values[:] = [key[1] for key in keys[first:last]]
+            side = "right" if op in ("$gt", "$lte") else "left"
+            cut = first + int(np.searchsorted(values, operand, side=side))
+            lo, hi = (cut, last) if op in ("$gt", "$gte") else (first, cut)
+            return _sorted(order[bounds[lo]:bounds[hi]], len(self))
+        raise ValueError(f"Unsupported filter operator {op!r}")
+
+
+class MetadataIndex:
+    """Per-field sorted indexes over the metadata of a vector store's rows."""
+
+    def __init__(self):
+        self.fields = {}
+        self.count = 0
+
+    def add(self, start_row, metadatas):
+        """Index ``metadatas`` for rows ``start_row, start_row + 1, ...``."""
+        metadatas = list(metadatas)
+        names = set(self.fields).union(*(metadata.keys() for metadata in metadatas))
+        for name in names:
+            field = self.fields.get(name)
+            if field is None:
+                field = self.fields[name] = _FieldIndex()
+            field.add(start_row, [metadata.get(name, _MISSING) for metadata in metadatas])
+        self.count = start_row + len(metadatas)
+
+    def rows(self, filter):
+        """Sorted ``int64`` rows matching ``filter`` (see the module docstring)."""
+        if not isinstance(filter, dict):
+            raise ValueError(f"filter must be a dict, got {type(filter).__name__}")
+        result = None
+        for key, condition in filter.items():
+            if key == "$and":
+                rows = self._combine(condition, _intersect)
+            elif key == "$or":
+                rows = self._combine(condition, _union)
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported filter operator {key!r}")
+            elif key in self.fields:
+                rows = self.fields[key].rows(condition)
+            else:
+                rows = _EMPTY
+            result = rows if result is None else _intersect(result, rows, self.count)
+        return (result if result is not None else np.arange(self.count)).astype(np.int64)
+
+    def _combine(self, clauses, combine):
+        result = None
+        for clause in clauses:
+            rows = self.rows(clause)
+            result = rows if result is None else combine(result, rows, self.count)
+        return result if result is not None else _EMPTY
+
+    def save(self, directory):
+        """Append what was added since the last save, then rewrite ``fields.json``."""
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for position, (name, field) in enumerate(self.fields.items()):
+            rows, values, values_bytes = field.saved
+            codes = field.codes_since(rows)
+            _append(os.path.join(directory, f"{position}.codes"), rows * 4, codes.astype("<i4").tobytes())
+            new_values = "".join(json.dumps(value, ensure_ascii=False) + "\n" for value in field.values[values:])
+            new_values = new_values.encode("utf-8")
+            if new_values or not values_bytes:
+                _append(os.path.join(directory, f"{position}.values.jsonl"), values_bytes, new_values)
+            field.saved = (rows + len(codes), len(field.values), values_bytes + len(new_values))
+            entries.append([name, *field.saved])
+        tmp_path = os.path.join(directory, _FIELDS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"count": self.count, "fields": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(directory, _FIELDS_FILE))
+
+    @classmethod
+    def load(cls, directory):
+        """Read an index written by ``save``."""
+        with open(os.path.join(directory, _FIELDS_FILE), encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls()
+        index.count = payload["count"]
+        for position, (name, rows, values, values_bytes) in enumerate(payload["fields"]):
+            codes = np.fromfile(os.path.join(directory, f"{position}.codes"), dtype="<i4", count=rows)
+            with open(os.path.join(directory, f"{position}.values.jsonl"), "rb") as f:
+                lines = f.read(values_bytes).splitlines()
+            field = index.fields[name] = _FieldIndex([json.loads(line) for line in lines], codes)
+            field.saved = (rows, values, values_bytes)
+        return index
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.isfile(os.path.join(directory, _FIELDS_FILE))
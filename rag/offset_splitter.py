@@ -0,0 +1,303 @@
+"""Character splitters that return chunks as offsets into the source text.
+
+These mirror LangChain's ``CharacterTextSplitter`` and
+``RecursiveCharacterTextSplitter`` (modules 09, 10 and 12) and produce the
+same chunk boundaries, but never copy pieces of the source while splitting.
+Every chunk is a ``TextSpan`` pointing into the one shared source string, and
+its text is only sliced out when something reads it.
+"""
+
+import copy
+import logging
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+logger = logging.getLogger(__name__)
+
+
+class TextSpan:
+    """A chunk of a source string stored as ``(start, end)`` offsets.
+
+    Reading ``.text`` slices the chunk out of the source.  A chunk whose pieces
+    are not contiguous in the source (e.g. a ``CharacterTextSplitter`` chunk
+    where empty splits between repeated separators were dropped) carries its
+    joined text instead; ``start`` and ``end`` still bound it in the source.
+    """
+
+    __slots__ = ("source", "start", "end", "_text")
+
+    def __init__(self, source, start, end, text=None):
+        self.source = source
+        self.start = start
+        self.end = end
+        self._text = text
+
+    @property
+    def text(self):
+        """Materialise the chunk text."""
+        if self._text is not None:
+            return self._text
+        return self.source[self.start:self.end]
+
+    @property
+    def is_contiguous(self):
+        """True when the chunk is exactly ``source[start:end]``."""
+        return self._text is None
+
+    def __len__(self):
+        if self._text is not None:
+            return len(self._text)
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"TextSpan(start={self.start}, end={self.end})"
+
+
+class _SpanSplitterMixin:
+    """Span-based split/merge machinery shared by both splitters.
+
+    Subclasses implement ``_split_spans(text, cursors)`` and return a list of
+    ``TextSpan`` objects for one source string.
+    """
+
+    def split_spans(self, text):
+        """Split ``text`` into ``TextSpan`` chunks without copying it."""
+        return self._split_spans(text, {})
+
+    def split_text(self, text):
+        """Split ``text`` and return the chunk strings (LangChain-compatible)."""
+        return [span.text for span in self.split_spans(text)]
+
+    def create_documents(self, texts, metadatas=None):
+        """Create ``Document`` chunks with exact ``start_index`` offsets."""
+        return list(self._iter_documents(texts, metadatas))
+
+    def lazy_split_documents(self, documents):
+        """Yield split ``Document`` chunks one at a time.
+
+        Only the chunk being yielded is materialised, so callers that stream
+        chunks into an embedder never hold every chunk string at once.
+        """
+        for doc in documents:
+            yield from self._iter_documents([doc.page_content], [doc.metadata])
+
+    def _iter_documents(self, texts, metadatas):
+        metadatas = metadatas or [{}] * len(texts)
+        for text, metadata in zip(texts, metadatas):
+            for span in self.split_spans(text):
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    chunk_metadata["start_index"] = span.start
+                yield Document(page_content=span.text, metadata=chunk_metadata)
+
+    # ------------------------------------------------------------------
+    # Piece handling: pieces are (start, end) tuples into the source text
+    # ------------------------------------------------------------------
+
+    def _length(self, text, start, end):
+        if self._length_function is len:
+            return end - start
+        return self._length_function(text[start:end])
+
+    def _split_pieces(self, text, start, end, pattern):
+        """Span equivalent of LangChain's ``_split_text_with_regex``."""
+        if pattern is None:
+            return [(i, i + 1) for i in range(start, end)]
+
+        pieces = []
+        prev = start
+        if self._keep_separator == "end":
+            for match in pattern.finditer(text, start, end):
+                bound = match.end()
+                if bound > prev:
+                    pieces.append((prev, bound))
+                prev = bound
+        elif self._keep_separator:
+            for match in pattern.finditer(text, start, end):
+                bound = match.start()
+                if bound > prev:
+                    pieces.append((prev, bound))
+                prev = bound
+        else:
+            for match in pattern.finditer(text, start, end):
+                if match.start() > prev:
+                    pieces.append((prev, match.start()))
+                prev = match.end()
+        if end > prev:
+            pieces.append((prev, end))
+        return pieces
+
+    def _join_pieces(self, text, pieces, first, last, separator):
+        """Span equivalent of ``TextSplitter._join_docs`` for ``pieces[first:last]``."""
+        start, end = pieces[first][0], pieces[last - 1][1]
+        # With an empty merge separator the pieces tile the source exactly.
+        if separator:
+            step = len(separator)
+            for i in range(first + 1, last):
+                prev_end = pieces[i - 1][1]
+                if pieces[i][0] != prev_end + step or not text.startswith(separator, prev_end):
+                    return self._join_copied(text, pieces[first:last], separator)
+
+        if self._strip_whitespace:
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+        return TextSpan(text, start, end) if end > start else None
+
+    def _join_copied(self, text, pieces, separator):
+        """Join pieces that are not contiguous in the source into a new string."""
+        start, end = pieces[0][0], pieces[-1][1]
+        joined = separator.join(text[s:e] for s, e in pieces)
+        if self._strip_whitespace:
+            start += len(joined) - len(joined.lstrip())
+            end -= len(joined) - len(joined.rstrip())
+            joined = joined.strip()
+        return TextSpan(text, start, end, joined) if joined else None
+
+    def _merge_pieces(self, text, pieces, separator):
+        """Span equivalent of ``TextSplitter._merge_splits``.
+
+        The current chunk is the window ``pieces[head:i]``; dropping pieces off
+        the front for overlap just advances ``head`` instead of re-slicing.
+        """
+        separator_len = self._length_function(separator)
+        if self._length_function is len:
+            lengths = [end - start for start, end in pieces]
+        else:
+            lengths = [self._length_function(text[start:end]) for start, end in pieces]
+
+        chunks = []
+        head = 0
+        total = 0
+        for i, length in enumerate(lengths):
+            if total + length + (separator_len if i > head else 0) > self._chunk_size:
+                if total > self._chunk_size:
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than the specified %d",
+                        total,
+                        self._chunk_size,
+                    )
+                if i > head:
+                    span = self._join_pieces(text, pieces, head, i, separator)
+                    if span is not None:
+                        chunks.append(span)
+                    while total > self._chunk_overlap or (
+                        total + length + (separator_len if i > head else 0)
+                        > self._chunk_size
+                        and total > 0
+                    ):
+                        total -= lengths[head] + (separator_len if i - head > 1 else 0)
+                        head += 1
+            total += length + (separator_len if i > head else 0)
+        if len(pieces) > head:
+            span = self._join_pieces(text, pieces, head, len(pieces), separator)
+            if span is not None:
+                chunks.append(span)
+        return chunks
+
+
+class OffsetCharacterTextSplitter(_SpanSplitterMixin, TextSplitter):
+    """Drop-in ``CharacterTextSplitter`` that splits into ``TextSpan`` offsets."""
+
+    def __init__(self, separator="\n\n", is_separator_regex=False, **kwargs):
+        kwargs.setdefault("add_start_index", True)
+        super().__init__(**kwargs)
+        self._separator = separator
+        self._is_separator_regex = is_separator_regex
+        pattern = separator if is_separator_regex else re.escape(separator)
+        self._pattern = re.compile(pattern) if separator else None
+
+    def _split_spans(self, text, cursors):
+        pieces = self._split_pieces(text, 0, len(text), self._pattern)
+        lookaround = self._is_separator_regex and self._separator.startswith(
+            ("(?=", "(?<!", "(?<=", "(?!")
+        )
+        merge_separator = "" if self._keep_separator or lookaround else self._separator
+        return self._merge_pieces(text, pieces, merge_separator)
+
+
+class OffsetRecursiveCharacterTextSplitter(_SpanSplitterMixin, TextSplitter):
+    """Drop-in ``RecursiveCharacterTextSplitter`` that splits into ``TextSpan`` offsets.
+
+    LangChain re-runs ``re.search`` over a fresh substring for every separator
+    at every recursion level.  Here pieces are never sliced out: searches run
+    against the shared source with ``pos``/``endpos`` bounds, and for literal
+    separators each separator keeps a forward-only cursor to its next
+    occurrence, so probing "does this piece contain the separator?" walks the
+    source once per separator instead of once per piece.
+
+    Regex separators are matched with ``pattern.search(text, pos, endpos)``;
+    as with any ``pos``-bounded search, ``^`` and lookbehinds can see the text
+    before a piece, which plain literal separators never depend on.
+    """
+
+    def __init__(self, separators=None, keep_separator=True, is_separator_regex=False, **kwargs):
+        kwargs.setdefault("add_start_index", True)
+        super().__init__(keep_separator=keep_separator, **kwargs)
+        self._separators = separators or ["\n\n", "\n", " ", ""]
+        self._is_separator_regex = is_separator_regex
+        self._patterns = {
+            sep: re.compile(sep if is_separator_regex else re.escape(sep))
+            for sep in self._separators
+            if sep
+        }
+
+    @classmethod
+    def from_language(cls, language, **kwargs):
+        """Build a splitter with LangChain's separators for ``language``."""
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        separators = RecursiveCharacterTextSplitter.get_separators_for_language(language)
+        return cls(separators=separators, is_separator_regex=True, **kwargs)
+
+    def _contains(self, text, separator, start, end, cursors):
+        """Whether ``separator`` occurs inside ``text[start:end]``."""
+        if self._is_separator_regex:
+            return self._patterns[separator].search(text, start, end) is not None
+        # Pieces are visited left to right, so the next occurrence found for an
+        # earlier piece stays valid until a later piece starts past it.
+        hit = cursors.get(separator)
+        if hit is None or (hit != -1 and hit < start):
+            hit = text.find(separator, start)
+            cursors[separator] = hit
+        return hit != -1 and hit + len(separator) <= end
+
+    def _split_spans(self, text, cursors):
+        return self._split_range(text, 0, len(text), self._separators, cursors)
+
+    def _split_range(self, text, start, end, separators, cursors):
+        chunks = []
+        separator = separators[-1]
+        new_separators = []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if self._contains(text, candidate, start, end, cursors):
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        pieces = self._split_pieces(text, start, end, self._patterns.get(separator))
+        merge_separator = "" if self._keep_separator else separator
+
+        good = []
+        for piece_start, piece_end in pieces:
+            if self._length(text, piece_start, piece_end) < self._chunk_size:
+                good.append((piece_start, piece_end))
+                continue
+            if good:
+                chunks.extend(self._merge_pieces(text, good, merge_separator))
+                good = []
+            if not new_separators:
+                chunks.append(TextSpan(text, piece_start, piece_end))
+            else:
+                chunks.extend(
+                    self._split_range(text, piece_start, piece_end, new_separators, cursors)
+                )
+        if good:
+            chunks.extend(self._merge_pieces(text, good, merge_separator))
+        return chunks
@@ -0,0 +1,220 @@
+"""Packed multi-item LLM-as-judge grading.
+
+Module 15's judge prompt grades one (question, reference, answer) triple
+per request and reads CORRECT / INCORRECT out of free text.  Most of such a
+request is fixed overhead (instructions, round trip, queueing behind a rate
+limit), so ``PackedAnswerCorrectness`` grades ``pack_size`` items in one
+prompt and asks for a JSON object back:
+
+    {"verdicts": [{"id": 1, "grade": "CORRECT"}, {"id": 2, "grade": "INCORRECT"}]}
+
+``parse_packed`` validates the reply item by item: unknown or repeated ids
+and grades other than CORRECT / INCORRECT are rejected, and only the items
+without a valid verdict are re-graded, one at a time, with the module 15
+prompt.  A reply that is not JSON at all sends the whole pack down that
+path.  Verdicts are cached per item, so a re-run only packs what it has not
+graded.
+
+The metric is a drop-in for ``rag.evaluation.AnswerCorrectness`` in
+``RAGEvaluator``: samples scored concurrently are collected into packs
+(flushed when full or after ``max_wait`` seconds).  Packing can change what
+the judge decides, so ``agreement`` compares two runs (e.g. packed against
+single-item grading on a sample of the dataset) before trusting the cheaper
+mode.
+"""
+
+import asyncio
+import json
+import re
+
+from rag.evaluation import CORRECTNESS_PROMPT, parse_grade
+
+PACKED_PROMPT_HEADER = """You are an evaluator comparing answers to expected correct answers.
+For each numbered item, decide whether the answer to evaluate matches the expected correct answer.
+"""
+
+PACKED_PROMPT_ITEM = """
+Item {id}
+Question: {question}
+Expected correct answer: {reference}
+Answer to evaluate: {answer}
+"""
+
+PACKED_PROMPT_FOOTER = """
+Respond with only a JSON object with one verdict per item, in this form:
+{"verdicts": [{"id": 1, "grade": "CORRECT"}, {"id": 2, "grade": "INCORRECT"}]}
+
+JSON:"""
+
+_GRADES = ("CORRECT", "INCORRECT")
+_JSON_OBJECT = re.compile(r"[\[{].*[\]}]", re.DOTALL)
+# Cache namespace for per-item verdicts, kept apart from single-item replies.
+_PACKED_KEY = "packed\x00"
+
+
+def _correctness_prompt(sample):
+    return CORRECTNESS_PROMPT.format(question=sample["question"], reference=sample["reference"],
+                                     answer=sample["answer"])
+
+
+def pack_prompt(samples):
+    """One prompt grading ``samples`` (dicts with question, reference, answer), ids from 1."""
+    items = "".join(
+        PACKED_PROMPT_ITEM.format(id=i, question=sample["question"], reference=sample["reference"],
+                                  answer=sample["answer"])
+        for i, sample in enumerate(samples, 1)
+    )
+    return PACKED_PROMPT_HEADER + items + PACKED_PROMPT_FOOTER
+
+
+def parse_packed(reply, count):
+    """``{id: "CORRECT" | "INCORRECT"}`` for the valid verdicts in ``reply``.
+
+    Accepts the object form or a bare list, inside a code fence or not.
+    Verdicts for ids outside ``1..count``, ids given twice and unknown grades
+    are left out, so the caller re-grades just those items.  Raises
+    ``ValueError`` when the reply holds no JSON.
+    """
+    match = _JSON_OBJECT.search(reply)
+    if match is None:
+        raise ValueError(f"no JSON in {reply[:80]!r}")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"invalid JSON in {reply[:80]!r}: {exc}") from None
+    entries = data.get("verdicts", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"expected a list of verdicts, got {type(entries).__name__}")
+
+    verdicts, repeated = {}, set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        item_id, grade = entry.get("id"), entry.get("grade")
+        if isinstance(item_id, str) and item_id.strip().isdigit():
+            item_id = int(item_id)
+        if not isinstance(item_id, int) or isinstance(item_id, bool) or not 1 <= item_id <= count:
+            continue
+        grade = grade.strip().upper() if isinstance(grade, str) else None
+        if grade not in _GRADES:
+            continue
+        if item_id in verdicts:
+            repeated.add(item_id)
+        verdicts[item_id] = grade
+    for item_id in repeated:
+        del verdicts[item_id]
+    return verdicts
+
+
+class PackedAnswerCorrectness:
+    """``AnswerCorrectness`` graded ``pack_size`` items per judge request.
+
+    Args:
+        pack_size: Items per packed prompt.
+        max_wait: Seconds a partly filled pack waits for more samples.
+    """
+
+    name = "answer_correctness"
+    requires = ("question", "answer", "reference")
+
+    def __init__(self, pack_size=10, max_wait=0.02):
+        self.pack_size = pack_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.packed_items = 0
+        self.regraded = 0
+        self._queue = []
+        self._timer = None
+        self._tasks = set()
+
+    def stats(self):
+        """Packed requests, items they graded and items re-graded one at a time."""
+        return {"packed_requests": self.requests, "packed_items": self.packed_items, "regraded": self.regraded}
+
+    async def ascore(self, sample, evaluator):
+        key = evaluator.judge_cache.key(_PACKED_KEY + _correctness_prompt(sample))
+        reply = evaluator.judge_cache.get(key)
+        if reply is not None:
+            return parse_grade(reply)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((sample, key, future))
+        if len(self._queue) >= self.pack_size:
+            self._flush(evaluator)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, evaluator)
+        return await future
+
+    def _flush(self, evaluator):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            pack, self._queue = self._queue[:self.pack_size], self._queue[self.pack_size:]
+            task = asyncio.ensure_future(self._grade_pack(pack, evaluator))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _grade_pack(self, pack, evaluator):
+        if len(pack) == 1:
+            verdicts = {}
+        else:
+            try:
+                prompt = pack_prompt([sample for sample, _, _ in pack])
+            except Exception as exc:  # noqa: BLE001 - a bad row is not a bad reply; fail the pack's samples
+                for _, _, future in pack:
+                    future.set_exception(exc)
+                return
+            self.requests += 1
+            try:
+                verdicts = await evaluator.ajudge(prompt, lambda reply: parse_packed(reply, len(pack)))
+            except Exception:  # noqa: BLE001 - the items are re-graded one at a time below
+                verdicts = {}
+        regrade = []
+        for item_id, (sample, key, future) in enumerate(pack, 1):
+            grade = verdicts.get(item_id)
+            if grade is None:
+                regrade.append((sample, key, future))
+                continue
+            self.packed_items += 1
+            evaluator.judge_cache.put(key, grade)
+            future.set_result(1.0 if grade == "CORRECT" else 0.0)
+        self.regraded += len(regrade) if len(pack) > 1 else 0
+        await asyncio.gather(*(self._grade_one(item, evaluator) for item in regrade))
+
+    async def _grade_one(self, item, evaluator):
+        sample, key, future = item
+        try:
+            score = await evaluator.ajudge(_correctness_prompt(sample), parse_grade)
+        except Exception as exc:  # noqa: BLE001 - surfaces as this sample's metric error
+            future.set_exception(exc)
+            return
+        evaluator.judge_cache.put(key, "CORRECT" if score else "INCORRECT")
+        future.set_result(score)
+
+
+def agreement(first, second, metric="answer_correctness"):
+    """Agreement of two ``EvaluationReport`` runs over the same rows on a 0/1 ``metric``.
+
+    Returns the number of rows graded by both, the share graded the same,
+    Cohen's kappa (agreement corrected for chance) and the rows that differ.
+    """
+    pairs = [
+        (a.index, a.scores.get(metric), b.scores.get(metric))
+        for a, b in zip(first.results, second.results)
+        if a.scores.get(metric) is not None and b.scores.get(metric) is not None
+    ]
+    if not pairs:
+        return {"items": 0, "agreement": None, "kappa": None, "disagreements": []}
+    n = len(pairs)
+    observed = sum(x == y for _, x, y in pairs) / n
+    p_first = sum(x for _, x, _ in pairs) / n
+    p_second = sum(y for _, _, y in pairs) / n
+    expected = p_first * p_second + (1 - p_first) * (1 - p_second)
+    kappa = (observed - expected) / (1 - expected) if expected < 1 else 1.0
+    return {
+        "items": n,
+        "agreement": observed,
+        "kappa": kappa,
+        "disagreements": [index for index, x, y in pairs if x != y],
+    }
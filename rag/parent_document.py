@@ -0,0 +1,253 @@
+"""Small-to-big retrieval: match small child chunks, return their parent section.
+
+Small chunks (module 09's ``chunk_size=300``, module 13's ``400``) embed and
+match precisely, but the LLM then reads fragments; large chunks read well but
+blur the embedding and cost more to embed and prompt.  ``ParentSectionRetriever``
+does both:
+
+- each source document is split into parent sections (any splitter; with
+  ``rag.offset_splitter`` the sections are ``(start, end)`` spans, so nothing
+  is copied), and each section into child chunks;
+- only the children go into the vector store, tagged with their parent's
+  ``parent_id``;
+- a query fetches ``child_k`` children, keeps the first ``k`` distinct
+  parents in child-rank order and reads those sections from a
+  ``DocumentStore``.
+
+``DocumentStore`` keeps every source text exactly once, UTF-8 encoded in one
+``texts.bin`` file, and each parent section as a fixed-size
+``(byte_start, byte_end, char_start, document)`` record in ``sections.bin``.
+Both files are opened with ``np.memmap``, so fetching a parent is an offset
+lookup and one slice, and the parent text is never duplicated into the
+vector store or its metadata.
+"""
+
+import json
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+_META_FILE = "meta.json"
+_TEXTS_FILE = "texts.bin"
+_SECTIONS_FILE = "sections.bin"
+_DOCUMENTS_FILE = "documents.jsonl"
+_SECTION_DTYPE = np.dtype([("byte_start", "<u8"), ("byte_end", "<u8"), ("char_start", "<u8"), ("document", "<u4")])
+
+
+def byte_offsets(text):
+    """UTF-8 byte offset of every character position in ``text`` (``len + 1`` entries)."""
+    if text.isascii():
+        return np.arange(len(text) + 1, dtype=np.uint64)
+    codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    sizes = 1 + (codepoints >= 0x80) + (codepoints >= 0x800) + (codepoints >= 0x10000)
+    return np.concatenate([[0], np.cumsum(sizes, dtype=np.uint64)])
+
+
+def split_offsets(splitter, text):
+    """``[(start, end)]`` character spans of ``splitter``'s chunks of ``text``.
+
+    Uses ``split_spans`` (``rag.offset_splitter``) when available; otherwise
+    each chunk is located in ``text`` after the previous chunk's start.
+    """
+    if hasattr(splitter, "split_spans"):
+        return [(span.start, span.end) for span in splitter.split_spans(text)]
+    spans, cursor = [], 0
+    for chunk in splitter.split_text(text):
+        start = text.find(chunk, cursor)
+        if start < 0:
+            raise ValueError(f"{type(splitter).__name__} returned a chunk that is not a substring of the text")
+        spans.append((start, start + len(chunk)))
+        cursor = start + 1
+    return spans
+
+
+class DocumentStore:
+    """Append-only store of source texts and parent sections, read by offset.
+
+    Args:
+        directory: Where to keep the store.  ``None`` keeps everything in
+            memory.  An existing store in the directory is opened.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._documents = []
+        self._sections = np.zeros(0, dtype=_SECTION_DTYPE)
+        self._texts = bytearray()
+        self._size = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            if os.path.isfile(self._path(_META_FILE)):
+                self._open()
+
+    def __len__(self):
+        return len(self._sections)
+
+    @property
+    def nbytes(self):
+        """Bytes of text plus section records held by the store."""
+        return self._size + self._sections.nbytes
+
+    def add(self, text, spans, metadata=None):
+        """Store ``text`` once and its ``(start, end)`` parent sections; return the section ids."""
+        return self.add_many([(text, spans, metadata)])[0]
+
+    def add_many(self, items):
+        """``add`` for many ``(text, spans, metadata)`` items with one write per file."""
+        chunks, records, metadatas, ids = [], [], [], []
+        size, first = self._size, len(self._sections)
+        for text, spans, metadata in items:
+            offsets = byte_offsets(text)
+            spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+            block = np.zeros(len(spans), dtype=_SECTION_DTYPE)
+            block["byte_start"] = size + offsets[spans[:, 0]]
+            block["byte_end"] = size + offsets[spans[:, 1]]
+            block["char_start"] = spans[:, 0]
+            block["document"] = len(self._documents) + len(metadatas)
+            data = text.encode("utf-8")
+            chunks.append(data)
+            records.append(block)
+            metadatas.append(dict(metadata or {}))
+            ids.append(list(range(first, first + len(block))))
+            size += len(data)
+            first += len(block)
+        if not metadatas:
+            return ids
+        records = np.concatenate(records)
+        if self.directory is None:
+            for data in chunks:
+                self._texts.extend(data)
+            self._sections = np.concatenate([self._sections, records])
+        else:
+            with open(self._path(_TEXTS_FILE), "ab") as f:
+                f.writelines(chunks)
+            with open(self._path(_SECTIONS_FILE), "ab") as f:
+                f.write(records.tobytes())
+            with open(self._path(_DOCUMENTS_FILE), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(metadata, ensure_ascii=False) + "\n" for metadata in metadatas)
+        self._documents.extend(metadatas)
+        self._size = size
+        if self.directory is not None:
+            self._map(first)
+            self._write_meta()
+        return ids
+
+    def get(self, section_ids):
+        """Parent ``Document`` objects for ``section_ids`` (in the given order)."""
+        docs = []
+        for section_id in section_ids:
+            record = self._sections[section_id]
+            text = bytes(self._texts[int(record["byte_start"]):int(record["byte_end"])]).decode("utf-8")
+            metadata = {
+                **self._documents[int(record["document"])],
+                "parent_id": int(section_id),
+                "start_index": int(record["char_start"]),
+            }
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write_meta(self):
+        tmp_path = self._path(_META_FILE) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "documents": len(self._documents), "sections": len(self._sections),
+                       "bytes": self._size}, f)
+        os.replace(tmp_path, self._path(_META_FILE))
+
+    def _open(self):
+        with open(self._path(_META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self._path(_DOCUMENTS_FILE), encoding="utf-8") as f:
+            self._documents = [json.loads(next(f)) for _ in range(meta["documents"])]
+        self._size = meta["bytes"]
+        self._map(meta["sections"])
+
+    def _map(self, sections):
+        if sections:
+            self._sections = np.memmap(self._path(_SECTIONS_FILE), dtype=_SECTION_DTYPE, mode="r", shape=(sections,))
+        if self._size:
+            self._texts = np.memmap(self._path(_TEXTS_FILE), dtype=np.uint8, mode="r", shape=(self._size,))
+
+
+class ParentSectionRetriever(BaseRetriever):
+    """Search small child chunks, return the parent sections they came from.
+
+    Build with ``add_documents`` (or ``from_documents``), e.g. with the
+    module 13 splitter for children::
+
+        retriever = ParentSectionRetriever(
+            vectorstore=NumpyVectorStore(embeddings),
+            docstore=DocumentStore("parents"),
+            parent_splitter=OffsetRecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=0),
+            child_splitter=OffsetRecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=50),
+        )
+        retriever.add_documents(documents)
+
+    ``parent_splitter=None`` makes each whole source document the parent.
+    Returned parents carry ``parent_id`` and ``start_index`` metadata.
+    """
+
+    vectorstore: VectorStore
+    """Vector store holding only the child chunks."""
+    docstore: DocumentStore
+    """Store holding the source texts and parent section offsets."""
+    child_splitter: object = None
+    """Splitter for child chunks (required by ``add_documents``)."""
+    parent_splitter: object = None
+    """Splitter for parent sections; ``None`` = whole documents."""
+    k: int = 4
+    """Number of parent sections to return."""
+    child_k: int = 20
+    """Number of child chunks to fetch before grouping by parent."""
+    search_kwargs: dict = {}
+    """Extra arguments for ``similarity_search`` (e.g. ``filter``)."""
+    id_key: str = "parent_id"
+    """Child metadata field holding the parent section id."""
+
+    @classmethod
+    def from_documents(cls, documents, vectorstore, docstore=None, **kwargs):
+        """Create a retriever and index ``documents``."""
+        retriever = cls(vectorstore=vectorstore, docstore=DocumentStore() if docstore is None else docstore, **kwargs)
+        retriever.add_documents(documents)
+        return retriever
+
+    def add_documents(self, documents):
+        """Split ``documents`` into parents and children; store parents once, embed children."""
+        if self.child_splitter is None:
+            raise ValueError("child_splitter is required to add documents")
+        documents = list(documents)
+        parents = [
+            [(0, len(doc.page_content))] if self.parent_splitter is None
+            else split_offsets(self.parent_splitter, doc.page_content)
+            for doc in documents
+        ]
+        section_ids = self.docstore.add_many(
+            (doc.page_content, spans, doc.metadata) for doc, spans in zip(documents, parents)
+        )
+        texts, metadatas = [], []
+        for doc, spans, ids in zip(documents, parents, section_ids):
+            text = doc.page_content
+            for section_id, (start, end) in zip(ids, spans):
+                parent = text[start:end]
+                for child_start, child_end in split_offsets(self.child_splitter, parent):
+                    texts.append(parent[child_start:child_end])
+                    metadatas.append({**doc.metadata, self.id_key: section_id, "start_index": start + child_start})
+        if texts:
+            self.vectorstore.add_texts(texts, metadatas=metadatas)
+        return len(texts)
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self._parents(self.vectorstore.similarity_search(query, k=self.child_k, **self.search_kwargs))
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        return self._parents(await self.vectorstore.asimilarity_search(query, k=self.child_k, **self.search_kwargs))
+
+    def _parents(self, children):
+        # First-seen order = rank of each parent's best child.
+        section_ids = list(dict.fromkeys(child.metadata[self.id_key] for child in children))[:self.k]
+        return self.docstore.get(section_ids)
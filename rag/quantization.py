@@ -0,0 +1,166 @@
+"""Quantised first-pass search (int8 and 1-bit binary) with float re-scoring.
+
+A ``text-embedding-3-small`` vector is 1536 float32 values, about 6 KB.
+Memory, not CPU, caps how many chunks one process can search, so these
+indexes keep a compact code per row in RAM and leave the full-precision
+matrix on disk (the memory-mapped ``vectors.bin`` of a persisted
+``NumpyVectorStore``):
+
+- ``QuantizedIndex("int8")``: one byte per dimension (4x smaller), scaled
+  per dimension from the observed min/max;
+- ``QuantizedIndex("binary")``: one bit per dimension (32x smaller), scored
+  by Hamming distance between sign bits.
+
+Every query scores all codes, keeps ``k * rerank`` candidates, and re-scores
+only those rows with the float vectors, so only the shortlist is read from
+disk.  Attach one with ``store.build_index(QuantizedIndex("int8"))``.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from rag.vectorstore import top_k_indices
+
+_META_FILE = "meta.json"
+_BLOCK_ROWS = 1024
+_KINDS = ("int8", "binary")
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(codes):
+        return _POPCOUNT_TABLE[codes]
+
+
+class QuantizedIndex:
+    """Exhaustive search over int8 or binary codes, re-scored with float vectors.
+
+    Args:
+        kind: ``"int8"`` or ``"binary"``.
+        rerank: Re-score ``k * rerank`` candidates with the full vectors
+            passed to ``search``.  ``None`` picks 4 for int8 and 10 for binary,
+            whose first-pass ranking is much coarser.
+    """
+
+    def __init__(self, kind="int8", rerank=None):
+        if kind not in _KINDS:
+            raise ValueError(f"kind must be one of {_KINDS}, got {kind!r}")
+        self.kind = kind
+        self.rerank = rerank if rerank is not None else (4 if kind == "int8" else 10)
+        self.dim = None
+        self.low = None
+        self.step = None
+        self.codes = None
+
+    def __len__(self):
+        return 0 if self.codes is None else len(self.codes)
+
+    @property
+    def nbytes(self):
+        """In-memory size of the codes (plus int8 calibration)."""
+        arrays = [self.codes, self.low, self.step]
+        return sum(np.asarray(a).nbytes for a in arrays if a is not None)
+
+    def fit(self, vectors):
+        """Calibrate on ``vectors`` and encode them as rows ``0..n-1``."""
+        vectors = np.asarray(vectors)
+        if len(vectors) == 0:
+            raise ValueError("Cannot fit an index on zero vectors")
+        self.dim = vectors.shape[1]
+        if self.kind == "int8":
+            low = np.full(self.dim, np.inf, dtype=np.float32)
+            high = np.full(self.dim, -np.inf, dtype=np.float32)
+            for start in range(0, len(vectors), _BLOCK_ROWS):
+                block = np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float32)
+                low = np.minimum(low, block.min(axis=0))
+                high = np.maximum(high, block.max(axis=0))
+            self.low = low
+            self.step = np.maximum(high - low, 1e-12) / 255.0
+        self.codes = None
+        self.add(vectors, start_row=0)
+        return self
+
+    def add(self, vectors, start_row=None):
+        """Encode and append ``vectors``; rows must be added in order."""
+        if self.dim is None:
+            raise ValueError("Index is not fitted; call fit() first")
+        if start_row is not None and start_row != len(self):
+            raise ValueError(f"Expected rows to continue at {len(self)}, got {start_row}")
+        parts = [
+            self.encode(np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float32))
+            for start in range(0, len(vectors), _BLOCK_ROWS)
+        ]
+        new = np.concatenate(parts) if parts else self.encode(np.zeros((0, self.dim), dtype=np.float32))
+        self.codes = new if self.codes is None else np.concatenate([np.asarray(self.codes), new])
+
+    def encode(self, vectors):
+        """Codes for a float32 ``(n, dim)`` block."""
+        if self.kind == "binary":
+            return np.packbits(vectors > 0, axis=1)
+        # Values seen later may fall outside the calibrated range; clip them.
+        scaled = np.rint((vectors - self.low) / self.step) - 128
+        return np.clip(scaled, -128, 127).astype(np.int8)
+
+    def approximate_scores(self, query):
+        """First-pass scores for every row (higher is better)."""
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty(len(self), dtype=np.float32)
+        if self.kind == "binary":
+            query_bits = np.packbits(query > 0)
+            for start in range(0, len(self), _BLOCK_ROWS):
+                block = self.codes[start:start + _BLOCK_ROWS]
+                hamming = _popcount(np.bitwise_xor(block, query_bits)).sum(axis=1, dtype=np.int32)
+                out[start:start + len(block)] = -hamming
+            return out
+        # x ~= low + (code + 128) * step, so x.q = low.q + (code + 128).(step * q)
+        weights = self.step * query
+        bias = float(self.low @ query) + 128.0 * float(weights.sum())
+        for start in range(0, len(self), _BLOCK_ROWS):
+            block = np.asarray(self.codes[start:start + _BLOCK_ROWS], dtype=np.float32)
+            out[start:start + len(block)] = block @ weights + bias
+        return out
+
+    def search(self, query, k, mask=None, vectors=None, rerank=None, **kwargs):
+        """Top-``k`` ``(rows, scores)``; re-scored with ``vectors`` when given."""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = self.approximate_scores(query)
+        if mask is not None:
+            scores[~mask[:len(scores)]] = -np.inf
+            k = min(k, int(mask[:len(scores)].sum()))
+        rerank = self.rerank if rerank is None else rerank
+        if vectors is None or not rerank:
+            rows = top_k_indices(scores, k)
+            return rows, scores[rows]
+        # Sorted rows keep reads from a memory-mapped matrix sequential.
+        shortlist = np.sort(top_k_indices(scores, k * rerank))
+        # A shortlist longer than the live rows picks up masked (-inf) rows; never re-score those.
+        shortlist = shortlist[np.isfinite(scores[shortlist])]
+        exact = np.asarray(vectors[shortlist], dtype=np.float32) @ np.asarray(query, dtype=np.float32)
+        best = top_k_indices(exact, k)
+        return shortlist[best], exact[best]
+
+    def save(self, path):
+        """Write the codes (and calibration) to directory ``path``."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "codes.npy"), np.asarray(self.codes))
+        if self.kind == "int8":
+            np.save(os.path.join(path, "calibration.npy"), np.stack([self.low, self.step]))
+        with open(os.path.join(path, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"kind": self.kind, "dim": self.dim, "rerank": self.rerank}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open an index saved with ``save``; codes are memory-mapped by default."""
+        with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["kind"], rerank=meta["rerank"])
+        index.dim = meta["dim"]
+        index.codes = np.load(os.path.join(path, "codes.npy"), mmap_mode="r" if mmap else None)
+        if index.kind == "int8":
+            index.low, index.step = np.load(os.path.join(path, "calibration.npy"))
+        return index
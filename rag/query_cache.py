@@ -0,0 +1,236 @@
+"""Semantic query cache for retrieval chains.
+
+Users ask the same question in many phrasings ("What is LangChain used
+for?", "what's langchain for"), and the module 11 and 14 chains re-run
+retrieval and generation for every one of them.  ``SemanticCache`` embeds
+the incoming question, compares it with the past questions it holds (one
+matrix-vector product over a preallocated float32 matrix) and returns the
+stored value when the best cosine similarity reaches ``threshold``.
+
+Entries expire ``ttl`` seconds after they were stored and, once
+``max_entries`` is reached, the least recently used entry is evicted.  Hits,
+misses, evictions and expirations are counted so the hit rate can be
+monitored.
+
+Two ways to put it in front of a chain:
+
+- ``CachedRetriever(retriever=..., cache=...)`` caches the retrieved context,
+  so generation still runs but the vector / BM25 lookup does not;
+- ``cache.wrap(chain)`` caches the full answer of any runnable whose input
+  is the question (or a dict holding it under ``input_key``).
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+
+
+class SemanticCache:
+    """Similarity-keyed cache with TTL expiry and LRU eviction.
+
+    Args:
+        embeddings: LangChain ``Embeddings`` used to embed questions (wrap it
+            in ``rag.embedding_cache.CachedEmbeddings`` to share vectors with
+            the retriever).
+        threshold: Minimum cosine similarity for a hit.  Too low returns
+            answers to different questions; tune it on real traffic.
+        max_entries: Capacity; the least recently used entry is evicted
+            when full.
+        ttl: Seconds an entry stays valid, or ``None`` for no expiry.
+        clock: Time source (``time.monotonic``); injectable for tests.
+    """
+
+    def __init__(self, embeddings, threshold=0.9, max_entries=1000, ttl=3600.0, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._matrix = None
+        self._live = np.zeros(max_entries, dtype=bool)
+        self._expires = np.full(max_entries, np.inf)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._questions = [None] * max_entries
+        self._values = [None] * max_entries
+        self._tick = 0
+        self._lock = threading.Lock()
+        self._last_query = (None, None)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return int((self._live & (self._expires > self.clock())).sum())
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Counters as a dict (for logging)."""
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._live[:] = False
+            self._questions = [None] * self.max_entries
+            self._values = [None] * self.max_entries
+
+    # ------------------------------------------------------------------
+    # Lookup and insertion
+    # ------------------------------------------------------------------
+
+    def embed(self, question):
+        """Unit-length float32 vector for ``question``.
+
+        The most recent question's vector is remembered, so a ``lookup``
+        followed by ``store`` of the same question embeds it once.
+        """
+        text, vector = self._last_query
+        if text != question:
+            vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+            self._last_query = (question, vector)
+        return vector
+
+    def lookup(self, question):
+        """Cached value for ``question`` (or a close paraphrase), else ``None``."""
+        hit = self.lookup_with_score(question)
+        return hit[0] if hit else None
+
+    def lookup_with_score(self, question):
+        """``(value, similarity, cached_question)`` for a hit, else ``None``."""
+        vector = self.embed(question)
+        with self._lock:
+            self._expire()
+            slot, score = self._nearest(vector)
+            if slot is None or score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(slot)
+            return self._values[slot], score, self._questions[slot]
+
+    def store(self, question, value):
+        """Cache ``value`` for ``question``.
+
+        A question that is already cached (similarity at or above
+        ``threshold``) has its entry replaced rather than duplicated.
+        """
+        vector = self.embed(question)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            self._expire()
+            slot, score = self._nearest(vector)
+            if slot is None or score < self.threshold:
+                slot = self._free_slot()
+            self._matrix[slot] = vector
+            self._questions[slot] = question
+            self._values[slot] = value
+            self._live[slot] = True
+            self._expires[slot] = np.inf if self.ttl is None else self.clock() + self.ttl
+            self._touch(slot)
+
+    def _nearest(self, vector):
+        if self._matrix is None or not self._live.any():
+            return None, -1.0
+        live = np.flatnonzero(self._live)
+        scores = self._matrix[live] @ vector
+        best = int(np.argmax(scores))
+        return int(live[best]), float(scores[best])
+
+    def _expire(self):
+        expired = self._live & (self._expires <= self.clock())
+        if expired.any():
+            self.expirations += int(expired.sum())
+            self._live[expired] = False
+            for slot in np.flatnonzero(expired):
+                self._questions[slot] = self._values[slot] = None
+
+    def _free_slot(self):
+        free = np.flatnonzero(~self._live)
+        if len(free):
+            return int(free[0])
+        self.evictions += 1
+        return int(np.argmin(self._last_used))
+
+    def _touch(self, slot):
+        self._tick += 1
+        self._last_used[slot] = self._tick
+
+    # ------------------------------------------------------------------
+    # Chain integration
+    # ------------------------------------------------------------------
+
+    def wrap(self, runnable, input_key="question"):
+        """Runnable that answers from the cache and calls ``runnable`` on a miss.
+
+        The question is the input itself, or ``input[input_key]`` for dict
+        inputs.  Only the final output is cached, so put ``wrap`` around the
+        whole chain to cache answers.
+        """
+
+        def question_of(value):
+            return value[input_key] if isinstance(value, dict) else value
+
+        def cached(value, config):
+            question = question_of(value)
+            hit = self.lookup(question)
+            if hit is not None:
+                return hit
+            result = runnable.invoke(value, config=config)
+            self.store(question, result)
+            return result
+
+        async def acached(value, config):
+            question = question_of(value)
+            hit = await asyncio.to_thread(self.lookup, question)
+            if hit is not None:
+                return hit
+            result = await runnable.ainvoke(value, config=config)
+            await asyncio.to_thread(self.store, question, result)
+            return result
+
+        return RunnableLambda(cached, afunc=acached, name="SemanticCache")
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever that serves repeated (or paraphrased) queries from a ``SemanticCache``."""
+
+    retriever: BaseRetriever
+    """Retriever called on a cache miss."""
+    cache: SemanticCache
+    """Cache of retrieved documents, keyed by query."""
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        docs = self.cache.lookup(query)
+        if docs is None:
+            docs = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            self.cache.store(query, docs)
+        return list(docs)
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        docs = await asyncio.to_thread(self.cache.lookup, query)
+        if docs is None:
+            docs = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+            await asyncio.to_thread(self.cache.store, query, docs)
+        return list(docs)
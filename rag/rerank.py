@@ -0,0 +1,172 @@
+"""Cross-encoder re-ranking of an over-fetched candidate set.
+
+The retrievers in modules 11 and 14 return their top-k by raw vector or BM25
+score.  A cross-encoder reads the query and the chunk together and ranks far
+more accurately, but costs one model forward pass per pair, so it is run on
+a small candidate set: fetch ``k=20``-``50`` from the first stage, re-score,
+keep ``top_n``.
+
+``CrossEncoderReranker`` keeps that cheap on CPU:
+
+- pairs are scored in batches of ``batch_size`` (one ``model.score`` call per
+  batch, which is where batched inference pays off);
+- candidates are scored in first-stage order and scoring stops early once
+  ``patience`` consecutive batches fail to change the top-``n``.  The
+  first-stage order is a good prior, so late candidates rarely break in;
+  ``patience=None`` always scores everything;
+- scores are memoised per ``(query, chunk text)`` in a ``PairScoreCache``, so
+  repeated queries and overlapping candidate sets are not re-scored.
+
+Any ``langchain_community`` ``BaseCrossEncoder`` works as the model;
+``cross_encoder()`` builds the local ``sentence-transformers`` one.
+"""
+
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def cross_encoder(model_name=DEFAULT_MODEL, device="cpu", **model_kwargs):
+    """Local ``HuggingFaceCrossEncoder`` (needs ``sentence-transformers``)."""
+    from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+
+    return HuggingFaceCrossEncoder(model_name=model_name, model_kwargs={"device": device, **model_kwargs})
+
+
+def _pair_key(query, text):
+    return hashlib.sha1(f"{query}\x00{text}".encode("utf-8")).digest()
+
+
+class PairScoreCache:
+    """Bounded LRU map from ``(query, chunk text)`` to a cross-encoder score."""
+
+    def __init__(self, max_pairs=100000):
+        self.max_pairs = max_pairs
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._scores)
+
+    @property
+    def hit_rate(self):
+        """Fraction of looked-up pairs served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._scores.move_to_end(key)
+            return score
+
+    def put(self, key, score):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_pairs:
+                self._scores.popitem(last=False)
+
+
+class CrossEncoderReranker:
+    """Batched cross-encoder re-ranking with early cutoff and a pair-score cache.
+
+    Args:
+        model: Object with ``score(pairs) -> scores`` (a ``BaseCrossEncoder``).
+        top_n: Documents to keep.
+        batch_size: Pairs per ``model.score`` call.
+        patience: Stop after this many consecutive batches leave the top-n
+            unchanged; ``None`` scores every candidate.
+        cache: ``PairScoreCache`` to share; a private one when ``None``.
+    """
+
+    def __init__(self, model, top_n=4, batch_size=16, patience=1, cache=None):
+        self.model = model
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.patience = patience
+        self.cache = cache if cache is not None else PairScoreCache()
+        self.pairs_scored = 0
+        self.model_calls = 0
+
+    def score(self, query, texts):
+        """Cross-encoder scores for ``texts``, using and filling the cache."""
+        keys = [_pair_key(query, text) for text in texts]
+        scores = [self.cache.get(key) for key in keys]
+        missing = {}
+        for key, text, score in zip(keys, texts, scores):
+            if score is None:
+                missing.setdefault(key, text)
+        fresh = {}
+        if missing:
+            values = self.model.score([(query, text) for text in missing.values()])
+            self.model_calls += 1
+            self.pairs_scored += len(missing)
+            for key, value in zip(missing, values):
+                fresh[key] = float(value)
+                self.cache.put(key, fresh[key])
+        return [score if score is not None else fresh[key] for key, score in zip(keys, scores)]
+
+    def rerank(self, query, documents, top_n=None):
+        """Best ``top_n`` ``(document, score)`` pairs, highest score first.
+
+        ``documents`` should be in first-stage rank order: early cutoff
+        assumes the likeliest candidates come first.
+        """
+        top_n = top_n or self.top_n
+        scored, stale = [], 0
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            scores = self.score(query, [doc.page_content for doc in batch])
+            if len(scored) >= top_n:
+                bar = sorted((s for s, _ in scored), reverse=True)[top_n - 1]
+                stale = 0 if max(scores) > bar else stale + 1
+            scored.extend((score, start + i) for i, score in enumerate(scores))
+            if self.patience is not None and stale >= self.patience:
+                break
+        # Stable on ties, so equal scores keep first-stage order.
+        scored.sort(key=lambda pair: -pair[0])
+        return [(documents[i], score) for score, i in scored[:top_n]]
+
+
+class RerankingRetriever(BaseRetriever):
+    """Over-fetch from ``retriever`` and keep the ``top_n`` after re-ranking.
+
+    Configure the first stage to over-fetch, e.g.
+    ``store.as_retriever(search_kwargs={"k": 30})``.  Returned documents carry
+    the cross-encoder score in ``metadata["relevance_score"]``.
+    """
+
+    retriever: BaseRetriever
+    """First-stage retriever (vector, BM25 or hybrid)."""
+    reranker: CrossEncoderReranker
+    """Cross-encoder stage."""
+    top_n: int = 4
+    """Documents to return."""
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        candidates = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self._annotate(self.reranker.rerank(query, candidates, self.top_n))
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        candidates = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return self._annotate(await asyncio.to_thread(self.reranker.rerank, query, candidates, self.top_n))
+
+    @staticmethod
+    def _annotate(ranked):
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "relevance_score": score}, id=doc.id)
+            for doc, score in ranked
+        ]
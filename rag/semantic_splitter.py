@@ -0,0 +1,137 @@
+"""Vectorised ``SemanticChunker`` with batched sentence embeddings.
+
+LangChain's experimental ``SemanticChunker`` (module 13) builds the buffered
+"combined sentences" with nested Python loops and then calls
+``cosine_similarity`` once per adjacent pair.  This subclass keeps its
+breakpoint logic and output, but:
+
+- builds each combined sentence with a single ``" ".join`` over a window,
+- embeds the sentences of *all* input documents in one batched pass (through
+  ``CachedEmbeddings`` when given one, so repeated sentences are free), and
+- computes adjacent cosine distances, gradients and thresholds as NumPy
+  array operations over the whole embedding matrix.
+"""
+
+import copy
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_experimental.text_splitter import SemanticChunker
+
+
+def adjacent_cosine_distances(matrix):
+    """Return ``1 - cos(row_i, row_i+1)`` for every adjacent pair of rows.
+
+    Zero-norm rows get similarity 0 (distance 1), matching
+    ``langchain_community.utils.math.cosine_similarity``.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if len(matrix) < 2:
+        return np.zeros(0, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1)
+    dots = np.einsum("ij,ij->i", matrix[:-1], matrix[1:])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = dots / (norms[:-1] * norms[1:])
+    similarity[~np.isfinite(similarity)] = 0.0
+    return 1.0 - similarity
+
+
+class VectorizedSemanticChunker(SemanticChunker):
+    """Drop-in ``SemanticChunker`` that embeds in batches and splits with NumPy.
+
+    Extra args:
+        batch_size: Maximum number of sentences sent per ``embed_documents``
+            call when the embeddings object does not batch for itself.
+    """
+
+    def __init__(self, embeddings, batch_size=512, **kwargs):
+        super().__init__(embeddings, **kwargs)
+        self.batch_size = batch_size
+        self._sentence_pattern = re.compile(self.sentence_split_regex)
+
+    def _get_single_sentences_list(self, text):
+        return self._sentence_pattern.split(text)
+
+    def _combine(self, sentences):
+        buffer = self.buffer_size
+        return [
+            " ".join(sentences[max(0, i - buffer):i + buffer + 1])
+            for i in range(len(sentences))
+        ]
+
+    def _embed(self, texts):
+        if hasattr(self.embeddings, "embed_documents_array"):
+            return np.asarray(self.embeddings.embed_documents_array(texts), dtype=np.float64)
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self.embeddings.embed_documents(texts[i:i + self.batch_size]))
+        return np.asarray(vectors, dtype=np.float64)
+
+    def _needs_embedding(self, sentences):
+        if len(sentences) == 1:
+            return False
+        return not (self.breakpoint_threshold_type == "gradient" and len(sentences) == 2)
+
+    def _breakpoints(self, distances):
+        if self.number_of_chunks is not None:
+            threshold = self._threshold_from_clusters(distances)
+            values = distances
+        elif self.breakpoint_threshold_type == "gradient":
+            values = np.gradient(distances, np.arange(len(distances)))
+            threshold = np.percentile(values, self.breakpoint_threshold_amount)
+        else:
+            threshold, values = self._calculate_breakpoint_threshold(distances)
+        return np.flatnonzero(np.asarray(values) > threshold).tolist()
+
+    def _assemble(self, sentences, breakpoints):
+        chunks = []
+        start = 0
+        for index in breakpoints:
+            combined = " ".join(sentences[start:index + 1])
+            if self.min_chunk_size is not None and len(combined) < self.min_chunk_size:
+                continue
+            chunks.append(combined)
+            start = index + 1
+        if start < len(sentences):
+            chunks.append(" ".join(sentences[start:]))
+        return chunks
+
+    def split_texts(self, texts):
+        """Split many texts, embedding all of their sentences in one pass."""
+        per_text = [self._get_single_sentences_list(text) for text in texts]
+        combined = []
+        ranges = []
+        for sentences in per_text:
+            start = len(combined)
+            if self._needs_embedding(sentences):
+                combined.extend(self._combine(sentences))
+            ranges.append((start, len(combined)))
+
+        matrix = self._embed(combined) if combined else None
+        results = []
+        for sentences, (start, end) in zip(per_text, ranges):
+            if start == end:
+                results.append(sentences)
+                continue
+            distances = adjacent_cosine_distances(matrix[start:end])
+            results.append(self._assemble(sentences, self._breakpoints(distances)))
+        return results
+
+    def split_text(self, text):
+        """Split ``text`` into semantically coherent chunks."""
+        return self.split_texts([text])[0]
+
+    def create_documents(self, texts, metadatas=None):
+        """Create documents from many texts with a single embedding pass."""
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for chunks, metadata in zip(self.split_texts(texts), metadatas):
+            start_index = 0
+            for chunk in chunks:
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    chunk_metadata["start_index"] = start_index
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+                start_index += len(chunk)
+        return documents
@@ -0,0 +1,245 @@
+"""Sequential A/B comparison of two RAG configurations with early stopping.
+
+After a chunking or retriever change the question is usually just "is the
+new configuration better?", and a full evaluation of both answers that with
+hundreds of judge calls more than needed.  ``compare`` evaluates the two
+configurations on the same questions (``rows_a[i]`` and ``rows_b[i]`` answer
+question ``i``), interleaved in a random order and a round of pairs at a
+time, and checks after every round whether the paired score differences
+already decide the winner:
+
+- ``method="sprt"`` (default): Wald's sequential probability ratio test on
+  the pairs where the two configurations differ (a sequential sign test),
+  run once for "A wins" and once for "B wins".  H0 is a 50/50 split of the
+  decided pairs, H1 a ``0.5 + delta`` share for one side; the test may be
+  checked after every pair without inflating its error rates.  Both tests
+  accepting H0 ends the run as a tie (no difference of size ``delta``);
+- ``method="bootstrap"``: a percentile bootstrap interval of the mean paired
+  difference.  Looking after every round is repeated testing, so look ``j``
+  uses level ``alpha * 6 / (pi^2 * j^2)`` (the levels sum to ``alpha``).
+  An interval inside ``(-margin, margin)`` ends the run as a tie.
+
+The report gives the winner (or ``None`` if ``max_pairs`` ran out first),
+both means, the final bootstrap interval, the per-look history and the
+judge calls used against an estimate for evaluating every pair.
+"""
+
+import asyncio
+import json
+import math
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+def sprt_decision(wins, losses, alpha=0.05, beta=0.2, delta=0.15):
+    """``("a" | "b" | "tie" | None, llr_a, llr_b)`` for ``wins``/``losses`` of A over B.
+
+    Two one-sided Wald tests of p = 0.5 against p = 0.5 + ``delta`` on the
+    pairs that differ, with ``alpha`` split between them.
+    """
+    p1 = 0.5 + delta
+    win, loss = math.log(p1 / 0.5), math.log((1 - p1) / 0.5)
+    llr_a = wins * win + losses * loss
+    llr_b = losses * win + wins * loss
+    upper = math.log((1 - beta) / (alpha / 2))
+    lower = math.log(beta / (1 - alpha / 2))
+    if llr_a >= upper:
+        return "a", llr_a, llr_b
+    if llr_b >= upper:
+        return "b", llr_a, llr_b
+    if llr_a <= lower and llr_b <= lower:
+        return "tie", llr_a, llr_b
+    return None, llr_a, llr_b
+
+
+def bootstrap_interval(differences, alpha=0.05, resamples=2000, seed=0):
+    """Percentile bootstrap ``(low, high)`` interval of the mean of ``differences``."""
+    differences = np.asarray(differences, dtype=np.float64)
+    if len(differences) == 0:
+        return -math.inf, math.inf
+    rng = np.random.default_rng(seed)
+    means = differences[rng.integers(0, len(differences), size=(resamples, len(differences)))].mean(axis=1)
+    low, high = np.quantile(means, [alpha / 2, 1 - alpha / 2])
+    return float(low), float(high)
+
+
+def bootstrap_decision(differences, alpha, margin=0.0, resamples=2000, seed=0):
+    """``("a" | "b" | "tie" | None, low, high)`` from a bootstrap interval at level ``alpha``."""
+    low, high = bootstrap_interval(differences, alpha, resamples, seed)
+    if low > 0:
+        return "a", low, high
+    if high < 0:
+        return "b", low, high
+    if margin and -margin < low and high < margin:
+        return "tie", low, high
+    return None, low, high
+
+
+def look_alpha(alpha, look):
+    """Level for the ``look``-th check (1-based) so that all looks together spend ``alpha``."""
+    return alpha * 6 / (math.pi ** 2 * look ** 2)
+
+
+@dataclass
+class ComparisonReport:
+    """Outcome of ``compare``: who won, after how many pairs, and at what cost."""
+
+    metric: str
+    method: str
+    winner: str
+    pairs: int
+    total_pairs: int
+    mean_a: float
+    mean_b: float
+    interval: tuple
+    wins: int
+    losses: int
+    ties: int
+    skipped: int
+    judge_calls: int
+    seconds: float
+    history: list = field(default_factory=list)
+    results_a: list = field(default_factory=list)
+    results_b: list = field(default_factory=list)
+
+    @property
+    def difference(self):
+        if self.mean_a is None or self.mean_b is None:
+            return None
+        return self.mean_a - self.mean_b
+
+    @property
+    def judge_calls_full(self):
+        """Judge calls a full evaluation of all pairs would take (extrapolated per pair)."""
+        return round(self.judge_calls / self.pairs * self.total_pairs) if self.pairs else 0
+
+    @property
+    def judge_calls_saved(self):
+        return self.judge_calls_full - self.judge_calls
+
+    def summary(self):
+        return {
+            "metric": self.metric,
+            "method": self.method,
+            "winner": self.winner,
+            "pairs": self.pairs,
+            "total_pairs": self.total_pairs,
+            "mean_a": self.mean_a,
+            "mean_b": self.mean_b,
+            "difference": self.difference,
+            "interval": list(self.interval),
+            "wins_a": self.wins,
+            "wins_b": self.losses,
+            "ties": self.ties,
+            "skipped": self.skipped,
+            "judge_calls": self.judge_calls,
+            "judge_calls_full": self.judge_calls_full,
+            "judge_calls_saved": self.judge_calls_saved,
+            "seconds": round(self.seconds, 3),
+            "history": self.history,
+        }
+
+    def write(self, output_dir):
+        """Write ``comparison.json`` and the per-sample ``results_a.jsonl`` / ``results_b.jsonl``."""
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "comparison.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        for name, results in (("results_a.jsonl", self.results_a), ("results_b.jsonl", self.results_b)):
+            with open(os.path.join(output_dir, name), "w", encoding="utf-8") as f:
+                for result in results:
+                    f.write(json.dumps(result.to_dict()) + "\n")
+
+
+async def acompare(evaluator, rows_a, rows_b, metric="answer_correctness", method="sprt", alpha=0.05,
+                   beta=0.2, delta=0.15, margin=0.0, min_pairs=20, max_pairs=None, round_size=None,
+                   resamples=2000, seed=0):
+    """Evaluate ``rows_a``/``rows_b`` pairwise in random order until ``method`` decides.
+
+    Only ``metric`` is scored.  ``round_size`` pairs (default half of the
+    evaluator's ``max_pending``) are evaluated between checks; no decision
+    is taken before ``min_pairs`` scored pairs.  See the module docstring
+    for ``method``, ``alpha``, ``beta``, ``delta`` and ``margin``.
+    """
+    if len(rows_a) != len(rows_b):
+        raise ValueError("rows_a and rows_b must hold the same questions in the same order")
+    if method not in ("sprt", "bootstrap"):
+        raise ValueError(f"unknown method {method!r}")
+    metrics = [m for m in evaluator.metrics if m.name == metric]
+    if not metrics:
+        raise ValueError(f"the evaluator has no {metric!r} metric")
+    total = len(rows_a)
+    order = np.random.default_rng(seed).permutation(total)[:max_pairs or total]
+    round_size = round_size or max(1, evaluator.max_pending // 2)
+
+    calls, start = evaluator.judge_calls, time.perf_counter()
+    results_a, results_b, differences, history = [], [], [], []
+    wins = losses = ties = skipped = 0
+    winner, low, high = None, -math.inf, math.inf
+    for look, begin in enumerate(range(0, len(order), round_size), 1):
+        batch = [int(i) for i in order[begin:begin + round_size]]
+        # Interleave a_i, b_i so both configurations see the same judge load and cache state.
+        interleaved = [row for i in batch for row in (rows_a[i], rows_b[i])]
+        scored = [None] * len(interleaved)
+        async for result in evaluator.astream(interleaved, metrics):
+            scored[result.index] = result
+        for offset, i in enumerate(batch):
+            a, b = scored[2 * offset], scored[2 * offset + 1]
+            a.index = b.index = i
+            results_a.append(a)
+            results_b.append(b)
+            score_a, score_b = a.scores.get(metric), b.scores.get(metric)
+            if score_a is None or score_b is None:
+                skipped += 1
+                continue
+            differences.append(score_a - score_b)
+            wins += score_a > score_b
+            losses += score_a < score_b
+            ties += score_a == score_b
+
+        if len(differences) < min_pairs:
+            continue
+        if method == "sprt":
+            winner, llr_a, llr_b = sprt_decision(wins, losses, alpha, beta, delta)
+            history.append({"pairs": len(differences), "difference": statistics.fmean(differences),
+                            "llr_a": llr_a, "llr_b": llr_b, "decision": winner})
+        else:
+            winner, low, high = bootstrap_decision(differences, look_alpha(alpha, look), margin, resamples, seed)
+            history.append({"pairs": len(differences), "difference": statistics.fmean(differences),
+                            "low": low, "high": high, "decision": winner})
+        if winner is not None:
+            break
+
+    if method == "sprt" or winner is None:
+        low, high = bootstrap_interval(differences, alpha, resamples, seed)
+    scored_a = [r.scores[metric] for r, b in zip(results_a, results_b)
+                if r.scores.get(metric) is not None and b.scores.get(metric) is not None]
+    scored_b = [b.scores[metric] for r, b in zip(results_a, results_b)
+                if r.scores.get(metric) is not None and b.scores.get(metric) is not None]
+    return ComparisonReport(
+        metric=metric,
+        method=method,
+        winner=winner,
+        pairs=len(results_a),
+        total_pairs=total,
+        mean_a=statistics.fmean(scored_a) if scored_a else None,
+        mean_b=statistics.fmean(scored_b) if scored_b else None,
+        interval=(low, high),
+        wins=wins,
+        losses=losses,
+        ties=ties,
+        skipped=skipped,
+        judge_calls=evaluator.judge_calls - calls,
+        seconds=time.perf_counter() - start,
+        history=history,
+        results_a=results_a,
+        results_b=results_b,
+    )
+
+
+def compare(evaluator, rows_a, rows_b, **kwargs):
+    """Synchronous ``acompare``."""
+    return asyncio.run(acompare(evaluator, rows_a, rows_b, **kwargs))
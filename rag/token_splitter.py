@@ -0,0 +1,140 @@
+"""Token splitter that encodes each document once and records token counts.
+
+LangChain's ``TokenTextSplitter`` (modules 13 and 16-19) already slices one
+token array per document, but it throws the token IDs away: module 13 then
+re-encodes every chunk with ``encoding.encode`` just to print its size.  This
+splitter keeps the slice bounds, so each chunk carries ``token_count`` and
+``start_token`` in its metadata and nothing downstream needs to re-tokenise.
+"""
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+
+def load_encoding(encoding_name, model_name):
+    """tiktoken encoding for ``model_name`` if given, else ``encoding_name``."""
+    try:
+        import tiktoken
+    except ImportError as err:
+        raise ImportError(
+            "Could not import tiktoken python package. "
+            "Please install it with `pip install tiktoken`."
+        ) from err
+    if model_name is not None:
+        return tiktoken.encoding_for_model(model_name)
+    return tiktoken.get_encoding(encoding_name)
+
+
+class TokenChunk:
+    """One chunk of a token array: ``ids[start_token:start_token + token_count]``."""
+
+    __slots__ = ("text", "start_token", "token_count")
+
+    def __init__(self, text, start_token, token_count):
+        self.text = text
+        self.start_token = start_token
+        self.token_count = token_count
+
+    def __repr__(self):
+        return f"TokenChunk(start_token={self.start_token}, token_count={self.token_count})"
+
+
+class CountingTokenTextSplitter(TextSplitter):
+    """Drop-in ``TokenTextSplitter`` that reports token counts in metadata.
+
+    Chunk boundaries and text are identical to ``TokenTextSplitter``.  The
+    recorded ``token_count`` is the length of the token slice the chunk was
+    decoded from, i.e. the exact number of tokens the splitter budgeted.
+
+    Pass ``encoding`` to reuse an already-loaded tiktoken ``Encoding`` (or any
+    object with ``encode``/``decode``) instead of resolving one by name.
+    """
+
+    def __init__(
+        self,
+        encoding_name="gpt2",
+        model_name=None,
+        allowed_special=None,
+        disallowed_special="all",
+        encoding=None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        if self._chunk_size <= self._chunk_overlap:
+            raise ValueError("tokens_per_chunk must be greater than chunk_overlap")
+        self._tokenizer = encoding or load_encoding(encoding_name, model_name)
+        self._allowed_special = allowed_special if allowed_special is not None else set()
+        self._disallowed_special = disallowed_special
+
+    def encode(self, text):
+        """Encode ``text`` with the splitter's special-token settings."""
+        return self._tokenizer.encode(
+            text,
+            allowed_special=self._allowed_special,
+            disallowed_special=self._disallowed_special,
+        )
+
+    def split_token_ids(self, input_ids):
+        """Slice an already-encoded token array into ``TokenChunk`` objects."""
+        chunks = []
+        step = self._chunk_size - self._chunk_overlap
+        start = 0
+        total = len(input_ids)
+        while start < total:
+            end = min(start + self._chunk_size, total)
+            decoded = self._tokenizer.decode(input_ids[start:end])
+            if decoded:
+                chunks.append(TokenChunk(decoded, start, end - start))
+            if end == total:
+                break
+            start += step
+        return chunks
+
+    def split_chunks(self, text):
+        """Encode ``text`` once and return its ``TokenChunk`` objects."""
+        return self.split_token_ids(self.encode(text))
+
+    def split_text(self, text):
+        """Split ``text`` and return the chunk strings (LangChain-compatible)."""
+        return [chunk.text for chunk in self.split_chunks(text)]
+
+    def create_documents(self, texts, metadatas=None):
+        """Create ``Document`` chunks carrying ``token_count`` and ``start_token``.
+
+        With ``add_start_index=True`` they also carry ``start_index``, found
+        the same way as ``TextSplitter.create_documents`` does.
+        """
+        metadatas = metadatas or [{}] * len(texts)
+        return self._to_documents(texts, map(self.split_chunks, texts), metadatas)
+
+    def split_documents_batch(self, documents, max_workers=None):
+        """Split many documents, tokenising them in parallel threads.
+
+        tiktoken releases the GIL while encoding, so a thread pool scales
+        across cores without pickling documents into worker processes.
+        Output order matches input order.
+        """
+        documents = list(documents)
+        texts = [doc.page_content for doc in documents]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunked = list(executor.map(self.split_chunks, texts))
+        return self._to_documents(texts, chunked, [doc.metadata for doc in documents])
+
+    def _to_documents(self, texts, chunked, metadatas):
+        documents = []
+        for text, chunks, metadata in zip(texts, chunked, metadatas):
+            index, previous_chunk_len = 0, 0
+            for chunk in chunks:
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    # Same search as ``TextSplitter.create_documents``, so offsets match.
+                    index = text.find(chunk.text, max(0, index + previous_chunk_len - self._chunk_overlap))
+                    chunk_metadata["start_index"] = index
+                    previous_chunk_len = len(chunk.text)
+                chunk_metadata["start_token"] = chunk.start_token
+                chunk_metadata["token_count"] = chunk.token_count
+                documents.append(Document(page_content=chunk.text, metadata=chunk_metadata))
+        return documents
@@ -0,0 +1,213 @@
+"""Tokenisation for the sparse (BM25) retriever.
+
+Module 14's ``BM25Retriever`` splits on whitespace, so ``"LangChain?"``
+and ``"langchain"`` are different terms and every stopword is indexed.
+``Tokenizer`` lower-cases, extracts word tokens with one precompiled regex,
+optionally drops English stopwords and applies a light suffix-stripping
+stemmer (memoised, since a corpus repeats the same words constantly).
+
+Terms are interned to integer IDs by a ``Vocabulary`` shared between
+indexing and querying, and ``tokenize_corpus`` spreads a large corpus over a
+process pool: each worker returns compact ID arrays plus its local term
+list, which the parent remaps onto the shared vocabulary.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+TOKENIZER_FILE = "tokenizer.json"
+
+ENGLISH_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these they this those
+through to too under until up very was we were what when where which while who whom why will with
+would you your yours yourself yourselves
+""".split())
+
+_DEFAULT_PATTERN = r"[^\W_]+(?:['’][^\W_]+)?"
+_VOWELS = frozenset("aeiouy")
+
+
+@lru_cache(maxsize=200000)
+def light_stem(word):
+    """Strip common English inflections (plurals, -ing, -ed, -ly) from ``word``.
+
+    Deliberately conservative: it conflates ``retrievers``/``retriever`` and
+    ``indexing``/``indexed``/``index`` without the over-stemming of a full
+    Porter stemmer.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "xes", "zes")):
+        return word[:-2]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)]
+            if len(stem) >= 3 and _VOWELS.intersection(stem):
+                if stem[-1] == stem[-2] and stem[-1] not in "lsz":
+                    stem = stem[:-1]
+                return stem
+            return word
+    if word.endswith("ly") and len(word) > 5:
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+class Tokenizer:
+    """Callable text-to-terms tokeniser, usable as a ``preprocess_func``.
+
+    Args:
+        lowercase: Lower-case text before matching.
+        stopwords: ``"english"``, an iterable of words to drop, or ``None``.
+        stem: Apply ``light_stem`` to every token.
+        pattern: Regex for one token; compiled once.
+        min_length: Drop tokens shorter than this.
+    """
+
+    def __init__(self, lowercase=True, stopwords="english", stem=True, pattern=_DEFAULT_PATTERN, min_length=1):
+        self.lowercase = lowercase
+        self.stopwords = stopwords
+        self.stem = stem
+        self.pattern = pattern
+        self.min_length = min_length
+        self._regex = re.compile(pattern)
+        self._stems = {}
+        if stopwords == "english":
+            self._stopwords = ENGLISH_STOPWORDS
+        else:
+            self._stopwords = frozenset(stopwords or ())
+
+    def __call__(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self._regex.findall(text)
+        stopwords, min_length = self._stopwords, self.min_length
+        if stopwords or min_length > 1:
+            tokens = [t for t in tokens if t not in stopwords and len(t) >= min_length]
+        if self.stem:
+            # A plain dict in front of light_stem is cheaper than the lru_cache call.
+            stems = self._stems
+            tokens = [stems[t] if t in stems else stems.setdefault(t, light_stem(t)) for t in tokens]
+        return tokens
+
+    def config(self):
+        """JSON-serialisable settings (see ``save``)."""
+        stopwords = self.stopwords if self.stopwords in (None, "english") else sorted(self._stopwords)
+        return {
+            "lowercase": self.lowercase,
+            "stopwords": stopwords,
+            "stem": self.stem,
+            "pattern": self.pattern,
+            "min_length": self.min_length,
+        }
+
+    def save(self, directory):
+        """Write the settings to ``tokenizer.json`` in ``directory``."""
+        with open(os.path.join(directory, TOKENIZER_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.config(), f)
+
+    @classmethod
+    def load(cls, directory):
+        """Re-create a tokeniser saved with ``save``."""
+        with open(os.path.join(directory, TOKENIZER_FILE), encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+class Vocabulary:
+    """Bidirectional term <-> integer ID map."""
+
+    def __init__(self, terms=()):
+        self.terms = []
+        self._ids = {}
+        for term in terms:
+            self.intern(term)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        return term in self._ids
+
+    def get(self, term, default=None):
+        return self._ids.get(term, default)
+
+    def intern(self, term):
+        """ID for ``term``, adding it if it is new."""
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = self._ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def encode(self, tokens, add=False):
+        """``int64`` IDs for ``tokens``; unknown tokens are added or skipped."""
+        if add:
+            return np.fromiter((self.intern(t) for t in tokens), dtype=np.int64)
+        ids = self._ids
+        return np.fromiter((ids[t] for t in tokens if t in ids), dtype=np.int64)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.terms, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def _tokenize_chunk(tokenizer, texts):
+    """Worker: tokenise ``texts`` against a chunk-local vocabulary."""
+    local = Vocabulary()
+    ids = [local.encode(tokenizer(text), add=True) for text in texts]
+    lengths = np.fromiter((len(i) for i in ids), dtype=np.int64, count=len(ids))
+    flat = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+    return local.terms, lengths, flat.astype(np.int32)
+
+
+def tokenize_corpus(texts, tokenizer=None, vocabulary=None, processes=None, chunk_size=2000):
+    """Tokenise ``texts`` into arrays of term IDs interned in ``vocabulary``.
+
+    Args:
+        texts: Sequence of strings.
+        tokenizer: ``Tokenizer`` (or any picklable callable); defaults to
+            ``Tokenizer()``.
+        vocabulary: ``Vocabulary`` to intern into; a new one when ``None``.
+        processes: Worker processes.  ``None`` uses the CPU count, ``0`` or
+            ``1`` tokenises in this process.
+        chunk_size: Texts per worker task.
+
+    Returns ``(id_arrays, vocabulary)`` with one ``int64`` array per text.
+    """
+    tokenizer = tokenizer or Tokenizer()
+    vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+    texts = list(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(chunks) <= 1:
+        results = [_tokenize_chunk(tokenizer, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_tokenize_chunk, [tokenizer] * len(chunks), chunks))
+
+    id_arrays = []
+    for local_terms, lengths, flat in results:
+        # One dict lookup per distinct term per chunk, then a vectorised remap.
+        remap = np.fromiter((vocabulary.intern(t) for t in local_terms), dtype=np.int64, count=len(local_terms))
+        id_arrays.extend(np.split(remap[flat], np.cumsum(lengths)[:-1]))
+    return id_arrays, vocabulary
@@ -0,0 +1,506 @@
+"""Embedded NumPy vector store with a memory-mapped matrix and exact top-k.
+
+Modules 10, 11 and 14 use Chroma, which is slow to import and has been the
+source of our Python 3.14 problems (see ``Makefile.common``).  For the corpus
+sizes in this course an exact search over one matrix is both simpler and
+faster:
+
+- embeddings live in a single float32 (or float16) matrix, L2-normalised on
+  insert so cosine similarity is one matrix-vector product;
+- top-k is ``argpartition`` over the scores, then a sort of just those k;
+- on disk the matrix is a raw ``vectors.bin`` file opened with ``np.memmap``,
+  so opening a store is instant and every process that opens it shares the
+  same page-cache pages instead of holding its own copy;
+- ids, texts and metadata live in a ``docs.jsonl`` sidecar with a
+  ``docs.idx`` offset table, so a search only decodes the k rows it returns.
+
+``NumpyVectorStore`` implements LangChain's ``VectorStore`` interface, so
+``as_retriever(search_kwargs={"k": ...})`` works as it does with Chroma.
+Metadata is indexed by ``rag.metadata_index`` and ``filter`` takes Chroma's
+operator syntax; selective filters are applied before scoring, so a filtered
+query only touches the matching rows.  For
+large corpora an approximate index from ``rag.ann`` or a quantised one from
+``rag.quantization`` can be attached with ``build_index``.
+"""
+
+import json
+import os
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from rag.metadata_index import MetadataIndex
+
+_DTYPES = {"float32": np.float32, "float16": np.float16}
+_META_FILE = "meta.json"
+_VECTORS_FILE = "vectors.bin"
+_DOCS_FILE = "docs.jsonl"
+_INDEX_FILE = "docs.idx"
+_DELETED_FILE = "deleted.json"
+_ANN_DIR = "ann"
+_METADATA_DIR = "metadata"
+_SCORE_BLOCK_ROWS = 2048
+# Filters matching at most this fraction of rows are searched by gathering just
+# those rows; broader ones use a mask over the full scan (or the ANN index).
+_SUBSET_FRACTION = 0.25
+
+
+def top_k_indices(scores, k):
+    """Indices of the ``k`` largest ``scores``, best first (``argpartition`` + small sort)."""
+    if k <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    k = min(k, len(scores))
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def mmr_indices(query, candidates, k=4, lambda_mult=0.5):
+    """Maximal marginal relevance order of ``candidates`` (best first).
+
+    Same selections as LangChain's ``maximal_marginal_relevance``, but the
+    pairwise similarities are computed once and each step updates a running
+    "most similar selected" vector, so selecting ``k`` of ``n`` costs one
+    ``n x n`` product plus ``k`` vector operations instead of a Python loop.
+    """
+    candidates = normalize_rows(np.asarray(candidates, dtype=np.float32))
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    query = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    relevance = candidates @ (query / norm if norm else query)
+    similarity = candidates @ candidates.T
+    picked = [int(np.argmax(relevance))]
+    redundancy = similarity[:, picked[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[picked[0]] = False
+    while len(picked) < k:
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[:, best], out=redundancy)
+    return picked
+
+
+def normalize_rows(matrix):
+    """``matrix`` with every non-zero row scaled to unit L2 norm."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+class NumpyVectorStore(VectorStore):
+    """In-process vector store backed by one (optionally memory-mapped) matrix.
+
+    Args:
+        embedding: LangChain ``Embeddings`` used for documents and queries.
+        persist_directory: Where to keep the store.  ``None`` keeps everything
+            in memory.  An existing store in the directory is opened.
+        dtype: ``"float32"`` or ``"float16"`` storage for new stores.
+        normalize: L2-normalise vectors so scores are cosine similarities.
+
+    ``similarity_search_with_score`` returns the cosine similarity (higher is
+    better), which is also used as the relevance score.
+    """
+
+    def __init__(self, embedding, persist_directory=None, dtype="float32", normalize=True):
+        if dtype not in _DTYPES:
+            raise ValueError(f"dtype must be one of {sorted(_DTYPES)}, got {dtype!r}")
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self.normalize = normalize
+        self.dtype = dtype
+        self.dim = None
+        self._count = 0
+        self._deleted = set()
+        self._id_to_row = None
+        self._metadata_index = None
+        self.index = None
+
+        # In-memory backing (used when persist_directory is None).
+        self._buffer = None
+        self._records = []
+
+        # On-disk backing.
+        self._matrix = None
+        self._offsets = None
+
+        if persist_directory is not None:
+            os.makedirs(persist_directory, exist_ok=True)
+            if os.path.isfile(self._path(_META_FILE)):
+                self._open()
+
+    # ------------------------------------------------------------------
+    # VectorStore interface
+    # ------------------------------------------------------------------
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def __len__(self):
+        return self._count - len(self._deleted)
+
+    def add_texts(self, texts, metadatas=None, *, ids=None, **kwargs):
+        """Embed ``texts`` and append them to the store."""
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas=metadatas, ids=ids)
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        """Append pre-computed ``embeddings`` (one row per text)."""
+        texts = list(texts)
+        if metadatas is not None and len(metadatas) != len(texts):
+            raise ValueError(
+                f"The number of metadatas must match the number of texts. "
+                f"Got {len(metadatas)} metadatas and {len(texts)} texts."
+            )
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        if len(ids) != len(texts):
+            raise ValueError(f"Got {len(ids)} ids for {len(texts)} texts.")
+        metadatas = metadatas or [{} for _ in texts]
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(texts):
+            raise ValueError("embeddings must be a 2-D array with one row per text")
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {matrix.shape[1]}")
+        if self.normalize:
+            matrix = normalize_rows(matrix)
+        matrix = matrix.astype(_DTYPES[self.dtype])
+
+        records = [
+            {"id": id_, "text": text, "metadata": metadata}
+            for id_, text, metadata in zip(ids, texts, metadatas)
+        ]
+        first_row = self._count
+        metadata_index = self._metadata()
+        if self.persist_directory is None:
+            self._append_memory(matrix, records)
+        else:
+            self._append_disk(matrix, records)
+        self._count = first_row + len(records)
+        metadata_index.add(first_row, metadatas)
+        if self.persist_directory is not None:
+            metadata_index.save(self._path(_METADATA_DIR))
+        if self.index is not None:
+            self.index.add(matrix, start_row=first_row)
+            if self.persist_directory is not None:
+                self.index.save(self._path(_ANN_DIR))
+        if self._id_to_row is not None:
+            for offset, id_ in enumerate(ids):
+                self._id_to_row[id_] = first_row + offset
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        """Tombstone the rows for ``ids``; they are skipped by every search."""
+        if not ids:
+            return False
+        id_to_row = self._ids()
+        rows = {id_to_row[id_] for id_ in ids if id_ in id_to_row}
+        if not rows:
+            return False
+        self._deleted |= rows
+        for id_ in ids:
+            id_to_row.pop(id_, None)
+        if self.persist_directory is not None:
+            _write_json_atomic(self._path(_DELETED_FILE), sorted(self._deleted))
+        return True
+
+    def get_by_ids(self, ids, /):
+        """Return the documents stored under ``ids`` (missing ids are skipped)."""
+        id_to_row = self._ids()
+        return [self._document(id_to_row[id_]) for id_ in ids if id_ in id_to_row]
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        """Return the ``k`` documents most similar to ``query``."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter=filter, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        """Return ``(document, cosine_similarity)`` pairs for the top ``k`` rows."""
+        vector = self._embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(vector, k, filter=filter, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        """Return the ``k`` documents most similar to an embedding vector."""
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter=filter, **kwargs)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        """Top-``k`` ``(document, score)`` pairs for an embedding vector."""
+        rows, scores = self.search_vector(self._prepare_query(embedding), k, filter=filter, **kwargs)
+        return [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def max_marginal_relevance_search(self, query, k=4, fetch_k=20, lambda_mult=0.5, filter=None, **kwargs):
+        """Diverse top-``k`` via maximal marginal relevance over ``fetch_k`` candidates."""
+        vector = self._embedding.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(vector, k, fetch_k, lambda_mult, filter=filter, **kwargs)
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, lambda_mult=0.5, filter=None, **kwargs):
+        query = self._prepare_query(embedding)
+        rows, _ = self.search_vector(query, fetch_k, filter=filter, **kwargs)
+        if len(rows) == 0:
+            return []
+        candidates = self.vectors(rows)
+        picked = mmr_indices(query, candidates, k=k, lambda_mult=lambda_mult)
+        return [self._document(rows[i]) for i in picked]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, persist_directory=None, **kwargs):
+        """Create a store from ``texts`` (LangChain ``VectorStore`` API)."""
+        store = cls(embedding, persist_directory=persist_directory, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def build_index(self, index):
+        """Fit an index (``rag.ann.IVFIndex``, ``rag.quantization.QuantizedIndex``) and search through it.
+
+        The index is saved next to a persisted store and reopened with it;
+        later ``add_texts`` calls add to it incrementally.
+        """
+        index.fit(self.matrix)
+        self.index = index
+        if self.persist_directory is not None:
+            index.save(self._path(_ANN_DIR))
+        return index
+
+    # ------------------------------------------------------------------
+    # Search primitives shared with the index/filter extensions
+    # ------------------------------------------------------------------
+
+    @property
+    def matrix(self):
+        """The ``(count, dim)`` vector matrix, including tombstoned rows."""
+        if self._count == 0:
+            return np.zeros((0, self.dim or 0), dtype=_DTYPES[self.dtype])
+        if self.persist_directory is None:
+            return self._buffer[:self._count]
+        return self._matrix
+
+    def vectors(self, rows):
+        """Float32 copies of the given rows."""
+        return np.asarray(self.matrix[np.asarray(rows, dtype=np.int64)], dtype=np.float32)
+
+    def scores(self, query):
+        """Cosine scores of ``query`` against every row (float32).
+
+        float16 matrices are scored in small blocks so the upcast never needs
+        a full float32 copy of the store; this halves memory but is slower
+        than scoring float32 directly.
+        """
+        matrix = self.matrix
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        out = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + _SCORE_BLOCK_ROWS], dtype=np.float32)
+            out[start:start + len(block)] = block @ query
+        return out
+
+    def search_vector(self, query, k, filter=None, exact=False, **search_params):
+        """``(rows, scores)`` of the top ``k`` live rows.
+
+        A selective ``filter`` is resolved to its rows first and only those
+        rows are scored, exactly.  Otherwise the attached ANN index is used
+        when there is one (``search_params`` such as ``nprobe`` are passed to
+        it), or with ``exact=True`` or no index every row is scored.
+        """
+        if self._count == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if filter:
+            rows = self.filter_rows(filter)
+            if len(rows) <= _SUBSET_FRACTION * self._count:
+                scores = self.vectors(rows) @ query
+                top = top_k_indices(scores, k)
+                return rows[top], scores[top]
+            mask = np.zeros(self._count, dtype=bool)
+            mask[rows] = True
+        else:
+            mask = self.live_mask()
+        if self.index is not None and not exact:
+            return self.index.search(query, k, mask=mask, vectors=self.matrix, **search_params)
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        rows = top_k_indices(scores, k)
+        return rows, scores[rows]
+
+    def filter_rows(self, filter=None):
+        """Sorted live rows matching ``filter`` (see ``rag.metadata_index``)."""
+        rows = self._metadata().rows(filter) if filter else np.arange(self._count)
+        if self._deleted:
+            rows = rows[~np.isin(rows, np.fromiter(self._deleted, dtype=np.int64))]
+        return rows
+
+    def live_mask(self, filter=None):
+        """Boolean mask of rows that are not deleted and match ``filter``.
+
+        Returns ``None`` when every row qualifies.
+        """
+        if not self._deleted and not filter:
+            return None
+        mask = np.zeros(self._count, dtype=bool)
+        mask[self.filter_rows(filter)] = True
+        return mask
+
+    def _prepare_query(self, embedding):
+        query = np.asarray(embedding, dtype=np.float32)
+        if self.normalize:
+            norm = np.linalg.norm(query)
+            if norm:
+                query = query / norm
+        return query
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def _document(self, row):
+        record = self._record(row)
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"])
+
+    def _record(self, row):
+        if self.persist_directory is None:
+            return self._records[row]
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        with open(self._path(_DOCS_FILE), "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    def _metadata(self):
+        """The ``MetadataIndex``, loaded or (for older stores) built on first use."""
+        if self._metadata_index is None:
+            directory = self._path(_METADATA_DIR) if self.persist_directory is not None else None
+            index = None
+            if directory is not None and MetadataIndex.exists(directory):
+                index = MetadataIndex.load(directory)
+            if index is None or index.count != self._count:
+                # No saved index (older store), or an add stopped before it was saved.
+                index = MetadataIndex()
+                if self.persist_directory is None:
+                    index.add(0, (record["metadata"] for record in self._records))
+                elif self._count:
+                    index.add(0, (record["metadata"] for record in self._iter_disk_records()))
+                    index.save(directory)
+            self._metadata_index = index
+        return self._metadata_index
+
+    def _ids(self):
+        """Lazily built ``id -> row`` map (only needed for delete/get_by_ids)."""
+        if self._id_to_row is None:
+            self._id_to_row = {}
+            if self.persist_directory is None:
+                records = enumerate(self._records)
+            else:
+                records = enumerate(self._iter_disk_records())
+            for row, record in records:
+                if row not in self._deleted:
+                    self._id_to_row[record["id"]] = row
+        return self._id_to_row
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _path(self, name):
+        return os.path.join(self.persist_directory, name)
+
+    def _append_memory(self, matrix, records):
+        needed = self._count + len(matrix)
+        if self._buffer is None or needed > len(self._buffer):
+            capacity = max(needed, 2 * (len(self._buffer) if self._buffer is not None else 0), 1024)
+            buffer = np.empty((capacity, self.dim), dtype=_DTYPES[self.dtype])
+            if self._count:
+                buffer[:self._count] = self._buffer[:self._count]
+            self._buffer = buffer
+        self._buffer[self._count:needed] = matrix
+        self._records.extend(records)
+
+    def _append_disk(self, matrix, records):
+        with open(self._path(_VECTORS_FILE), "ab") as f:
+            f.write(np.ascontiguousarray(matrix).tobytes())
+
+        lines = [json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records]
+        start = int(self._offsets[-1]) if self._offsets is not None else 0
+        offsets = np.cumsum([start] + [len(line) for line in lines], dtype=np.uint64)
+        with open(self._path(_DOCS_FILE), "ab") as f:
+            f.writelines(lines)
+        with open(self._path(_INDEX_FILE), "ab") as f:
+            f.write((offsets if self._offsets is None else offsets[1:]).tobytes())
+
+        count = self._count + len(records)
+        _write_json_atomic(
+            self._path(_META_FILE),
+            {"version": 1, "dim": self.dim, "dtype": self.dtype, "count": count, "normalize": self.normalize},
+        )
+        self._map(count)
+
+    def _open(self):
+        with open(self._path(_META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.dtype = meta["dtype"]
+        self.normalize = meta.get("normalize", True)
+        deleted_path = self._path(_DELETED_FILE)
+        if os.path.isfile(deleted_path):
+            with open(deleted_path, encoding="utf-8") as f:
+                self._deleted = set(json.load(f))
+        self._map(meta["count"])
+        if os.path.isfile(os.path.join(self._path(_ANN_DIR), "meta.json")):
+            from rag.ann import load_index
+
+            self.index = load_index(self._path(_ANN_DIR))
+
+    def _map(self, count):
+        self._count = count
+        if count == 0:
+            return
+        self._matrix = np.memmap(
+            self._path(_VECTORS_FILE), dtype=_DTYPES[self.dtype], mode="r", shape=(count, self.dim)
+        )
+        self._offsets = np.memmap(self._path(_INDEX_FILE), dtype=np.uint64, mode="r", shape=(count + 1,))
+
+    def _iter_disk_records(self):
+        with open(self._path(_DOCS_FILE), "rb") as f:
+            for _ in range(self._count):
+                yield json.loads(f.readline())
+
+
+def scored_search(vectorstore, query, **kwargs):
+    """``[(document, score)]`` from any LangChain store, higher score is better.
+
+    ``NumpyVectorStore`` scores are cosine similarities in ``[-1, 1]``, which
+    ``similarity_search_with_relevance_scores`` warns about whenever one is
+    negative, so they are taken from ``similarity_search_with_score``.  Other
+    stores go through their relevance function (distances become similarities).
+    """
+    if isinstance(vectorstore, NumpyVectorStore):
+        return vectorstore.similarity_search_with_score(query, **kwargs)
+    return vectorstore.similarity_search_with_relevance_scores(query, **kwargs)
+
+
+async def ascored_search(vectorstore, query, **kwargs):
+    """Async ``scored_search``."""
+    if isinstance(vectorstore, NumpyVectorStore):
+        return await vectorstore.asimilarity_search_with_score(query, **kwargs)
+    return await vectorstore.asimilarity_search_with_relevance_scores(query, **kwargs)